@@ -2,58 +2,69 @@ from flask import Flask
 
 from config import (
     ALIYUN_API_KEY,
-    MAIL_DEFAULT_SENDER,
-    MAIL_PASSWORD,
-    MAIL_PORT,
-    MAIL_SERVER,
-    MAIL_USE_SSL,
-    MAIL_USE_TLS,
-    MAIL_USERNAME,
     SECRET_KEY,
     SQLALCHEMY_DATABASE_URI,
     SQLALCHEMY_TRACK_MODIFICATIONS,
+    STATION_STREAM_SERVER_MAX_CLIENTS,
 )
-from .extensions import db, mail, migrate
+from .extensions import db, migrate
+from .utils.json_provider import OrjsonProvider, orjson
 
 
-def create_app() -> Flask:
+def _base_app() -> Flask:
     app = Flask(__name__)
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
 
     app.config["SQLALCHEMY_DATABASE_URI"] = SQLALCHEMY_DATABASE_URI
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = SQLALCHEMY_TRACK_MODIFICATIONS
     if SECRET_KEY:
         app.config["SECRET_KEY"] = SECRET_KEY
 
-    # Flask-Mail
-    app.config["MAIL_SERVER"] = MAIL_SERVER
-    app.config["MAIL_PORT"] = MAIL_PORT
-    app.config["MAIL_USE_TLS"] = MAIL_USE_TLS
-    app.config["MAIL_USE_SSL"] = MAIL_USE_SSL
-    app.config["MAIL_USERNAME"] = MAIL_USERNAME
-    app.config["MAIL_PASSWORD"] = MAIL_PASSWORD
-    app.config["MAIL_DEFAULT_SENDER"] = MAIL_DEFAULT_SENDER
-
     # Aliyun Qwen (chat)
     app.config["ALIYUN_API_KEY"] = ALIYUN_API_KEY
 
     db.init_app(app)
-    mail.init_app(app)
     migrate.init_app(app, db)
 
     # Ensure models are imported for Flask-Migrate autogenerate.
     from . import models  # noqa: F401
+
+    return app
+
+
+def create_app() -> Flask:
+    app = _base_app()
+
     from .api import register_blueprints
+    from .commands import register_commands
 
     register_blueprints(app)
+    register_commands(app)
 
     # Pre-warm the application on startup
     with app.app_context():
-        from .services.prediction_service import _load_model
+        from .ml.registry import model_registry
         import logging
         try:
-            _load_model()
+            model_registry.current()
             logging.info("🚲 Bike prediction model correctly preloaded.")
         except Exception as e:
             logging.error(f"⚠️ Failed to preload prediction model: {e}")
 
     return app
+
+
+def create_stream_app() -> Flask:
+    """
+    App of the station stream server (stream_wsgi.py, run by gunicorn's gevent workers): only the
+    station routes, no model preload, and a client cap sized for greenlets rather than threads.
+    """
+    app = _base_app()
+
+    from .api.station_routes import station_bp
+    from .services.station_stream_service import station_broadcaster
+
+    app.register_blueprint(station_bp)
+    station_broadcaster.max_clients = STATION_STREAM_SERVER_MAX_CLIENTS
+    return app
@@ -2,14 +2,24 @@ from flask import Flask
 
 
 def register_blueprints(app: Flask) -> None:
+    from app.utils.http_cache import compress_response
+
+    from .auth import clear_request_auth
     from .station_routes import station_bp
     from .user_routes import user_bp
     from .weather_routes import weather_bp
     from .journey_routes import journey_bp  # journey planner
     from .chat_routes import chat_bp
+    from .jwks_routes import jwks_bp
+    from .model_routes import model_bp
 
     app.register_blueprint(station_bp)
     app.register_blueprint(user_bp)
     app.register_blueprint(weather_bp)
     app.register_blueprint(journey_bp)
-    app.register_blueprint(chat_bp)
\ No newline at end of file
+    app.register_blueprint(chat_bp)
+    app.register_blueprint(jwks_bp)
+    app.register_blueprint(model_bp)
+
+    app.teardown_request(clear_request_auth)
+    app.after_request(compress_response)
\ No newline at end of file
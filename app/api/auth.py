@@ -0,0 +1,86 @@
+"""
+Shared request authentication for the blueprints.
+
+The Bearer token is parsed and verified at most once per request and the result is kept on
+``flask.g``; the User row is only loaded (also at most once) by routes that need more than the id.
+"""
+
+import functools
+from typing import Any, Callable, Optional
+
+from flask import g, jsonify, request
+
+from app.extensions import db
+from app.models import User
+from app.services.user_service import AuthError, verify_access_token
+
+ErrorResponder = Callable[[str, int], Any]
+
+
+def _default_error(message: str, status_code: int):
+    return jsonify({"code": 40101, "msg": message, "data": None}), status_code
+
+
+def bearer_token() -> Optional[str]:
+    """The access token from ``Authorization: Bearer <token>``, or None if the header is missing or malformed."""
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.strip().lower().startswith("bearer "):
+        return None
+    return auth_header.strip()[7:].strip()
+
+
+def resolve_auth() -> dict[str, Any]:
+    """Verified access-token payload for this request (cached on g); raises AuthError on failure."""
+    if "auth_payload" not in g:
+        token = bearer_token()
+        try:
+            if token is None:
+                raise AuthError("missing or invalid Authorization header", 401)
+            g.auth_payload = verify_access_token(token)
+            g.auth_error = None
+        except AuthError as exc:
+            g.auth_payload = None
+            g.auth_error = exc
+    if g.auth_error is not None:
+        raise g.auth_error
+    return g.auth_payload
+
+
+def current_user_id() -> int:
+    return resolve_auth()["sub"]
+
+
+def current_user() -> User:
+    """The authenticated User row, loaded once per request; raises AuthError if it is gone or disabled."""
+    if "current_user" not in g:
+        g.current_user = db.session.get(User, current_user_id())
+    user = g.current_user
+    if user is None or not user.is_active:
+        raise AuthError("user not found or disabled", 401)
+    return user
+
+
+def clear_request_auth(exc: Optional[BaseException] = None) -> None:
+    """teardown_request hook: g outlives the request when an app context is reused (CLI, tests)."""
+    for key in ("auth_payload", "auth_error", "current_user"):
+        g.pop(key, None)
+
+
+def require_auth(on_error: ErrorResponder = _default_error):
+    """
+    Route decorator: reject the request with ``on_error(message, status_code)`` unless it carries a valid
+    access token. Inside the route, use current_user_id() / current_user().
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                resolve_auth()
+            except AuthError as exc:
+                return on_error(exc.message, exc.status_code)
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
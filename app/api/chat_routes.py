@@ -3,6 +3,8 @@ import logging
 
 from flask import Blueprint, request, jsonify, Response, stream_with_context
 
+import config
+from app.api.auth import current_user_id, require_auth
 from app.extensions import db
 from app.models import Session
 from app.services.chat_service import (
@@ -11,31 +13,41 @@ from app.services.chat_service import (
     get_session_messages,
     generate_session_id,
 )
-from app.services.user_service import AuthError, verify_access_token
+from app.utils.admission import AdmissionController, AdmissionRejected, FileSlotPool
 
 logger = logging.getLogger(__name__)
 chat_bp = Blueprint("chat", __name__, url_prefix="/api/chat")
 
+# Caps concurrent LLM calls made by this worker (and optionally by all workers on the host)
+llm_admission = AdmissionController(
+    max_concurrent=config.CHAT_MAX_CONCURRENT_LLM_CALLS,
+    per_user_limit=config.CHAT_MAX_IN_FLIGHT_PER_USER,
+    max_queue=config.CHAT_ADMISSION_MAX_QUEUE,
+    queue_timeout=config.CHAT_ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    slot_pool=(
+        FileSlotPool(config.CHAT_ADMISSION_SLOT_DIR, config.CHAT_ADMISSION_GLOBAL_SLOTS)
+        if config.CHAT_ADMISSION_GLOBAL_SLOTS > 0
+        else None
+    ),
+)
+
+
+def _auth_error(message: str, status_code: int):
+    return jsonify({"error": message}), status_code
 
-def _require_auth():
-    """Require the request to carry a valid access_token, returns (payload, None) on success, or (None, (response, status_code)) on failure."""
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.strip().lower().startswith("bearer "):
-        return None, (jsonify({"error": "missing or invalid Authorization header"}), 401)
-    token = auth_header.strip()[7:].strip()
-    try:
-        payload = verify_access_token(token)
-        return payload, None
-    except AuthError as exc:
-        return None, (jsonify({"error": exc.message}), 401)
+
+def _busy_response(exc: AdmissionRejected, body: dict):
+    """429 with Retry-After; body carries the reason and, when the request was queued, its queue position."""
+    logger.warning("Chat request rejected by admission control: %s (queue_position=%s)", exc.reason, exc.queue_position)
+    response = jsonify(body)
+    response.status_code = 429
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response
 
 
 @chat_bp.route("/", methods=["POST"])
+@require_auth(_auth_error)
 def chat():
-    payload, err = _require_auth()
-    if err is not None:
-        return err[0], err[1]
-
     data = request.get_json(silent=True)
     if not isinstance(data, dict):
         return (
@@ -64,9 +76,21 @@ def chat():
             400,
         )
 
-    user_id = payload["sub"]
+    user_id = current_user_id()
     session_id = generate_session_id(user_id, chat_id)
 
+    try:
+        ticket = llm_admission.acquire(user_id)
+    except AdmissionRejected as exc:
+        return _busy_response(
+            exc,
+            {
+                "code": 42901,
+                "msg": exc.message,
+                "data": {"reason": exc.reason, "queue_position": exc.queue_position, "retry_after": exc.retry_after},
+            },
+        )
+
     try:
         reply = generate_chat_response(session_id, message, user_id)
         data = {
@@ -86,14 +110,13 @@ def chat():
             ),
             500,
         )
+    finally:
+        ticket.release()
 
 
 @chat_bp.route("/stream", methods=["POST"])
+@require_auth(_auth_error)
 def chat_stream_api():
-    payload, err = _require_auth()
-    if err is not None:
-        return err[0], err[1]
-
     data = request.get_json(silent=True)
     if not isinstance(data, dict):
         return jsonify({"error": "Request body must be a JSON object"}), 400
@@ -104,10 +127,18 @@ def chat_stream_api():
     if not message or not isinstance(message, str):
         return jsonify({"error": "message field is required"}), 400
 
-    user_id = payload["sub"]
+    user_id = current_user_id()
     session_id = generate_session_id(user_id, chat_id)
 
-    return Response(
+    try:
+        ticket = llm_admission.acquire(user_id)
+    except AdmissionRejected as exc:
+        return _busy_response(
+            exc,
+            {"error": exc.message, "reason": exc.reason, "queue_position": exc.queue_position, "retry_after": exc.retry_after},
+        )
+
+    response = Response(
         stream_with_context(generate_chat_stream(session_id, message, user_id)),
         mimetype="text/event-stream",
         headers={
@@ -116,19 +147,19 @@ def chat_stream_api():
             "Connection": "keep-alive",
         },
     )
+    # The server closes every response, also when the client left before the stream started
+    response.call_on_close(ticket.release)
+    return response
 
 
 @chat_bp.route("/sessions", methods=["GET"])
+@require_auth(_auth_error)
 def list_sessions():
     """
     Return the current user's historical session list.
     Authentication method is the same as the chat endpoint: requires Authorization: Bearer <access_token>.
     """
-    payload, err = _require_auth()
-    if err is not None:
-        return err[0], err[1]
-
-    user_id = payload["sub"]
+    user_id = current_user_id()
     sessions = (
         db.session.query(Session)
         .filter_by(user_id=user_id)
@@ -149,16 +180,13 @@ def list_sessions():
 
 
 @chat_bp.route("/sessions/<path:session_id>/messages", methods=["GET"])
+@require_auth(_auth_error)
 def get_session_history(session_id: str):
     """
     Get historical conversation records for the specified session.
     Requires Authorization: Bearer <access_token>, and can only access your own sessions.
     """
-    payload, err = _require_auth()
-    if err is not None:
-        return err[0], err[1]
-
-    user_id = payload["sub"]
+    user_id = current_user_id()
 
     messages = get_session_messages(session_id, user_id)
     if messages is None:
@@ -0,0 +1,15 @@
+"""Public JWK Set for verifying access tokens signed with EdDSA / RS256."""
+
+from flask import Blueprint, jsonify
+
+from app.services.jwt_key_service import access_token_keys
+
+jwks_bp = Blueprint("jwks", __name__, url_prefix="/.well-known")
+
+
+@jwks_bp.get("/jwks.json")
+def jwks():
+    """Return the public signing key(s); empty when access tokens use HS256."""
+    resp = jsonify(access_token_keys.jwks())
+    resp.headers["Cache-Control"] = "public, max-age=3600"
+    return resp
@@ -0,0 +1,19 @@
+"""Prediction model status (the version this worker serves and its inference batching)."""
+
+from flask import Blueprint, jsonify
+
+from app.ml.batching import prediction_batcher
+from app.ml.registry import model_registry
+
+model_bp = Blueprint("model", __name__, url_prefix="/api/model")
+
+
+@model_bp.get("/status")
+def model_status():
+    """
+    Active model version, when this worker loaded it, its training metrics and the watcher state, plus
+    the micro-batching metrics (requests per predict call, latency added by waiting for a batch).
+    """
+    resp = jsonify({"code": 0, "msg": "ok", "data": {**model_registry.status(), "batching": prediction_batcher.stats()}})
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
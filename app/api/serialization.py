@@ -0,0 +1,176 @@
+"""
+Response serialization for the read endpoints.
+
+Service results are validated against the response contract in one Pydantic TypeAdapter pass and
+dumped straight to JSON bytes by pydantic-core, instead of model_validate + model_dump per item
+followed by jsonify over the resulting dicts.
+
+Snapshot-backed list endpoints can also answer with a columnar layout (``?format=columnar``: one array
+per field instead of one object per row) and in MessagePack when the client asks for it in ``Accept``
+and the msgpack package is installed. Every encoding is built once per snapshot version, and the
+version is sent as ``X-Snapshot-Version`` so clients can ask for deltas (``?since=``). The version
+also makes the strong ETag, so a revalidation of an unchanged snapshot is a 304 without encoding.
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from flask import Response, current_app, jsonify, request
+from pydantic import BaseModel, TypeAdapter
+
+from app.services.station_service import Snapshot
+from app.utils.http_cache import conditional_response
+
+try:
+    import msgpack
+except ImportError:  # optional dependency; clients then always get JSON
+    msgpack = None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+_MSGPACK_ALIASES = (MSGPACK_MIMETYPE, "application/x-msgpack", "application/vnd.msgpack")
+LAYOUTS = ("rows", "columnar")
+VERSION_HEADER = "X-Snapshot-Version"
+
+# The {"code", "data", "msg"} envelope, keys in the sorted order jsonify writes them
+_ENVELOPE_HEAD = b'{"code":0,"data":'
+_ENVELOPE_TAIL = b',"msg":"ok"}\n'
+
+
+class EnvelopeSerializer:
+    """Serialize ``{"code": 0, "msg": "ok", "data": <value>}`` for values of a contract type."""
+
+    def __init__(self, contract: Any) -> None:
+        self.adapter = TypeAdapter(contract)
+
+    def dump_data(self, value: Any) -> bytes:
+        """JSON bytes of the validated value (the ``data`` member)."""
+        return self.adapter.dump_json(self.adapter.validate_python(value))
+
+    def dumps(self, value: Any) -> bytes:
+        return _ENVELOPE_HEAD + self.dump_data(value) + _ENVELOPE_TAIL
+
+    def response(self, value: Any, status: int = 200) -> Response:
+        return Response(self.dumps(value), status=status, mimetype="application/json")
+
+
+def negotiate_mimetype() -> str:
+    """application/msgpack if the client prefers it (and msgpack is installed), else application/json."""
+    if msgpack is None:
+        return JSON_MIMETYPE
+    best = request.accept_mimetypes.best_match((JSON_MIMETYPE, *_MSGPACK_ALIASES), default=JSON_MIMETYPE)
+    return MSGPACK_MIMETYPE if best in _MSGPACK_ALIASES else JSON_MIMETYPE
+
+
+def requested_layout() -> Optional[str]:
+    """The ``?format=`` layout (default "rows"), or None if it is not one of LAYOUTS."""
+    layout = request.args.get("format", "rows")
+    return layout if layout in LAYOUTS else None
+
+
+def _encode_envelope(data: Any, mimetype: str) -> bytes:
+    envelope = {"code": 0, "msg": "ok", "data": data}
+    if mimetype == MSGPACK_MIMETYPE:
+        return msgpack.packb(envelope, use_bin_type=True)
+    provider = current_app.json
+    if hasattr(provider, "dumps_bytes"):
+        return provider.dumps_bytes(envelope) + b"\n"
+    return provider.dumps(envelope, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def encode_snapshot(snapshot: Snapshot, serializer: EnvelopeSerializer, contract: type[BaseModel], layout: str, mimetype: str) -> bytes:
+    """The response body for a snapshot in the given layout and media type (memoised on the snapshot)."""
+
+    def build(snap: Snapshot) -> bytes:
+        if layout == "columnar":
+            return _encode_envelope(snap.columns(tuple(contract.model_fields)), mimetype)
+        if mimetype == JSON_MIMETYPE:
+            return serializer.dumps(snap.rows)
+        return _encode_envelope(list(snap.rows), mimetype)
+
+    return snapshot.encoded((layout, mimetype), build)
+
+
+def _format_error():
+    return jsonify({"code": 1, "msg": f"format must be one of: {', '.join(LAYOUTS)}", "data": None}), 400
+
+
+def snapshot_etag(snapshot: Snapshot, *parts: Any) -> str:
+    """Strong ETag for one representation of a snapshot version."""
+    return "-".join(str(part) for part in (snapshot.version, *parts))
+
+
+def _snapshot_body_response(
+    snapshot: Snapshot,
+    etag: str,
+    build: Callable[[], bytes],
+    mimetype: str,
+    max_age: int,
+    last_modified: Optional[datetime],
+) -> Response:
+    def respond() -> Response:
+        return Response(build(), mimetype=mimetype)
+
+    resp = conditional_response(etag, respond, last_modified=last_modified, max_age=max_age, vary=("Accept",))
+    resp.headers[VERSION_HEADER] = str(snapshot.version)
+    return resp
+
+
+def snapshot_response(
+    snapshot: Snapshot,
+    serializer: EnvelopeSerializer,
+    contract: type[BaseModel],
+    max_age: int = 0,
+    last_modified: Optional[datetime] = None,
+):
+    """
+    Serve a snapshot honouring ``?format=`` and ``Accept``; 400 for an unknown format, 304 (nothing
+    encoded) when the client's ETag names this version and representation.
+    """
+    layout = requested_layout()
+    if layout is None:
+        return _format_error()
+    mimetype = negotiate_mimetype()
+    etag = snapshot_etag(snapshot, layout, mimetype.rpartition("/")[2])
+    return _snapshot_body_response(
+        snapshot,
+        etag,
+        lambda: encode_snapshot(snapshot, serializer, contract, layout, mimetype),
+        mimetype,
+        max_age,
+        last_modified,
+    )
+
+
+def delta_response(
+    snapshot: Snapshot,
+    since: int,
+    changed: Optional[tuple[dict[str, Any], ...]],
+    contract: type[BaseModel],
+    max_age: int = 0,
+    last_modified: Optional[datetime] = None,
+):
+    """
+    Serve ``{"version", "full", "changed"}``: the rows changed since ``since``, or every row with
+    ``full: true`` when the delta could not be computed (``changed`` is None).
+    """
+    layout = requested_layout()
+    if layout is None:
+        return _format_error()
+    mimetype = negotiate_mimetype()
+    full = changed is None
+    rows = snapshot.rows if full else changed
+
+    def build(snap: Snapshot) -> bytes:
+        if layout == "columnar":
+            fields = tuple(contract.model_fields)
+            payload: Any = {field: [row[field] for row in rows] for field in fields}
+        else:
+            payload = list(rows)
+        return _encode_envelope({"version": snap.version, "full": full, "changed": payload}, mimetype)
+
+    key = ("delta", None if full else since, layout, mimetype)
+    etag = snapshot_etag(snapshot, "full" if full else f"since{since}", layout, mimetype.rpartition("/")[2])
+    return _snapshot_body_response(
+        snapshot, etag, lambda: snapshot.encoded(key, build), mimetype, max_age, last_modified
+    )
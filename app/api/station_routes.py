@@ -1,23 +1,35 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, current_app, jsonify, request
 
-from app.contracts import AvailabilityVO, StationVO
+import config
+
+from app.api.serialization import EnvelopeSerializer, delta_response, snapshot_response
+from app.contracts import AvailabilityVO, StationProfileVO, StationVO
 from app.services.station_service import (
     StationNotFoundError,
+    availability_snapshots,
+    get_availability_changes,
     get_recent_station_availability,
-    list_stations as list_stations_service,
-    get_all_stations_latest_availability
+    snapshot_last_modified,
+    station_snapshots,
 )
+from app.services.station_profile_service import get_station_profile
+from app.services.station_stream_service import StreamFullError, ensure_broadcaster_started
 from app.services.prediction_service import get_station_predictions, PredictionError
 
 station_bp = Blueprint("station", __name__, url_prefix="/api/stations")
 
+_stations_json = EnvelopeSerializer(list[StationVO])
+_availability_json = EnvelopeSerializer(list[AvailabilityVO])
+_profile_json = EnvelopeSerializer(list[StationProfileVO])
+
+# Query parameter -> allowed range for /<number>/profile
+_PROFILE_SLOTS = {"weekday": range(7), "hour": range(24)}
+
 
 @station_bp.get("/")
 def list_stations():
-    """Return information for all stations."""
-    raw_list = list_stations_service()
-    data = [StationVO.model_validate(s).model_dump() for s in raw_list]
-    return jsonify({"code": 0, "msg": "ok", "data": data}), 200
+    """Return information for all stations (``?format=columnar`` for parallel arrays; MessagePack via Accept)."""
+    return snapshot_response(station_snapshots.get(), _stations_json, StationVO, max_age=config.HTTP_MAX_AGE_STATIONS)
 
 
 @station_bp.get("/<int:number>/availability")
@@ -27,16 +39,84 @@ def get_station_availability(number: int):
         raw_list = get_recent_station_availability(number)
     except StationNotFoundError as exc:
         return jsonify({"code": 1, "msg": exc.message, "data": None}), 404
-    data = [AvailabilityVO.model_validate(a).model_dump() for a in raw_list]
-    return jsonify({"code": 0, "msg": "ok", "data": data}), 200
+    return _availability_json.response(raw_list)
+
+@station_bp.get("/<int:number>/profile")
+def get_station_profile_route(number: int):
+    """
+    Typical bikes (mean, median, 10th-90th percentiles) at a station per weekday (0 = Monday) and hour,
+    precomputed by ``flask stations profile``. ``?weekday=&hour=`` narrow it down to one slot.
+    """
+    slot = {}
+    for name, allowed in _PROFILE_SLOTS.items():
+        value = request.args.get(name)
+        if value is None:
+            continue
+        try:
+            slot[name] = int(value)
+        except ValueError:
+            slot[name] = None
+        if slot[name] not in allowed:
+            return jsonify({"code": 1, "msg": f"{name} must be an integer in {allowed.start}-{allowed.stop - 1}", "data": None}), 400
+    try:
+        rows = get_station_profile(number, **slot)
+    except StationNotFoundError as exc:
+        return jsonify({"code": 1, "msg": exc.message, "data": None}), 404
+    return _profile_json.response(rows)
 
 @station_bp.get("/status")
 def get_all_stations_status():
-    """Return the latest real-time status for all stations."""
-    raw_list = get_all_stations_latest_availability()
-    
-    data = [AvailabilityVO.model_validate(a).model_dump() for a in raw_list]
-    return jsonify({"code": 0, "msg": "ok", "data": data}), 200
+    """
+    Return the latest real-time status for all stations (``?format=columnar``; MessagePack via Accept).
+
+    With ``?since=<version>`` (a previous ``X-Snapshot-Version``) only the stations whose bikes, stands
+    or status changed are returned, or all of them with ``full: true`` if that version is too old.
+    """
+    since = request.args.get("since")
+    max_age = config.HTTP_MAX_AGE_STATION_STATUS
+    if since is None:
+        snapshot = availability_snapshots.get()
+        return snapshot_response(
+            snapshot, _availability_json, AvailabilityVO, max_age=max_age, last_modified=snapshot_last_modified(snapshot)
+        )
+    try:
+        since_version = int(since)
+    except ValueError:
+        return jsonify({"code": 1, "msg": "since must be an integer version", "data": None}), 400
+    snapshot, changed = get_availability_changes(since_version)
+    return delta_response(
+        snapshot, since_version, changed, AvailabilityVO, max_age=max_age, last_modified=snapshot_last_modified(snapshot)
+    )
+
+@station_bp.get("/stream")
+def stream_stations_status():
+    """
+    Server-sent events: a ``snapshot`` event with every station's latest status, then a ``changes``
+    event with only the stations that changed after each scrape. Each event's ``id`` is the snapshot
+    version, so a reconnecting EventSource (``Last-Event-ID``) or ``?since=`` only gets the delta.
+    """
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("since")
+    try:
+        last_version = int(last_id) if last_id is not None else None
+    except ValueError:
+        return jsonify({"code": 1, "msg": "since must be an integer version", "data": None}), 400
+    broadcaster = ensure_broadcaster_started(current_app._get_current_object())
+    try:
+        events = broadcaster.subscribe(last_version)
+    except StreamFullError as exc:
+        response = jsonify({"code": 1, "msg": exc.message, "data": None})
+        response.status_code = exc.status_code
+        response.headers["Retry-After"] = str(int(broadcaster.poll_seconds) or 1)
+        return response
+    return Response(
+        events,
+        mimetype="text/event-stream",
+        headers={
+            "X-Accel-Buffering": "no",
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        },
+    )
 
 @station_bp.get("/<int:number>/prediction")
 def get_station_prediction(number: int):
@@ -12,19 +12,17 @@ from app.contracts import (
     UserRegistrationRequestDTO,
     UserVO,
 )
-from app.extensions import db
-from app.models import User
+from app.api.auth import current_user, require_auth
 from app.services.user_service import (
     AuthError,
     activate_by_token,
     activate_user,
     login_user,
-    logout_user,
     refresh_tokens,
     register_user,
+    revoke_user_tokens,
     send_verification_code,
     serialize_user,
-    verify_access_token,
     UserRegistrationError,
 )
 
@@ -143,33 +141,23 @@ def refresh():
 
 
 @user_bp.post("/logout")
+@require_auth()
 def logout():
     """Logout: requires a valid access_token, the server will increment the current user's token_version and invalidate the old token."""
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.strip().lower().startswith("bearer "):
-        return jsonify({"code": 40101, "msg": "missing or invalid Authorization header", "data": None}), 401
-    token = auth_header.strip()[7:].strip()
     try:
-        logout_user(token)
+        revoke_user_tokens(current_user())
     except AuthError as exc:
         return jsonify({"code": 40101, "msg": exc.message, "data": None}), exc.status_code
     return jsonify({"code": 0, "msg": "logged out", "data": None}), 200
 
 
 @user_bp.get("/me")
+@require_auth()
 def me():
     """Requires a valid access_token: request header Authorization: Bearer <access_token>, returns current user information."""
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.strip().lower().startswith("bearer "):
-        return jsonify({"code": 40101, "msg": "missing or invalid Authorization header", "data": None}), 401
-    token = auth_header.strip()[7:].strip()
     try:
-        payload = verify_access_token(token)
+        user = current_user()
     except AuthError as exc:
         return jsonify({"code": 40101, "msg": exc.message, "data": None}), exc.status_code
-    user_id = payload.get("sub")
-    user = db.session.get(User, user_id)
-    if user is None or not user.is_active:
-        return jsonify({"code": 40101, "msg": "user not found or disabled", "data": None}), 401
     data = UserVO.model_validate(serialize_user(user)).model_dump()
     return jsonify({"code": 0, "msg": "ok", "data": data}), 200
@@ -1,13 +1,18 @@
 """Weather forecast API routes."""
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify
 from pydantic import ValidationError
 
+import config
+from app.api.serialization import EnvelopeSerializer
 from app.contracts import WeatherDataVO, WeatherQueryDTO
-from app.services.weather_service import WeatherAPIError, get_weather
+from app.services.weather_service import WeatherAPIError, get_weather, weather_payload_cache
+from app.utils.http_cache import conditional_response
 
 weather_bp = Blueprint("weather", __name__, url_prefix="/api/weather")
 
+_weather_json = EnvelopeSerializer(WeatherDataVO)
+
 
 def _validation_error_message(exc: ValidationError) -> str:
     errors = exc.errors()
@@ -21,18 +26,31 @@ def _validation_error_message(exc: ValidationError) -> str:
     return str(msg)
 
 
+def _build_weather_body() -> bytes:
+    """Query, validate and serialize the forecast once; the bytes are reused until the data changes."""
+    return _weather_json.dumps(get_weather())
+
+
 @weather_bp.get("")
 def get_weather_forecast():
     """
     Get weather forecast (unified forecast).
 
+    Served from the hour-aligned payload cache; supports conditional GET via ETag / If-None-Match.
+
     Returns:
         JSON response containing weather forecast data.
     """
     try:
-        raw_data = get_weather()
-        data = WeatherDataVO.model_validate(raw_data).model_dump()
-        return jsonify({"code": 0, "msg": "ok", "data": data}), 200
+        payload = weather_payload_cache.get(_build_weather_body)
+        # The body changes when a scrape lands or the forecast hour rolls over
+        last_modified = max(filter(None, (payload.fetched_at, payload.hour)))
+        return conditional_response(
+            payload.etag,
+            lambda: Response(payload.body, status=200, mimetype="application/json"),
+            last_modified=last_modified,
+            max_age=config.HTTP_MAX_AGE_WEATHER,
+        )
     except WeatherAPIError as exc:
         return jsonify({
             "code": 50001,
@@ -0,0 +1,13 @@
+from flask import Flask
+
+
+def register_commands(app: Flask) -> None:
+    from .email import email_cli
+    from .model import model_cli
+    from .station import station_cli
+    from .weather import weather_cli
+
+    app.cli.add_command(email_cli)
+    app.cli.add_command(model_cli)
+    app.cli.add_command(station_cli)
+    app.cli.add_command(weather_cli)
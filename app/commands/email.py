@@ -0,0 +1,57 @@
+"""`flask email ...` commands: the outbox worker that delivers queued emails."""
+
+import signal
+import threading
+
+import click
+from flask.cli import AppGroup
+
+import config
+from app.services.email_outbox_service import drain_outbox, run_outbox_worker
+from app.utils.email import SMTPSender, _mail_configured
+
+email_cli = AppGroup("email", help="Outgoing email (email_outbox) delivery.")
+
+
+def _require_mail_config() -> None:
+    if not _mail_configured():
+        raise click.ClickException("MAIL_SERVER, MAIL_FROM, MAIL_USERNAME and MAIL_PASSWORD must be set.")
+
+
+@email_cli.command("send")
+@click.option(
+    "--batch-size",
+    type=int,
+    default=config.EMAIL_OUTBOX_BATCH_SIZE,
+    show_default=True,
+    help="Messages claimed and committed per batch.",
+)
+def send_command(batch_size: int) -> None:
+    """Send every due outbox message once and exit."""
+    _require_mail_config()
+    with SMTPSender.from_config() as sender:
+        result = drain_outbox(sender, batch_size)
+    click.echo(f"Sent {result.sent}, retry scheduled for {result.retried}, failed {result.failed}.")
+
+
+@email_cli.command("worker")
+@click.option(
+    "--interval",
+    type=float,
+    default=config.EMAIL_OUTBOX_POLL_SECONDS,
+    show_default=True,
+    help="Seconds between outbox polls.",
+)
+@click.option("--batch-size", type=int, default=config.EMAIL_OUTBOX_BATCH_SIZE, show_default=True)
+def worker_command(interval: float, batch_size: int) -> None:
+    """Deliver queued emails forever (Ctrl+C or SIGTERM to stop)."""
+    _require_mail_config()
+    stop_event = threading.Event()
+    # `docker stop` sends SIGTERM: finish the batch in flight instead of dying mid-send
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    click.echo(f"Polling the email outbox every {interval}s")
+    try:
+        run_outbox_worker(interval, batch_size, stop_event)
+    except KeyboardInterrupt:
+        pass
+    click.echo("Stopped.")
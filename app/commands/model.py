@@ -0,0 +1,57 @@
+"""`flask model ...` commands: availability model training, promotion and inspection."""
+
+import click
+from flask.cli import AppGroup
+
+import config
+from app.ml.artifacts import list_versions, promote_version, read_manifest
+from app.ml.training import TrainingError, train_model
+
+model_cli = AppGroup("model", help="Availability prediction model.")
+
+
+@model_cli.command("train")
+@click.option("--days", type=int, default=config.MODEL_TRAINING_DAYS, show_default=True, help="Days of availability history to train on.")
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=config.MODEL_TRAINING_CHUNK_SIZE,
+    show_default=True,
+    help="Availability rows read (and joined with weather) per query.",
+)
+@click.option("--no-promote", is_flag=True, help="Store the new version without making it the production model.")
+def train_command(days: int, chunk_size: int, no_promote: bool) -> None:
+    """Train on recent availability joined with archived weather and store a new model version."""
+    try:
+        result = train_model(days=days, chunk_size=chunk_size, promote=not no_promote)
+    except TrainingError as exc:
+        raise click.ClickException(exc.message)
+    metrics = ", ".join(f"{name} {value:.3f}" for name, value in result.metrics.items())
+    click.echo(
+        f"Model {result.version} trained on {result.rows_used} of {result.rows_read} availability rows "
+        f"({result.chunks} chunks): {metrics}."
+    )
+    click.echo("Promoted; workers switch to it on their next check." if result.promoted else "Not promoted.")
+
+
+@model_cli.command("promote")
+@click.argument("version")
+def promote_command(version: str) -> None:
+    """Make a stored VERSION the production model (also used to roll back)."""
+    try:
+        promote_version(version)
+    except FileNotFoundError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f"Promoted model {version}.")
+
+
+@model_cli.command("info")
+def info_command() -> None:
+    """Show the production model and the stored versions."""
+    manifest = read_manifest()
+    if manifest is None:
+        click.echo("No promoted model (the legacy notebook pickles are used if present).")
+    else:
+        click.echo(f"Production model: {manifest['version']} (trained {manifest.get('trained_at')}, metrics {manifest.get('metrics')})")
+    for version in list_versions():
+        click.echo(f"  {version}{' *' if manifest and version == manifest['version'] else ''}")
@@ -0,0 +1,29 @@
+"""`flask stations ...` commands: station profile aggregation."""
+
+import click
+from flask.cli import AppGroup
+
+import config
+from app.services.station_profile_service import build_station_profiles, reset_station_profiles
+
+station_cli = AppGroup("stations", help="Station data maintenance.")
+
+
+@station_cli.command("profile")
+@click.option(
+    "--batch-size",
+    type=int,
+    default=config.STATION_PROFILE_BATCH_SIZE,
+    show_default=True,
+    help="Availability rows merged per transaction.",
+)
+@click.option("--rebuild", is_flag=True, help="Delete all profiles first and aggregate the whole history again.")
+def profile_command(batch_size: int, rebuild: bool) -> None:
+    """Merge availability rows scraped since the last run into station_profile."""
+    if rebuild:
+        click.echo(f"Deleted {reset_station_profiles()} profile rows.")
+    result = build_station_profiles(batch_size=batch_size)
+    click.echo(
+        f"Merged {result.rows_read} availability rows into {result.slots_updated} slots "
+        f"in {result.batches} batches (watermark {result.watermark})."
+    )
@@ -0,0 +1,62 @@
+"""`flask weather ...` commands: forecast ingestion, retention, and the scheduler loop."""
+
+import signal
+import threading
+
+import click
+from flask.cli import AppGroup
+
+import config
+from app.services.weather_ingest_service import WeatherIngestError, ingest_weather, run_scheduler
+from app.services.weather_retention_service import prune_weather_forecasts
+
+weather_cli = AppGroup("weather", help="Weather forecast ingestion.")
+
+
+@weather_cli.command("ingest")
+@click.option("--force", is_flag=True, help="Call the API even if the stored forecast is recent.")
+def ingest_command(force: bool) -> None:
+    """Fetch the OpenWeatherMap hourly forecast once and upsert it."""
+    try:
+        result = ingest_weather(force=force)
+    except WeatherIngestError as exc:
+        raise click.ClickException(exc.message)
+    if not result.fetched:
+        click.echo("Forecast is recent, skipped (use --force to refresh anyway).")
+        return
+    click.echo(f"Forecast stored: {result.inserted} inserted, {result.updated} updated, {result.unchanged} unchanged.")
+
+
+@weather_cli.command("prune")
+@click.option(
+    "--batch-size",
+    type=int,
+    default=config.WEATHER_PRUNE_BATCH_SIZE,
+    show_default=True,
+    help="Rows archived and deleted per transaction.",
+)
+def prune_command(batch_size: int) -> None:
+    """Archive past forecast hours into observed_weather and delete them from weather_forecast."""
+    result = prune_weather_forecasts(batch_size=batch_size)
+    click.echo(f"Archived {result.archived} past hours, deleted {result.deleted} rows in {result.batches} batches.")
+
+
+@weather_cli.command("schedule")
+@click.option(
+    "--interval",
+    type=int,
+    default=config.WEATHER_INGEST_INTERVAL_SECONDS,
+    show_default=True,
+    help="Seconds between ingestion runs.",
+)
+def schedule_command(interval: int) -> None:
+    """Run forecast ingestion and retention forever (Ctrl+C or SIGTERM to stop)."""
+    stop_event = threading.Event()
+    # `docker stop` sends SIGTERM: finish the run in flight instead of dying mid-transaction
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    click.echo(f"Ingesting weather every {interval}s")
+    try:
+        run_scheduler(interval, stop_event=stop_event)
+    except KeyboardInterrupt:
+        pass
+    click.echo("Stopped.")
@@ -16,6 +16,7 @@ from app.contracts.response import (
     WeatherDataVO,
     StationVO,
     AvailabilityVO,
+    StationProfileVO,
 )
 
 __all__ = [
@@ -34,4 +35,5 @@ __all__ = [
     "WeatherDataVO",
     "StationVO",
     "AvailabilityVO",
+    "StationProfileVO",
 ]
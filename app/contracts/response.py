@@ -73,3 +73,18 @@ class AvailabilityVO(BaseModel):
     last_update: int
     timestamp: str | None
     requested_at: str | None
+
+
+class StationProfileVO(BaseModel):
+    """Typical availability of a station in one weekday / hour slot."""
+
+    number: int
+    weekday: int
+    hour: int
+    samples: int
+    mean_bikes: float
+    median_bikes: float
+    p10_bikes: float
+    p25_bikes: float
+    p75_bikes: float
+    p90_bikes: float
@@ -1,8 +1,6 @@
-from flask_mail import Mail
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
 
 db = SQLAlchemy()
-mail = Mail()
 migrate = Migrate()
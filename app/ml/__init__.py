@@ -0,0 +1 @@
+"""Availability model: shared feature construction, training pipeline and versioned artifacts."""
@@ -0,0 +1,158 @@
+"""
+Versioned model artifacts in MODEL_DIR.
+
+Every training run writes ``bike_availability_model-<version>.pkl`` plus a ``.json`` manifest next to
+it (features, metrics, training window, sha256 of the pickle). The version in production is the one
+named by ``model_manifest.json``; promoting a version rewrites that file with an atomic rename, so a
+worker checking its mtime either sees the old version or the complete new one. Directories without a
+manifest fall back to the notebook's ``bike_availability_model.pkl`` / ``model_features.pkl`` pair.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from datetime import datetime
+from typing import Any, NamedTuple, Optional
+
+import config
+
+MODEL_PREFIX = "bike_availability_model"
+MANIFEST_NAME = "model_manifest.json"
+LEGACY_MODEL_NAME = f"{MODEL_PREFIX}.pkl"
+LEGACY_FEATURES_NAME = "model_features.pkl"
+
+
+class ModelArtifact(NamedTuple):
+    model: Any
+    features: list[str]
+    # "legacy" for the notebook pickles
+    version: str
+    manifest: dict[str, Any]
+
+
+def _model_dir(model_dir: Optional[str]) -> str:
+    return model_dir or config.MODEL_DIR
+
+
+def new_version(now: datetime) -> str:
+    """Sortable version string of a training run started at ``now`` (UTC)."""
+    return now.strftime("%Y%m%dT%H%M%S")
+
+
+def manifest_path(model_dir: Optional[str] = None) -> str:
+    return os.path.join(_model_dir(model_dir), MANIFEST_NAME)
+
+
+def _version_path(version: str, suffix: str, model_dir: Optional[str]) -> str:
+    return os.path.join(_model_dir(model_dir), f"{MODEL_PREFIX}-{version}{suffix}")
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    # Write next to the target and rename over it: readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _read_json(path: str) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_artifact(model: Any, features: list[str], version: str, metadata: dict[str, Any], model_dir: Optional[str] = None) -> dict[str, Any]:
+    """Store a trained model as ``version`` (not promoted) and return its manifest."""
+    model_dir = _model_dir(model_dir)
+    os.makedirs(model_dir, exist_ok=True)
+    payload = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    model_path = _version_path(version, ".pkl", model_dir)
+    _write_atomic(model_path, payload)
+    manifest = {
+        "version": version,
+        "model_file": os.path.basename(model_path),
+        "sha256": hashlib.sha256(payload).hexdigest(),
+        "features": list(features),
+        **metadata,
+    }
+    _write_atomic(_version_path(version, ".json", model_dir), json.dumps(manifest, indent=2).encode())
+    return manifest
+
+
+def promote_version(version: str, model_dir: Optional[str] = None) -> dict[str, Any]:
+    """Make ``version`` the production model (workers pick it up on their next manifest check)."""
+    path = _version_path(version, ".json", model_dir)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model version {version} not found at {path}")
+    manifest = _read_json(path)
+    _write_atomic(manifest_path(model_dir), json.dumps(manifest, indent=2).encode())
+    return manifest
+
+
+def read_manifest(model_dir: Optional[str] = None) -> Optional[dict[str, Any]]:
+    """Manifest of the promoted version, or None if nothing has been promoted."""
+    path = manifest_path(model_dir)
+    if not os.path.exists(path):
+        return None
+    return _read_json(path)
+
+
+def list_versions(model_dir: Optional[str] = None) -> list[str]:
+    """Versions stored in the model directory, oldest first."""
+    model_dir = _model_dir(model_dir)
+    if not os.path.isdir(model_dir):
+        return []
+    prefix = f"{MODEL_PREFIX}-"
+    return sorted(
+        name[len(prefix):-len(".json")]
+        for name in os.listdir(model_dir)
+        if name.startswith(prefix) and name.endswith(".json")
+    )
+
+
+def prune_versions(keep: Optional[int] = None, model_dir: Optional[str] = None) -> list[str]:
+    """Delete all but the newest ``keep`` versions (never the promoted one); returns the deleted versions."""
+    keep = config.MODEL_KEEP_VERSIONS if keep is None else keep
+    current = read_manifest(model_dir)
+    protected = {current["version"]} if current else set()
+    versions = list_versions(model_dir)
+    stale = [v for v in versions[: max(len(versions) - keep, 0)] if v not in protected]
+    for version in stale:
+        for suffix in (".pkl", ".json"):
+            path = _version_path(version, suffix, model_dir)
+            if os.path.exists(path):
+                os.unlink(path)
+    return stale
+
+
+def _load_legacy(model_dir: str) -> ModelArtifact:
+    model_path = os.path.join(model_dir, LEGACY_MODEL_NAME)
+    features_path = os.path.join(model_dir, LEGACY_FEATURES_NAME)
+    if not os.path.exists(model_path) or not os.path.exists(features_path):
+        raise FileNotFoundError(
+            f"Model files not found! Train one with `flask model train`, or place the notebook output "
+            f"files at {model_path} and {features_path}."
+        )
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    with open(features_path, "rb") as f:
+        features = pickle.load(f)
+    return ModelArtifact(model, list(features), "legacy", {"version": "legacy", "features": list(features)})
+
+
+def load_artifact(model_dir: Optional[str] = None) -> ModelArtifact:
+    """Load the promoted model (checking its sha256), or the legacy notebook pickles without a manifest."""
+    model_dir = _model_dir(model_dir)
+    manifest = read_manifest(model_dir)
+    if manifest is None:
+        return _load_legacy(model_dir)
+    with open(os.path.join(model_dir, manifest["model_file"]), "rb") as f:
+        payload = f.read()
+    if hashlib.sha256(payload).hexdigest() != manifest["sha256"]:
+        raise ValueError(f"Model file {manifest['model_file']} does not match its manifest checksum")
+    return ModelArtifact(pickle.loads(payload), list(manifest["features"]), manifest["version"], manifest)
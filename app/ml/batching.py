@@ -0,0 +1,202 @@
+"""
+Micro-batching of model inference across concurrent requests (per worker process).
+
+A prediction request hands its feature matrix to the batcher and waits. The batcher thread takes
+every request queued while its previous predict call ran (plus, with MODEL_BATCH_WAIT_MS, whatever
+arrives within that many milliseconds of the first), up to MODEL_BATCH_MAX_ROWS rows, stacks the
+matrices of requests on the same model into one, calls ``predict`` once and hands every request its
+slice of the result. sklearn's per-call overhead (input validation, thread dispatch, the DataFrame
+column check of notebook models) is then paid once per batch instead of once per request, and a
+lone request is not held back. If a merged batch fails, its requests are retried one by one so a bad
+input only fails its own request. MODEL_BATCHING_ENABLED=false predicts on the request thread.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+
+import config
+from app.ml.features import model_input
+from app.ml.registry import LoadedModel
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the requests-per-batch histogram buckets (the last one is open-ended)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32)
+# Recent per-request waits kept for the latency percentiles
+LATENCY_WINDOW = 1024
+
+
+class _Pending(NamedTuple):
+    loaded: LoadedModel
+    matrix: np.ndarray
+    future: Future
+    enqueued: float
+
+
+def _predict(loaded: LoadedModel, matrix: np.ndarray) -> np.ndarray:
+    return np.asarray(loaded.model.predict(model_input(loaded.model, matrix, loaded.features)), dtype=np.float64)
+
+
+def _bucket_label(size: int) -> str:
+    lower = 1
+    for upper in BATCH_SIZE_BUCKETS:
+        if size <= upper:
+            return str(upper) if lower == upper else f"{lower}-{upper}"
+        lower = upper + 1
+    return f"{lower}+"
+
+
+class PredictionBatcher:
+    def __init__(self, enabled: bool, wait_ms: float, max_rows: int) -> None:
+        self.enabled = enabled
+        self.wait_ms = wait_ms
+        self.max_rows = max_rows
+        self._queue: "queue.Queue[_Pending]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.batches = 0
+            self.requests = 0
+            self.rows = 0
+            self.failed_batches = 0
+            self._batch_sizes = {_bucket_label(upper): 0 for upper in (*BATCH_SIZE_BUCKETS, BATCH_SIZE_BUCKETS[-1] + 1)}
+            self._waits: deque[float] = deque(maxlen=LATENCY_WINDOW)
+            self._max_wait = 0.0
+
+    # ----- callers -----
+
+    def predict(self, loaded: LoadedModel, matrix: np.ndarray) -> np.ndarray:
+        """Predictions of ``loaded.model`` for ``matrix``, computed in a batch with concurrent requests."""
+        if not self.enabled:
+            return _predict(loaded, matrix)
+        self.start()
+        future: Future = Future()
+        self._queue.put(_Pending(loaded, matrix, future, time.perf_counter()))
+        return future.result()
+
+    # ----- batcher thread -----
+
+    def _collect(self, first: _Pending) -> list[_Pending]:
+        # Everything queued while the previous batch ran, plus what arrives within wait_ms of the first
+        batch, rows = [first], len(first.matrix)
+        deadline = first.enqueued + self.wait_ms / 1000
+        while rows < self.max_rows:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item.matrix)
+        return batch
+
+    def _run_group(self, group: list[_Pending]) -> None:
+        loaded = group[0].loaded
+        try:
+            if len(group) == 1:
+                group[0].future.set_result(_predict(loaded, group[0].matrix))
+                return
+            predictions = _predict(loaded, np.concatenate([item.matrix for item in group]))
+        except Exception as exc:
+            if len(group) == 1:
+                group[0].future.set_exception(exc)
+                return
+            with self._lock:
+                self.failed_batches += 1
+            logger.warning("batched prediction failed, retrying %d requests one by one", len(group))
+            for item in group:
+                self._run_group([item])
+            return
+        offsets = np.cumsum([len(item.matrix) for item in group])[:-1]
+        for item, part in zip(group, np.split(predictions, offsets)):
+            item.future.set_result(part)
+
+    def run_batch(self, batch: list[_Pending]) -> None:
+        """Predict one collected batch: one call per model version in it."""
+        started = time.perf_counter()
+        groups: dict[int, list[_Pending]] = {}
+        for item in batch:
+            groups.setdefault(id(item.loaded.model), []).append(item)
+        with self._lock:
+            self.batches += 1
+            self.requests += len(batch)
+            self.rows += sum(len(item.matrix) for item in batch)
+            self._batch_sizes[_bucket_label(len(batch))] += 1
+            for item in batch:
+                wait = started - item.enqueued
+                self._waits.append(wait)
+                self._max_wait = max(self._max_wait, wait)
+        for group in groups.values():
+            self._run_group(group)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            batch = self._collect(first)
+            try:
+                self.run_batch(batch)
+            except Exception as exc:  # never leave a caller waiting
+                logger.exception("prediction batch failed")
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(exc)
+
+    def start(self) -> None:
+        """Start the batcher thread unless it is running in this process."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="prediction-batcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def stats(self) -> dict[str, Any]:
+        """Batch-size distribution (requests per predict call) and the latency batching added per request."""
+        with self._lock:
+            waits_ms = np.array(self._waits, dtype=np.float64) * 1000
+            return {
+                "enabled": self.enabled,
+                "wait_ms": self.wait_ms,
+                "max_rows": self.max_rows,
+                "batches": self.batches,
+                "requests": self.requests,
+                "rows": self.rows,
+                "failed_batches": self.failed_batches,
+                "mean_batch_size": self.requests / self.batches if self.batches else None,
+                "batch_sizes": dict(self._batch_sizes),
+                "added_latency_ms": {
+                    "p50": float(np.percentile(waits_ms, 50)) if len(waits_ms) else None,
+                    "p95": float(np.percentile(waits_ms, 95)) if len(waits_ms) else None,
+                    "p99": float(np.percentile(waits_ms, 99)) if len(waits_ms) else None,
+                    "max": self._max_wait * 1000,
+                },
+            }
+
+
+prediction_batcher = PredictionBatcher(
+    enabled=config.MODEL_BATCHING_ENABLED,
+    wait_ms=config.MODEL_BATCH_WAIT_MS,
+    max_rows=config.MODEL_BATCH_MAX_ROWS,
+)
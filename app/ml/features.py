@@ -0,0 +1,95 @@
+"""
+Model features, built by the same vectorised code for training chunks and for prediction requests so
+the two can never drift apart.
+
+``build_features`` takes parallel arrays (or scalars, broadcast: one station over many forecast
+hours) and returns a C-contiguous float32 matrix with the columns in the model's feature order.
+Calendar features are computed on datetime64 arrays, not per row. float32 is what scikit-learn's
+trees compare against internally, so it costs no precision and saves their conversion copy.
+"""
+
+from typing import Any, Sequence
+
+import numpy as np
+import pandas as pd
+
+FEATURE_DTYPE = np.float32
+
+# Column order the models are trained with (also stored in every artifact manifest)
+FEATURES = (
+    "station_id",
+    "capacity",
+    "lat",
+    "lon",
+    "hour",
+    "day",
+    "day_of_week",
+    "is_weekend",
+    "avg_temperature",
+    "avg_humidity",
+    "avg_pressure",
+)
+
+
+def to_hours(times: Any) -> np.ndarray:
+    """Naive datetimes (UTC by convention) or datetime64 values as a datetime64[h] array (truncated)."""
+    if not (isinstance(times, np.ndarray) and np.issubdtype(times.dtype, np.datetime64)):
+        # pandas parses a list of datetime objects ~10x faster than numpy does
+        times = pd.DatetimeIndex(times).to_numpy()
+    return times.astype("datetime64[h]")
+
+
+def calendar_columns(times: Any) -> dict[str, np.ndarray]:
+    """hour, day of month, day_of_week (0 = Monday) and is_weekend of each time."""
+    hours = to_hours(times)
+    days = hours.astype("datetime64[D]")
+    # 1970-01-01 was a Thursday: shift so Monday is 0, like datetime.weekday() and pandas dayofweek
+    day_of_week = (days.astype(np.int64) + 3) % 7
+    return {
+        "hour": (hours - days).astype(np.int64),
+        "day": (days - days.astype("datetime64[M]")).astype(np.int64) + 1,
+        "day_of_week": day_of_week,
+        "is_weekend": day_of_week >= 5,
+    }
+
+
+def build_features(
+    station_ids: Any,
+    capacities: Any,
+    latitudes: Any,
+    longitudes: Any,
+    times: Any,
+    temperatures: Any,
+    humidities: Any,
+    pressures: Any,
+    features: Sequence[str] = FEATURES,
+) -> np.ndarray:
+    """
+    Feature matrix (rows x ``features``, float32) for station/time/weather arrays of equal length;
+    scalars are broadcast. Missing weather values (None) become NaN.
+    """
+    columns = {
+        "station_id": station_ids,
+        "capacity": capacities,
+        "lat": latitudes,
+        "lon": longitudes,
+        **calendar_columns(times),
+        "avg_temperature": temperatures,
+        "avg_humidity": humidities,
+        "avg_pressure": pressures,
+    }
+    rows = len(columns["hour"])
+    matrix = np.empty((rows, len(features)), dtype=FEATURE_DTYPE)
+    for i, name in enumerate(features):
+        matrix[:, i] = np.asarray(columns[name], dtype=FEATURE_DTYPE)
+    return matrix
+
+
+def model_input(model: Any, matrix: np.ndarray, features: Sequence[str]) -> Any:
+    """
+    What to pass to ``model.predict``: models fitted on a DataFrame (the notebook's) check column
+    names and get a zero-copy frame; models trained by `flask model train` take the matrix as is.
+    """
+    if hasattr(model, "feature_names_in_"):
+        return pd.DataFrame(matrix, columns=list(features), copy=False)
+    return matrix
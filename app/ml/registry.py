@@ -0,0 +1,157 @@
+"""
+Per-worker model registry: the production model, swapped without a restart.
+
+The model in use is one immutable ``LoadedModel`` behind a single reference. A prediction takes that
+reference once and finishes on it, so a swap never mixes two versions inside one request. A watcher
+thread (started in each worker on first use, so it survives gunicorn's fork) stats model_manifest.json
+every MODEL_RELOAD_CHECK_SECONDS; when the file changed and names a different checksum, the new
+version is loaded and verified on the watcher thread, off the request path, and swapped in with one
+assignment. A version that fails to load is logged and the previous one stays in service.
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, NamedTuple, Optional
+
+import config
+from app.ml.artifacts import load_artifact, manifest_path, read_manifest
+
+logger = logging.getLogger(__name__)
+
+
+class LoadedModel(NamedTuple):
+    model: Any
+    features: list[str]
+    version: str
+    manifest: dict[str, Any]
+    loaded_at: datetime
+
+
+class ModelRegistry:
+    def __init__(self, check_seconds: float, model_dir: Optional[str] = None) -> None:
+        self.check_seconds = check_seconds
+        # None: config.MODEL_DIR, read at each check
+        self.model_dir = model_dir
+        self._current: Optional[LoadedModel] = None
+        # (mtime_ns, size) of the manifest last looked at; None when there was none
+        self._stamp: Optional[tuple[int, int]] = None
+        self._load_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.checks = 0
+        self.swaps = 0
+        self.last_checked_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    def _manifest_stamp(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = os.stat(manifest_path(self.model_dir))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, stamp: Optional[tuple[int, int]]) -> LoadedModel:
+        artifact = load_artifact(self.model_dir)
+        loaded = LoadedModel(artifact.model, artifact.features, artifact.version, artifact.manifest, datetime.utcnow())
+        self._current, self._stamp = loaded, stamp
+        self.swaps += 1
+        self.last_error = None
+        logger.info("prediction model version %s loaded", loaded.version)
+        return loaded
+
+    def current(self) -> LoadedModel:
+        """
+        The model to predict with. Loads it on the first call of the process (raising
+        FileNotFoundError if there is none); afterwards only the watcher replaces it.
+        """
+        loaded = self._current
+        if loaded is not None:
+            return loaded
+        with self._load_lock:
+            if self._current is not None:
+                return self._current
+            return self._load(self._manifest_stamp())
+
+    def check(self) -> bool:
+        """Swap in a newly promoted version if the manifest changed; True if a new model was loaded."""
+        self.checks += 1
+        self.last_checked_at = datetime.utcnow()
+        stamp = self._manifest_stamp()
+        if stamp == self._stamp:
+            return False
+        with self._load_lock:
+            current = self._current
+            try:
+                if current is not None and stamp is not None:
+                    # Rewritten (e.g. promoted again) but naming the same file: keep the loaded model
+                    manifest = read_manifest(self.model_dir)
+                    if manifest is not None and manifest.get("sha256") == current.manifest.get("sha256"):
+                        self._stamp = stamp
+                        return False
+                self._load(stamp)
+                return True
+            except Exception as exc:
+                # Not retried until the manifest changes again
+                self._stamp = stamp
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.exception("model reload failed, keeping version %s", current.version if current else None)
+                return False
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.check_seconds):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("model registry check failed")
+
+    def start(self) -> None:
+        """Start the watcher thread unless it is running in this process."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._load_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-registry", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def reset(self) -> None:
+        """Forget the loaded model (the next current() loads again)."""
+        with self._load_lock:
+            self._current = None
+            self._stamp = None
+            self.last_error = None
+
+    def status(self) -> dict[str, Any]:
+        loaded = self._current
+        manifest = loaded.manifest if loaded else {}
+        return {
+            "loaded": loaded is not None,
+            "version": loaded.version if loaded else None,
+            "loaded_at": loaded.loaded_at.isoformat() if loaded else None,
+            "trained_at": manifest.get("trained_at"),
+            "metrics": manifest.get("metrics"),
+            "features": list(loaded.features) if loaded else None,
+            "watching": self._thread is not None and self._thread.is_alive(),
+            "check_seconds": self.check_seconds,
+            "last_checked_at": self.last_checked_at.isoformat() if self.last_checked_at else None,
+            "last_error": self.last_error,
+            "swaps": self.swaps,
+        }
+
+
+model_registry = ModelRegistry(check_seconds=config.MODEL_RELOAD_CHECK_SECONDS)
+
+
+def get_model() -> LoadedModel:
+    """The current model, starting this worker's watcher on first use."""
+    model_registry.start()
+    return model_registry.current()
@@ -0,0 +1,184 @@
+"""
+Training pipeline for the availability model (`flask model train`).
+
+Availability rows of the training window are read in id order (keyset pagination, CHUNK rows at a
+time, four columns only) and each chunk is joined with the archived weather of its hours in one
+observed_weather query. Station capacity and coordinates come from the station registry's arrays,
+and the float32 feature matrix is built by app.ml.features in one vectorised call per chunk, the same
+code prediction_service uses. Rows without a known station or an archived weather hour are skipped.
+The newest MODEL_TEST_FRACTION of the rows is held out for evaluation (a time split, not a shuffle),
+then the model is stored as a new version in MODEL_DIR and promoted unless asked not to.
+"""
+
+import logging
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Iterator, Optional
+
+import numpy as np
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.tree import DecisionTreeRegressor
+
+import config
+from app.extensions import db
+from app.ml.artifacts import new_version, promote_version, prune_versions, write_artifact
+from app.ml.features import FEATURES, build_features, to_hours
+from app.models import Availability, ObservedWeather
+from app.services.station_service import StationRegistry, get_station_registry
+
+logger = logging.getLogger(__name__)
+
+
+class TrainingError(Exception):
+    def __init__(self, message: str = "training error") -> None:
+        super().__init__(message)
+        self.message = message
+
+
+@dataclass
+class TrainingResult:
+    rows_read: int = 0
+    rows_used: int = 0
+    chunks: int = 0
+    version: Optional[str] = None
+    promoted: bool = False
+    metrics: dict[str, float] = field(default_factory=dict)
+
+
+def _read_chunk(since: datetime, after_id: int, chunk_size: int) -> list[Any]:
+    return db.session.execute(
+        db.select(Availability.id, Availability.number, Availability.available_bikes, Availability.timestamp)
+        .where(Availability.id > after_id, Availability.timestamp >= since)
+        .order_by(Availability.id.asc())
+        .limit(chunk_size)
+    ).all()
+
+
+def _weather_by_hour(first: datetime, last: datetime) -> tuple[np.ndarray, np.ndarray]:
+    """Archived hours in [first, last] (sorted datetime64) and their temperature/humidity/pressure rows."""
+    rows = db.session.execute(
+        db.select(ObservedWeather.observed_time, ObservedWeather.temperature, ObservedWeather.humidity, ObservedWeather.pressure)
+        .where(ObservedWeather.observed_time.between(first, last))
+        .order_by(ObservedWeather.observed_time)
+    ).all()
+    hours = to_hours([row[0] for row in rows])
+    values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), 3)
+    return hours, values
+
+
+def _chunk_features(rows: list[Any], registry: StationRegistry) -> tuple[np.ndarray, np.ndarray]:
+    numbers = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    bikes = np.array([row[2] for row in rows], dtype=np.float64)
+    hours = to_hours([row[3] for row in rows])
+    weather_hours, weather = _weather_by_hour(hours.min().item(), hours.max().item())
+
+    # Join on the hour (binary search in the sorted archive) and on the station registry
+    station = registry.positions(numbers)
+    slot = np.minimum(np.searchsorted(weather_hours, hours), max(len(weather_hours) - 1, 0))
+    usable = (station >= 0) & ~np.isnan(bikes)
+    if len(weather_hours):
+        usable &= weather_hours[slot] == hours
+    else:
+        usable[:] = False
+    station, slot = station[usable], slot[usable]
+    X = build_features(
+        numbers[usable],
+        registry.capacities[station],
+        registry.latitudes[station],
+        registry.longitudes[station],
+        hours[usable],
+        weather[slot, 0],
+        weather[slot, 1],
+        weather[slot, 2],
+    )
+    return X, bikes[usable]
+
+
+def iter_training_chunks(since: datetime, chunk_size: int, result: TrainingResult) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """(features, targets) arrays per chunk of availability rows scraped since ``since``, in id order."""
+    registry = get_station_registry()
+    after_id = 0
+    while True:
+        rows = _read_chunk(since, after_id, chunk_size)
+        if not rows:
+            return
+        result.chunks += 1
+        result.rows_read += len(rows)
+        after_id = rows[-1][0]
+        scraped = [row for row in rows if row[3] is not None]
+        # Nothing of the chunk stays in the session: memory is bounded by the arrays
+        db.session.expunge_all()
+        if scraped:
+            X, y = _chunk_features(scraped, registry)
+            if len(y):
+                yield X, y
+        if len(rows) < chunk_size:
+            return
+
+
+def evaluate(model: Any, X: np.ndarray, y: np.ndarray) -> dict[str, float]:
+    predicted = model.predict(X)
+    metrics = {
+        "mae": float(mean_absolute_error(y, predicted)),
+        "rmse": float(math.sqrt(mean_squared_error(y, predicted))),
+    }
+    if len(y) > 1:  # R² is undefined for a single test row
+        metrics["r2"] = float(r2_score(y, predicted))
+    return metrics
+
+
+def train_model(
+    days: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    promote: bool = True,
+    model_dir: Optional[str] = None,
+) -> TrainingResult:
+    """Train on the last ``days`` of availability, store a new model version and (by default) promote it."""
+    days = days or config.MODEL_TRAINING_DAYS
+    chunk_size = chunk_size or config.MODEL_TRAINING_CHUNK_SIZE
+    started = datetime.utcnow()
+    since = started - timedelta(days=days)
+    result = TrainingResult()
+
+    chunks = list(iter_training_chunks(since, chunk_size, result))
+    if not chunks:
+        raise TrainingError(f"No availability rows with archived weather in the last {days} days")
+    X = np.concatenate([X for X, _ in chunks])
+    y = np.concatenate([y for _, y in chunks])
+    del chunks
+    result.rows_used = len(y)
+
+    # Rows are in scrape order: hold out the newest ones
+    split = len(y) - max(1, int(len(y) * config.MODEL_TEST_FRACTION))
+    if split < 1:
+        raise TrainingError(f"Only {len(y)} usable rows in the last {days} days, too few to train and evaluate")
+    model = DecisionTreeRegressor(
+        max_depth=config.MODEL_MAX_DEPTH or None,
+        min_samples_leaf=config.MODEL_MIN_SAMPLES_LEAF,
+        random_state=42,
+    )
+    model.fit(X[:split], y[:split])
+    result.metrics = evaluate(model, X[split:], y[split:])
+
+    result.version = new_version(started)
+    write_artifact(
+        model,
+        list(FEATURES),
+        result.version,
+        {
+            "trained_at": started.isoformat(),
+            "window_start": since.isoformat(),
+            "train_rows": split,
+            "test_rows": len(y) - split,
+            "metrics": result.metrics,
+            "estimator": type(model).__name__,
+        },
+        model_dir,
+    )
+    if promote:
+        promote_version(result.version, model_dir)
+        result.promoted = True
+        prune_versions(model_dir=model_dir)
+    logger.info("model %s trained on %d rows: %s", result.version, split, result.metrics)
+    return result
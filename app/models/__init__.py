@@ -1,8 +1,12 @@
 from .availability import Availability
 from .chat_history import ChatHistory
+from .email_outbox import EmailOutbox
 from .session import Session
-from .weather import WeatherForecast
+from .weather import ObservedWeather, WeatherForecast
 from .station import Station
+from .station_profile import StationProfile
+from .station_table_version import StationTableVersion
+from .token_revocation import TokenRevocation
 from .user import User
 
-__all__ = ["Station", "Availability", "User", "WeatherForecast", "ChatHistory", "Session"]
+__all__ = ["Station", "Availability", "User", "WeatherForecast", "ObservedWeather", "ChatHistory", "Session", "TokenRevocation", "EmailOutbox", "StationProfile", "StationTableVersion"]
@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import JSON, DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.extensions import db
+
+
+class EmailOutbox(db.Model):
+    """
+    Outgoing email queued in the same transaction as the change that triggers it, and sent by the
+    `flask email worker` process. Rows are rendered at send time from ``template`` + ``context``.
+    """
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+
+    recipient: Mapped[str] = mapped_column(String(120), nullable=False)
+
+    # Template name known to email_outbox_service, and the values it is rendered with
+    template: Mapped[str] = mapped_column(String(64), nullable=False)
+    context: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+
+    # pending -> sent, or failed after EMAIL_OUTBOX_MAX_ATTEMPTS
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Not picked up before this time (backoff after a failed attempt)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<EmailOutbox {self.id} to={self.recipient} {self.status}>"
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, Float, ForeignKey, Index, Integer, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.extensions import db
+
+
+class StationProfile(db.Model):
+    """
+    Typical availability of one station in one (weekday, hour) slot, aggregated from availability rows
+    by `flask stations profile`. ``histogram[n]`` counts the samples with n available bikes, so the
+    median and percentiles stay exact as new rows are merged in.
+    """
+
+    __tablename__ = "station_profile"
+    __table_args__ = (Index("ix_station_profile_last_availability_id", "last_availability_id"),)
+
+    number: Mapped[int] = mapped_column(ForeignKey("station.number"), primary_key=True)
+    # Local scrape time slot (Availability.timestamp): 0 = Monday ... 6 = Sunday, hour 0-23
+    weekday: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    hour: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+
+    samples: Mapped[int] = mapped_column(Integer, nullable=False)
+    mean_bikes: Mapped[float] = mapped_column(Float, nullable=False)
+    median_bikes: Mapped[float] = mapped_column(Float, nullable=False)
+    p10_bikes: Mapped[float] = mapped_column(Float, nullable=False)
+    p25_bikes: Mapped[float] = mapped_column(Float, nullable=False)
+    p75_bikes: Mapped[float] = mapped_column(Float, nullable=False)
+    p90_bikes: Mapped[float] = mapped_column(Float, nullable=False)
+    histogram: Mapped[list[int]] = mapped_column(JSON, nullable=False)
+
+    # Newest availability row merged into this slot; max() over the table is the job's watermark
+    last_availability_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<StationProfile {self.number} weekday={self.weekday} hour={self.hour} n={self.samples}>"
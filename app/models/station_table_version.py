@@ -0,0 +1,62 @@
+from sqlalchemy import BigInteger, Integer, event, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.extensions import db
+
+
+class StationTableVersion(db.Model):
+    """
+    One-row change counter of the station table. Database triggers bump it on every insert, delete
+    and update that changes a value, whoever the writer is (the companion scraper writes stations),
+    so workers can check for changes with a single-row read instead of re-reading the table.
+    """
+
+    __tablename__ = "station_table_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<StationTableVersion {self.version}>"
+
+
+_STATION_COLUMNS = ("number", "contract_name", "name", "address", "latitude", "longitude", "banking", "bonus", "bike_stands")
+_BUMP = "UPDATE station_table_version SET version = version + 1 WHERE id = 1"
+
+# Trigger DDL per dialect (kept in step with migration c9d0e1f2a3b4)
+STATION_VERSION_TRIGGERS = {
+    "sqlite": [
+        f"CREATE TRIGGER station_version_insert AFTER INSERT ON station BEGIN {_BUMP}; END",
+        f"CREATE TRIGGER station_version_delete AFTER DELETE ON station BEGIN {_BUMP}; END",
+        "CREATE TRIGGER station_version_update AFTER UPDATE ON station WHEN "
+        + " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in _STATION_COLUMNS)
+        + f" BEGIN {_BUMP}; END",
+    ],
+    "mysql": [
+        f"CREATE TRIGGER station_version_insert AFTER INSERT ON station FOR EACH ROW {_BUMP}",
+        f"CREATE TRIGGER station_version_delete AFTER DELETE ON station FOR EACH ROW {_BUMP}",
+        # Also fires for the unchanged rows of INSERT ... ON DUPLICATE KEY UPDATE: only count real changes
+        f"CREATE TRIGGER station_version_update AFTER UPDATE ON station FOR EACH ROW {_BUMP} AND NOT ("
+        + " AND ".join(f"OLD.{c} <=> NEW.{c}" for c in _STATION_COLUMNS)
+        + ")",
+    ],
+    "postgresql": [
+        "CREATE OR REPLACE FUNCTION bump_station_table_version() RETURNS trigger AS $$ "
+        f"BEGIN {_BUMP}; RETURN NULL; END $$ LANGUAGE plpgsql",
+        "CREATE TRIGGER station_version_change AFTER INSERT OR DELETE ON station "
+        "FOR EACH ROW EXECUTE FUNCTION bump_station_table_version()",
+        "CREATE TRIGGER station_version_update AFTER UPDATE ON station "
+        "FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION bump_station_table_version()",
+    ],
+}
+
+
+@event.listens_for(db.metadata, "after_create")
+def _create_station_version_triggers(target, connection, **kw) -> None:
+    # db.create_all() (tests, fresh databases); deployed databases get the same from the migration
+    tables = kw.get("tables")
+    if tables is not None and StationTableVersion.__table__ not in tables:
+        return
+    connection.execute(text("INSERT INTO station_table_version (id, version) VALUES (1, 0)"))
+    for statement in STATION_VERSION_TRIGGERS.get(connection.dialect.name, []):
+        connection.execute(text(statement))
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.extensions import db
+
+
+class TokenRevocation(db.Model):
+    """
+    Append-only log of token_version bumps (logout), read by every worker to evict its cached
+    token state. The auto-increment id doubles as the revocation epoch; old rows are pruned.
+    """
+
+    __tablename__ = "token_revocation"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+
+    # User whose tokens were revoked (not a foreign key: the log may outlive the user row)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # token_version after the bump
+    token_version: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self) -> str:
+        return f"<TokenRevocation {self.id} user={self.user_id} ver={self.token_version}>"
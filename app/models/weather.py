@@ -60,3 +60,23 @@ class WeatherForecast(db.Model):
             "pop": self.pop,
             "fetched_at": self.fetched_at.isoformat() if self.fetched_at else None,
         }
+
+
+class ObservedWeather(db.Model):
+    """
+    Compact archive of past forecast hours (the last forecast made for each hour).
+    Filled by the weather retention job as weather_forecast rows age out; used as training data.
+    """
+    __tablename__ = "observed_weather"
+
+    # Hour the values apply to (naive UTC, same convention as WeatherForecast.forecast_time)
+    observed_time = db.Column(db.DateTime, primary_key=True)
+
+    temperature = db.Column(db.Float, nullable=False)
+    feels_like = db.Column(db.Float, nullable=True)
+    humidity = db.Column(db.SmallInteger, nullable=True)
+    pressure = db.Column(db.SmallInteger, nullable=True)
+    weather_code = db.Column(db.SmallInteger, nullable=False)
+    clouds = db.Column(db.SmallInteger, nullable=True)
+    wind_speed = db.Column(db.Float, nullable=True)
+    pop = db.Column(db.Float, nullable=True)
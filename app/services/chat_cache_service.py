@@ -0,0 +1,134 @@
+"""
+Opt-in response cache for chat questions that arrive without session history.
+
+Two tiers:
+- exact: SHA-256 of the normalized prompt (case, punctuation and whitespace folded)
+- semantic (optional): cosine similarity between local hashed n-gram embeddings,
+  only used when CHAT_RESPONSE_CACHE_SIMILARITY_THRESHOLD > 0
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+
+import config
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+_EMBEDDING_DIM = 512
+
+
+@dataclass(frozen=True)
+class CachedReply:
+    reply: str
+    title: Optional[str] = None
+
+
+def normalize_prompt(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivially different phrasings share a key."""
+    text = _NON_WORD.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def prompt_key(text: str) -> str:
+    return hashlib.sha256(normalize_prompt(text).encode("utf-8")).hexdigest()
+
+
+def embed_prompt(text: str) -> np.ndarray:
+    """
+    Local, dependency-free embedding: hashed word unigrams + character trigrams, L2-normalized.
+    Good enough to catch reworded near-duplicates; it is not a semantic model.
+    """
+    normalized = normalize_prompt(text)
+    vec = np.zeros(_EMBEDDING_DIM, dtype=np.float32)
+    words = normalized.split()
+    grams = words + [f"#{normalized[i:i + 3]}" for i in range(max(len(normalized) - 2, 0))]
+    for gram in grams:
+        digest = hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % _EMBEDDING_DIM
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vec[bucket] += sign
+    norm = float(np.linalg.norm(vec))
+    if norm > 0:
+        vec /= norm
+    return vec
+
+
+class ChatResponseCache:
+    """LRU + TTL cache of first-turn replies, with hit/miss counters."""
+
+    def __init__(self, maxsize: int, ttl: float, similarity_threshold: float = 0.0) -> None:
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.similarity_threshold = similarity_threshold
+        self._stats_lock = threading.Lock()
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0}
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def lookup(self, message: str) -> Optional[CachedReply]:
+        key = prompt_key(message)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._count("exact_hits")
+            return entry[0]
+
+        if self.similarity_threshold > 0:
+            candidates = self._entries.items()
+            if candidates:
+                query = embed_prompt(message)
+                matrix = np.stack([value[1] for _, value in candidates])
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    best_key, _ = candidates[best]
+                    # Re-read through get() so the matched entry is refreshed in LRU order
+                    entry = self._entries.get(best_key)
+                    if entry is not None:
+                        self._count("semantic_hits")
+                        return entry[0]
+
+        self._count("misses")
+        return None
+
+    def store(self, message: str, reply: str, title: Optional[str] = None) -> None:
+        if not reply:
+            return
+        embedding = embed_prompt(message) if self.similarity_threshold > 0 else None
+        self._entries.set(prompt_key(message), (CachedReply(reply=reply, title=title), embedding))
+        self._count("stores")
+
+    def stats(self) -> dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["exact_hits"] + stats["semantic_hits"] + stats["misses"]
+        stats["size"] = len(self._entries)
+        stats["evictions"] = self._entries.evictions
+        stats["hit_rate"] = (stats["exact_hits"] + stats["semantic_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        self._entries.clear()
+        with self._stats_lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+
+response_cache = ChatResponseCache(
+    maxsize=config.CHAT_RESPONSE_CACHE_MAX_ENTRIES,
+    ttl=config.CHAT_RESPONSE_CACHE_TTL_SECONDS,
+    similarity_threshold=config.CHAT_RESPONSE_CACHE_SIMILARITY_THRESHOLD,
+)
+
+
+def response_cache_enabled() -> bool:
+    return config.CHAT_RESPONSE_CACHE_ENABLED
@@ -6,12 +6,16 @@ import re
 from flask import current_app
 from sqlalchemy.exc import IntegrityError
 from langchain_community.chat_message_histories import SQLChatMessageHistory
+from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableLambda
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_openai import ChatOpenAI
 
 from app.extensions import db
 from app.models import ChatHistory, Session
+from app.services.chat_cache_service import CachedReply, response_cache, response_cache_enabled
+from app.services.chat_tools import SYSTEM_PROMPT, ChatToolContext, run_tool_loop
 
 logger = logging.getLogger(__name__)
 
@@ -69,8 +73,8 @@ def generate_session_id(user_id: int, chat_id: str) -> str:
     return f"{prefix}h_{digest}"
 
 
-def _generate_title(session_id: str, first_message: str) -> None:
-    """Generate session title from the first user message and write it to the sessions table (only set once if no title currently exists)."""
+def _generate_title(session_id: str, first_message: str) -> str | None:
+    """Generate session title from the first user message and write it to the sessions table (only set once if no title currently exists). Returns the generated title, or None on failure."""
     try:
         llm = ChatOpenAI(
             api_key=current_app.config["ALIYUN_API_KEY"],
@@ -88,8 +92,29 @@ def _generate_title(session_id: str, first_message: str) -> None:
             session.title = title
             session.updated_at = Session.utcnow()
             db.session.commit()
+        return title
     except Exception:
         logger.exception("Title generation failed")
+        return None
+
+
+def _record_cached_turn(session_id: str, user_message: str, cached: CachedReply) -> None:
+    """Persist a cache-served turn into message_store and the session title, exactly as a live turn would."""
+    get_chat_history(session_id).add_messages(
+        [HumanMessage(content=user_message), AIMessage(content=cached.reply)]
+    )
+    if cached.title:
+        session = db.session.get(Session, session_id)
+        if session and not session.title:
+            session.title = cached.title
+            session.updated_at = Session.utcnow()
+            db.session.commit()
+
+
+def _iter_replay_chunks(text: str, size: int = 24):
+    """Split a cached reply into small pieces so the stream endpoint replays it like live tokens."""
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
 
 
 def get_session_messages(session_id: str, user_id: int) -> list[dict[str, str]] | None:
@@ -140,46 +165,61 @@ def get_session_messages(session_id: str, user_id: int) -> list[dict[str, str]]
     return history
 
 
-def generate_chat_response(session_id: str, user_message: str, user_id: int) -> str:
-    """Handle core dialogue logic (non-streaming), and maintain sessions table and title generation."""
-
-    # Check if this is the first message for the current session (based on message_store)
-    is_first_message = not db.session.execute(
-        db.text("SELECT 1 FROM message_store WHERE session_id = :sid LIMIT 1"),
-        {"sid": session_id},
-    ).fetchone()
-
-    # Ensure session record exists in sessions table and update last used time
-    _ensure_session(session_id, user_id)
-
-    # Initialize model
+def _build_chain(tool_ctx: ChatToolContext) -> RunnableWithMessageHistory:
+    """
+    Assemble prompt -> tool-calling model loop, with LangChain memory attached.
+    Tool calls are resolved in-process (see chat_tools); only the final answer is written to message_store.
+    """
     llm = ChatOpenAI(
         api_key=current_app.config["ALIYUN_API_KEY"],
         base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
         model="qwen-plus",
     )
 
-    # Assemble Prompt
     prompt = ChatPromptTemplate.from_messages(
         [
-            (
-                "system",
-                "You are a helpful intelligent assistant. Please answer questions based on the context.",
-            ),
+            ("system", SYSTEM_PROMPT),
             MessagesPlaceholder(variable_name="chat_history"),
             ("human", "{user_input}"),
         ]
     )
 
-    # Assemble Chain and attach memory module
-    chain = prompt | llm
-    chain_with_history = RunnableWithMessageHistory(
+    def _answer_with_tools(prompt_value):
+        yield from run_tool_loop(llm, prompt_value.to_messages(), tool_ctx)
+
+    chain = prompt | RunnableLambda(_answer_with_tools)
+    return RunnableWithMessageHistory(
         chain,
         get_chat_history,
         input_messages_key="user_input",
         history_messages_key="chat_history",
     )
 
+
+def generate_chat_response(session_id: str, user_message: str, user_id: int) -> str:
+    """Handle core dialogue logic (non-streaming), and maintain sessions table and title generation."""
+
+    # Check if this is the first message for the current session (based on message_store)
+    is_first_message = not db.session.execute(
+        db.text("SELECT 1 FROM message_store WHERE session_id = :sid LIMIT 1"),
+        {"sid": session_id},
+    ).fetchone()
+
+    # Ensure session record exists in sessions table and update last used time
+    _ensure_session(session_id, user_id)
+
+    # Only turns without history are cacheable: the answer then depends on the question alone
+    use_cache = is_first_message and response_cache_enabled()
+    if use_cache:
+        cached = response_cache.lookup(user_message)
+        if cached is not None:
+            _record_cached_turn(session_id, user_message, cached)
+            return cached.reply
+
+    # Assemble the tool-calling chain with memory attached
+    tool_ctx = ChatToolContext()
+    chain_with_history = _build_chain(tool_ctx)
+
     # Invoke model
     response = chain_with_history.invoke(
         {"user_input": user_message},
@@ -187,8 +227,13 @@ def generate_chat_response(session_id: str, user_message: str, user_id: int) ->
     )
 
     # If this is the first message, generate the title (one-time only)
+    title = None
     if is_first_message:
-        _generate_title(session_id, user_message)
+        title = _generate_title(session_id, user_message)
+
+    # Answers grounded in live tool data go stale quickly, so only tool-free answers are cached
+    if use_cache and not tool_ctx.used_tools:
+        response_cache.store(user_message, response.content, title)
 
     return response.content
 
@@ -206,43 +251,37 @@ def generate_chat_stream(session_id: str, user_message: str, user_id: int):
         # Ensure session record exists in sessions table and update last used time
         _ensure_session(session_id, user_id)
 
-        llm = ChatOpenAI(
-            api_key=current_app.config["ALIYUN_API_KEY"],
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
-            model="qwen-plus",
-        )
-
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "You are a helpful intelligent assistant. Please answer questions based on the context.",
-                ),
-                MessagesPlaceholder(variable_name="chat_history"),
-                ("human", "{user_input}"),
-            ]
-        )
+        use_cache = is_first_message and response_cache_enabled()
+        if use_cache:
+            cached = response_cache.lookup(user_message)
+            if cached is not None:
+                _record_cached_turn(session_id, user_message, cached)
+                for piece in _iter_replay_chunks(cached.reply):
+                    yield f"data: {json.dumps({'content': piece}, ensure_ascii=False)}\n\n"
+                yield "data: [DONE]\n\n"
+                return
 
-        chain = prompt | llm
-        chain_with_history = RunnableWithMessageHistory(
-            chain,
-            get_chat_history,
-            input_messages_key="user_input",
-            history_messages_key="chat_history",
-        )
+        tool_ctx = ChatToolContext()
+        chain_with_history = _build_chain(tool_ctx)
 
+        streamed: list[str] = []
         for chunk in chain_with_history.stream(
             {"user_input": user_message},
             config={"configurable": {"session_id": session_id}},
         ):
             if chunk.content:
+                streamed.append(chunk.content)
                 yield f"data: {json.dumps({'content': chunk.content}, ensure_ascii=False)}\n\n"
 
         yield "data: [DONE]\n\n"
 
         # After streaming ends, if this is the first message, generate the title
+        title = None
         if is_first_message:
-            _generate_title(session_id, user_message)
+            title = _generate_title(session_id, user_message)
+
+        if use_cache and not tool_ctx.used_tools:
+            response_cache.store(user_message, "".join(streamed), title)
 
     except Exception:
         logger.exception("Stream generation failed")
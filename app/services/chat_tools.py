@@ -0,0 +1,212 @@
+"""
+Function tools for the chat assistant, backed in-process by the station, weather and prediction services.
+
+Tools never go over HTTP: they call the service functions directly (and therefore share their caches).
+Every chat turn gets its own ChatToolContext, which memoizes each underlying service call so a single
+question never triggers the same query twice, however many tools the model calls.
+"""
+
+import json
+import logging
+from typing import Any, Callable, Iterator, Sequence
+
+from langchain_core.messages import AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
+
+from app.services.prediction_service import PredictionError, get_station_predictions
+from app.services.station_service import get_all_stations_latest_availability, list_stations
+from app.services.weather_service import WeatherAPIError, get_weather
+
+logger = logging.getLogger(__name__)
+
+# Tool-calling rounds per turn before the model is forced to answer with what it has
+MAX_TOOL_ROUNDS = 3
+# Upper bound on station matches returned to the model, keeps the prompt small
+MAX_STATION_MATCHES = 10
+PREDICTION_HOURS = 12
+
+SYSTEM_PROMPT = (
+    "You are the Dublin Bikes assistant. For questions about station availability, the weather "
+    "or expected bike numbers, call the available tools and answer from their results instead of "
+    "guessing. If a tool returns an error or no data, say so plainly. For anything else, answer "
+    "helpfully based on the conversation context."
+)
+
+
+class ChatToolContext:
+    """Per-turn memo of service calls plus a record of which tools the model used."""
+
+    def __init__(self) -> None:
+        self._memo: dict[tuple, Any] = {}
+        self.tool_calls: list[str] = []
+
+    @property
+    def used_tools(self) -> bool:
+        return bool(self.tool_calls)
+
+    def fetch(self, key: tuple, loader: Callable[[], Any]) -> Any:
+        if key not in self._memo:
+            self._memo[key] = loader()
+        return self._memo[key]
+
+    def stations(self) -> list[dict[str, Any]]:
+        return self.fetch(("stations",), list_stations)
+
+    def latest_status(self) -> dict[int, dict[str, Any]]:
+        return self.fetch(
+            ("status",),
+            lambda: {row["number"]: row for row in get_all_stations_latest_availability()},
+        )
+
+    def weather(self) -> dict[str, Any]:
+        return self.fetch(("weather",), get_weather)
+
+    def predictions(self, station_number: int) -> list[dict[str, Any]]:
+        return self.fetch(("prediction", station_number), lambda: get_station_predictions(station_number))
+
+
+class StationQueryArgs(BaseModel):
+    query: str = Field(description="Station number, or part of the station name or address, e.g. 'Grafton' or '42'")
+
+
+class StationNumberArgs(BaseModel):
+    station_number: int = Field(description="Station number as returned by find_station_status")
+
+
+def _find_station_status(ctx: ChatToolContext, query: str) -> dict[str, Any]:
+    needle = query.strip().lower()
+    status = ctx.latest_status()
+    matches = []
+    for station in ctx.stations():
+        if needle.isdigit():
+            if station["number"] != int(needle):
+                continue
+        elif needle not in station["name"].lower() and needle not in station["address"].lower():
+            continue
+        live = status.get(station["number"]) or {}
+        matches.append(
+            {
+                "number": station["number"],
+                "name": station["name"],
+                "address": station["address"],
+                "bike_stands": station["bike_stands"],
+                "available_bikes": live.get("available_bikes"),
+                "available_bike_stands": live.get("available_bike_stands"),
+                "status": live.get("status"),
+                "updated_at": live.get("timestamp"),
+            }
+        )
+        if len(matches) >= MAX_STATION_MATCHES:
+            break
+    if not matches:
+        return {"error": f"no station matches {query!r}"}
+    return {"stations": matches}
+
+
+def _get_weather_forecast(ctx: ChatToolContext) -> dict[str, Any]:
+    try:
+        weather = ctx.weather()
+    except WeatherAPIError as exc:
+        return {"error": exc.message}
+
+    def _brief(entry: dict[str, Any]) -> dict[str, Any]:
+        description = (entry.get("weather") or [{}])[0].get("description")
+        return {
+            "dt": entry.get("dt"),
+            "temp": entry.get("temp"),
+            "feels_like": entry.get("feels_like"),
+            "wind_speed": entry.get("wind_speed"),
+            "pop": entry.get("pop"),
+            "description": description,
+        }
+
+    return {
+        "current": _brief(weather.get("current") or {}),
+        "hourly": [_brief(h) for h in weather.get("hourly") or []],
+    }
+
+
+def _predict_station_availability(ctx: ChatToolContext, station_number: int) -> dict[str, Any]:
+    try:
+        predictions = ctx.predictions(station_number)
+    except PredictionError as exc:
+        return {"error": exc.message}
+    return {"station_number": station_number, "predictions": predictions[:PREDICTION_HOURS]}
+
+
+def build_chat_tools(ctx: ChatToolContext) -> list[StructuredTool]:
+    """Create the tool set for one turn, bound to that turn's context."""
+    return [
+        StructuredTool.from_function(
+            func=lambda query: _find_station_status(ctx, query),
+            name="find_station_status",
+            description="Live number of available bikes and free stands for Dublin Bikes stations matching a name, address or number.",
+            args_schema=StationQueryArgs,
+        ),
+        StructuredTool.from_function(
+            func=lambda: _get_weather_forecast(ctx),
+            name="get_weather_forecast",
+            description="Current Dublin weather and the hourly forecast for the next few hours.",
+        ),
+        StructuredTool.from_function(
+            func=lambda station_number: _predict_station_availability(ctx, station_number),
+            name="predict_station_availability",
+            description="Predicted number of available bikes at a station for the coming hours.",
+            args_schema=StationNumberArgs,
+        ),
+    ]
+
+
+def _run_tool(ctx: ChatToolContext, tools_by_name: dict[str, StructuredTool], call: dict[str, Any]) -> str:
+    name = call.get("name")
+    ctx.tool_calls.append(name)
+    tool = tools_by_name.get(name)
+    if tool is None:
+        result: Any = {"error": f"unknown tool {name!r}"}
+    else:
+        try:
+            result = tool.invoke(call.get("args") or {})
+        except Exception:
+            logger.exception("Chat tool %s failed", name)
+            result = {"error": "tool failed, data temporarily unavailable"}
+    return json.dumps(result, ensure_ascii=False, default=str)
+
+
+def run_tool_loop(
+    llm: Any,
+    messages: Sequence[BaseMessage],
+    ctx: ChatToolContext,
+    max_rounds: int = MAX_TOOL_ROUNDS,
+) -> Iterator[AIMessageChunk]:
+    """
+    Stream an answer, executing any tool calls the model makes in between.
+    Only text content is yielded, so message history stores the final answer rather than the tool traffic.
+    """
+    tools = build_chat_tools(ctx)
+    tools_by_name = {tool.name: tool for tool in tools}
+    llm_with_tools = llm.bind_tools(tools)
+    conversation = list(messages)
+    yielded = False
+
+    for round_index in range(max_rounds + 1):
+        # On the last round the model must answer without requesting more tools
+        model = llm_with_tools if round_index < max_rounds else llm
+        gathered = None
+        for chunk in model.stream(conversation):
+            gathered = chunk if gathered is None else gathered + chunk
+            if chunk.content:
+                yielded = True
+                yield AIMessageChunk(content=chunk.content)
+
+        tool_calls = getattr(gathered, "tool_calls", None) or []
+        if not tool_calls:
+            break
+        conversation.append(gathered)
+        for call in tool_calls:
+            conversation.append(
+                ToolMessage(content=_run_tool(ctx, tools_by_name, call), tool_call_id=call["id"])
+            )
+
+    if not yielded:
+        yield AIMessageChunk(content="")
@@ -0,0 +1,235 @@
+"""
+Transactional email outbox.
+
+The request path adds an email_outbox row in the same transaction as the change that triggers the
+email (so a rollback drops it and a worker restart cannot lose it). `flask email worker` claims due
+rows in batches, renders them and sends the whole batch over one SMTP connection. Transient failures
+are retried with exponential backoff; permanent (5xx) rejections and rows out of attempts are marked
+failed.
+"""
+
+import logging
+import smtplib
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Any, Callable, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+import config
+from app.extensions import db
+from app.models import EmailOutbox
+from app.utils.email import SMTPSender, _mail_configured, activation_link_for, build_verification_message
+
+logger = logging.getLogger(__name__)
+
+# Sent rows are kept this long for troubleshooting, then deleted by the worker
+SENT_RETENTION = timedelta(days=1)
+
+TEMPLATES: dict[str, Callable[[str, dict[str, Any]], EmailMessage]] = {
+    "verification_code": lambda recipient, ctx: build_verification_message(
+        recipient, ctx["code"], ctx["expires_minutes"], ctx.get("activation_link", "")
+    ),
+}
+
+# The SMTP server is unreachable, dropped us or refused our login: nothing is wrong with the message,
+# so the row is not charged an attempt, the batch stops and the worker backs off
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPAuthenticationError)
+
+
+def _is_connection_error(exc: Exception) -> bool:
+    # smtplib.SMTPException subclasses OSError: only a non-SMTP OSError is a socket/TLS failure
+    return isinstance(exc, _CONNECTION_ERRORS) or not isinstance(exc, smtplib.SMTPException)
+
+
+@dataclass
+class OutboxResult:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    claimed: int = 0
+    # Set when the batch stopped on a connection/authentication error
+    connection_error: Optional[str] = None
+
+    def __iadd__(self, other: "OutboxResult") -> "OutboxResult":
+        self.sent += other.sent
+        self.retried += other.retried
+        self.failed += other.failed
+        self.claimed += other.claimed
+        self.connection_error = other.connection_error or self.connection_error
+        return self
+
+
+def enqueue_email(recipient: str, template: str, context: dict[str, Any]) -> EmailOutbox:
+    """Add an outbox row to the caller's transaction (sent once the caller commits)."""
+    if template not in TEMPLATES:
+        raise ValueError(f"unknown email template {template!r}")
+    row = EmailOutbox(
+        recipient=recipient,
+        template=template,
+        context=context,
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.session.add(row)
+    return row
+
+
+def enqueue_verification_email(
+    to_email: str,
+    code: str,
+    expires_minutes: int,
+    activation_token: Optional[str] = None,
+) -> Optional[EmailOutbox]:
+    """
+    Queue the verification code email (with the /activate/:token link if a token is given).
+    Does nothing when mail is not configured; the caller commits.
+    """
+    if not _mail_configured():
+        return None
+    context = {"code": code, "expires_minutes": expires_minutes, "activation_link": activation_link_for(activation_token)}
+    return enqueue_email(to_email, "verification_code", context)
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before the next try after ``attempts`` failed attempts."""
+    delay = config.EMAIL_OUTBOX_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    return min(delay, config.EMAIL_OUTBOX_RETRY_MAX_SECONDS)
+
+
+def _is_permanent(exc: Exception) -> bool:
+    # SMTPAuthenticationError is a 5xx response too, but it is about our account, not the message
+    if _is_connection_error(exc):
+        return False
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500
+
+
+def _claim_batch(batch_size: int, now: datetime) -> list[EmailOutbox]:
+    # SKIP LOCKED lets several workers drain the table without sending a row twice (ignored by SQLite)
+    return list(
+        db.session.scalars(
+            db.select(EmailOutbox)
+            .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.id.asc())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+    )
+
+
+def _release_row(row: EmailOutbox, exc: Exception, now: datetime, result: OutboxResult) -> None:
+    # Back to the queue untouched apart from a short delay: the server, not the message, failed
+    row.last_error = f"{type(exc).__name__}: {exc}"[:500]
+    row.next_attempt_at = now + timedelta(seconds=retry_delay(1))
+    result.retried += 1
+    result.connection_error = row.last_error
+
+
+def _record_failure(row: EmailOutbox, exc: Exception, now: datetime, result: OutboxResult) -> None:
+    row.attempts += 1
+    row.last_error = f"{type(exc).__name__}: {exc}"[:500]
+    if _is_permanent(exc) or row.attempts >= config.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        row.status = "failed"
+        result.failed += 1
+        logger.warning("email %s to %s failed permanently: %s", row.id, row.recipient, row.last_error)
+    else:
+        row.next_attempt_at = now + timedelta(seconds=retry_delay(row.attempts))
+        result.retried += 1
+
+
+def send_outbox_batch(sender: SMTPSender, batch_size: Optional[int] = None, now: Optional[datetime] = None) -> OutboxResult:
+    """Claim up to batch_size due rows, send them through ``sender`` and commit the outcome."""
+    now = now or datetime.utcnow()
+    result = OutboxResult()
+    rows = _claim_batch(batch_size or config.EMAIL_OUTBOX_BATCH_SIZE, now)
+    result.claimed = len(rows)
+    try:
+        for row in rows:
+            try:
+                builder = TEMPLATES[row.template]
+                message = builder(row.recipient, row.context)
+            except (KeyError, TypeError, ValueError) as exc:
+                # A row that cannot be rendered will never succeed: fail it without retrying
+                row.status = "failed"
+                row.last_error = f"render error {type(exc).__name__}: {exc}"[:500]
+                result.failed += 1
+                continue
+            try:
+                sender.send(message)
+            except (smtplib.SMTPException, OSError) as exc:
+                if _is_connection_error(exc):
+                    _release_row(row, exc, now, result)
+                    logger.warning("email outbox: SMTP server unavailable, stopping the batch: %s", row.last_error)
+                    break
+                _record_failure(row, exc, now, result)
+                continue
+            row.attempts += 1
+            row.status = "sent"
+            row.sent_at = now
+            row.last_error = None
+            result.sent += 1
+    finally:
+        db.session.commit()
+    return result
+
+
+def drain_outbox(sender: SMTPSender, batch_size: Optional[int] = None, now: Optional[datetime] = None) -> OutboxResult:
+    """Send batches until no due rows are left or the SMTP server stops accepting connections."""
+    batch_size = batch_size or config.EMAIL_OUTBOX_BATCH_SIZE
+    total = OutboxResult()
+    while True:
+        result = send_outbox_batch(sender, batch_size, now)
+        total += result
+        if result.connection_error or result.claimed < batch_size or result.sent + result.failed == 0:
+            return total
+
+
+def prune_sent_emails(now: Optional[datetime] = None) -> int:
+    cutoff = (now or datetime.utcnow()) - SENT_RETENTION
+    deleted = db.session.execute(
+        db.delete(EmailOutbox).where(EmailOutbox.status == "sent", EmailOutbox.sent_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    return deleted
+
+
+def run_outbox_worker(
+    interval: Optional[float] = None,
+    batch_size: Optional[int] = None,
+    stop_event: Optional[threading.Event] = None,
+    max_runs: Optional[int] = None,
+    sender_factory: Callable[[], SMTPSender] = SMTPSender.from_config,
+) -> int:
+    """
+    Drain the outbox every ``interval`` seconds until stopped. Each cycle sends over one SMTP
+    connection, which is closed again while the worker idles. Errors are logged and retried; while
+    the SMTP server keeps refusing connections the wait grows like the per-row retry delay.
+    """
+    interval = config.EMAIL_OUTBOX_POLL_SECONDS if interval is None else interval
+    stop_event = stop_event or threading.Event()
+    runs = 0
+    outages = 0
+    while not stop_event.is_set():
+        wait = interval
+        try:
+            with sender_factory() as sender:
+                result = drain_outbox(sender, batch_size)
+            outages = outages + 1 if result.connection_error else 0
+            if outages:
+                wait = max(interval, retry_delay(outages))
+            if result.claimed:
+                logger.info("email outbox: %d sent, %d retried, %d failed", result.sent, result.retried, result.failed)
+            prune_sent_emails()
+        except SQLAlchemyError:
+            db.session.rollback()
+            logger.exception("email outbox worker database error")
+        runs += 1
+        if max_runs is not None and runs >= max_runs:
+            break
+        stop_event.wait(wait)
+    return runs
@@ -2,8 +2,8 @@ import googlemaps
 from datetime import datetime, timedelta
 
 from app.extensions import db
-from app.models import Station, Availability
-from app.utils.calculateDistance import calculate_distance
+from app.models import Availability
+from app.services.station_service import get_station_registry
 
 from app.utils.api_retry import gmaps_retry
 
@@ -71,10 +71,8 @@ def find_best_route(start_lat, start_lon, end_lat, end_lon):
         Availability.timestamp >= one_hour_ago
     ).group_by(Availability.number).subquery()
 
-    # Join Station and Availability, filtering by the subquery to only get the latest row per station
-    latest_station_data = db.session.query(Station, Availability).join(
-        Availability, Station.number == Availability.number
-    ).join(
+    # Only the latest row per station; station details come from the in-process registry
+    latest_availability = db.session.query(Availability).join(
         subq,
         db.and_(
             Availability.number == subq.c.number,
@@ -82,11 +80,21 @@ def find_best_route(start_lat, start_lon, end_lat, end_lon):
         )
     ).all()
 
+    # Distances from both endpoints to every station in two vectorised passes
+    registry = get_station_registry()
+    dist_from_start = registry.distances_km(start_lat, start_lon)
+    dist_to_end = registry.distances_km(end_lat, end_lon)
+
     # We broaden initial scope to 10 stations to handle geographical barriers (e.g. rivers)
     candidates_start = []
     candidates_end = []
 
-    for station, av in latest_station_data:
+    for av in latest_availability:
+        index = registry.index.get(av.number)
+        if index is None:
+            continue
+        station = registry.entries[index]
+
         # Explicitly gate candidates to operational statuses only
         if av.status != 'OPEN':
             continue
@@ -96,12 +104,10 @@ def find_best_route(start_lat, start_lon, end_lat, end_lon):
             continue
 
         if av.available_bikes > 0:
-            dist = calculate_distance(start_lat, start_lon, station.latitude, station.longitude)
-            candidates_start.append((station, dist, av.available_bikes))
+            candidates_start.append((station, float(dist_from_start[index]), av.available_bikes))
 
         if av.available_bike_stands > 0:
-            dist = calculate_distance(end_lat, end_lon, station.latitude, station.longitude)
-            candidates_end.append((station, dist, av.available_bike_stands))
+            candidates_end.append((station, float(dist_to_end[index]), av.available_bike_stands))
 
     # Keep top 10 closest geographically
     candidates_start.sort(key=lambda x: x[1])
@@ -0,0 +1,98 @@
+"""
+Access-token signing keys, parsed once at import.
+
+HS256 (default) signs with JWT_SECRET_KEY. With JWT_ALGORITHM=EdDSA or RS256 the PEM private key at
+JWT_PRIVATE_KEY_PATH is loaded into a cryptography key object, so PyJWT does not re-parse it on every
+encode/decode, and the public half is published as a JWKS so other services can verify our access
+tokens locally. Refresh tokens are only ever verified by this app and stay HS256.
+"""
+
+import base64
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+import config
+
+ASYMMETRIC_ALGORITHMS = {
+    "EdDSA": (ed25519.Ed25519PrivateKey, OKPAlgorithm),
+    "RS256": (rsa.RSAPrivateKey, RSAAlgorithm),
+}
+
+
+class JWTKeyError(Exception):
+    def __init__(self, message: str = "invalid JWT key configuration") -> None:
+        super().__init__(message)
+        self.message = message
+
+
+@dataclass(frozen=True)
+class AccessTokenKeys:
+    algorithm: str
+    signing_key: Any
+    verification_key: Any
+    kid: Optional[str] = None
+
+    @property
+    def asymmetric(self) -> bool:
+        return self.algorithm in ASYMMETRIC_ALGORITHMS
+
+    @property
+    def headers(self) -> Optional[dict[str, str]]:
+        return {"kid": self.kid} if self.kid else None
+
+    def jwks(self) -> dict[str, list[dict[str, Any]]]:
+        """JWK Set with the public verification key (empty for HS256: the secret is never published)."""
+        if not self.asymmetric:
+            return {"keys": []}
+        jwk = ASYMMETRIC_ALGORITHMS[self.algorithm][1].to_jwk(self.verification_key, as_dict=True)
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return {"keys": [jwk]}
+
+
+def _key_id(public_key: Any) -> str:
+    der = public_key.public_bytes(
+        serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return base64.urlsafe_b64encode(hashlib.sha256(der).digest()[:12]).decode("ascii").rstrip("=")
+
+
+def load_access_token_keys(
+    algorithm: str,
+    secret: Optional[str] = None,
+    private_key_pem: Optional[bytes] = None,
+    kid: Optional[str] = None,
+) -> AccessTokenKeys:
+    if algorithm == "HS256":
+        if not secret:
+            raise JWTKeyError("JWT_SECRET_KEY is required for HS256")
+        return AccessTokenKeys(algorithm, secret, secret)
+
+    if algorithm not in ASYMMETRIC_ALGORITHMS:
+        raise JWTKeyError(f"unsupported JWT_ALGORITHM {algorithm!r} (expected HS256, EdDSA or RS256)")
+    if not private_key_pem:
+        raise JWTKeyError(f"JWT_PRIVATE_KEY_PATH is required for {algorithm}")
+    try:
+        private_key = serialization.load_pem_private_key(private_key_pem, password=None)
+    except (ValueError, TypeError) as exc:
+        raise JWTKeyError(f"cannot parse JWT private key: {exc}") from exc
+    expected_type = ASYMMETRIC_ALGORITHMS[algorithm][0]
+    if not isinstance(private_key, expected_type):
+        raise JWTKeyError(f"JWT private key does not match algorithm {algorithm}")
+    public_key = private_key.public_key()
+    return AccessTokenKeys(algorithm, private_key, public_key, kid or _key_id(public_key))
+
+
+def _load_configured_keys() -> AccessTokenKeys:
+    pem = None
+    if config.JWT_PRIVATE_KEY_PATH:
+        with open(config.JWT_PRIVATE_KEY_PATH, "rb") as f:
+            pem = f.read()
+    return load_access_token_keys(config.JWT_ALGORITHM, config.JWT_SECRET_KEY, pem, config.JWT_KEY_ID)
+
+
+access_token_keys = _load_configured_keys()
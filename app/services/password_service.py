@@ -0,0 +1,117 @@
+"""
+Password hashing with a configurable algorithm and cost, run off the request thread.
+
+PASSWORD_HASH_METHOD accepts werkzeug method strings ("scrypt", "scrypt:N:r:p", "pbkdf2",
+"pbkdf2:sha256:iterations") or "argon2[:time_cost:memory_kib:parallelism]" when argon2-cffi is
+installed. Hashing is deliberately CPU-expensive, so with PASSWORD_HASH_WORKERS > 0 it runs in a
+process pool (created lazily, after gunicorn forks): a login burst is capped at that many cores per
+worker instead of competing with every request thread of the worker. Hashes made with an older method or cost are upgraded on the next login.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+import config
+
+try:
+    import argon2
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # argon2-cffi is optional
+    argon2 = None
+
+# werkzeug's defaults, so "scrypt" and "scrypt:32768:8:1" name the same cost
+_WERKZEUG_DEFAULTS = {"scrypt": "scrypt:32768:8:1", "pbkdf2": "pbkdf2:sha256:1000000"}
+_ARGON2_PREFIX = "$argon2"
+
+
+def normalize_method(method: str) -> str:
+    method = method.strip().lower()
+    if method in _WERKZEUG_DEFAULTS:
+        return _WERKZEUG_DEFAULTS[method]
+    if method.startswith("argon2"):
+        if argon2 is None:
+            raise ValueError("PASSWORD_HASH_METHOD=argon2 requires the argon2-cffi package")
+        return method
+    if method.startswith(("scrypt:", "pbkdf2:")):
+        return method
+    raise ValueError(f"unsupported PASSWORD_HASH_METHOD {method!r}")
+
+
+def _argon2_hasher(method: str):
+    parts = method.split(":")[1:]
+    if not parts:
+        return argon2.PasswordHasher()
+    time_cost, memory_cost, parallelism = (int(p) for p in parts)
+    return argon2.PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+
+
+def _hash(method: str, password: str) -> str:
+    if method.startswith("argon2"):
+        return _argon2_hasher(method).hash(password)
+    return generate_password_hash(password, method=method)
+
+
+def _verify(password_hash: str, password: str) -> bool:
+    if password_hash.startswith(_ARGON2_PREFIX):
+        if argon2 is None:
+            return False
+        try:
+            return argon2.PasswordHasher().verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(password_hash, password)
+
+
+class PasswordHasher:
+    def __init__(self, method: str, workers: int = 0) -> None:
+        self.method = normalize_method(method)
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                # "spawn": forking a multi-threaded gunicorn worker is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _run(self, fn, *args):
+        pool = self._executor()
+        if pool is None:
+            return fn(*args)
+        return pool.submit(fn, *args).result()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, self.method, password)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run(_verify, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True if the hash was made with a different method or cost than the configured one."""
+        if password_hash.startswith(_ARGON2_PREFIX):
+            if not self.method.startswith("argon2"):
+                return True
+            return _argon2_hasher(self.method).check_needs_rehash(password_hash)
+        try:
+            return normalize_method(password_hash.split("$", 1)[0]) != self.method
+        except ValueError:
+            return True
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+
+password_hasher = PasswordHasher(config.PASSWORD_HASH_METHOD, config.PASSWORD_HASH_WORKERS)
@@ -1,42 +1,14 @@
-import os
-import pickle
-import pandas as pd
 from datetime import datetime
 from typing import Any, List, Dict
-from flask import current_app
 
-from app.extensions import db
-from app.models.station import Station
-from app.models.weather import WeatherForecast
-
-# Global variable to cache the model
-_model = None
-_features = None
-
-def _load_model() -> None:
-    global _model, _features
-    # If already loaded, return directly
-    if _model is not None and _features is not None:
-        return
+import numpy as np
 
-    # Get the directory where the app package is located (usually flask-app/app)
-    base_dir = current_app.root_path
-    
-    # Go back one level to flask-app then enter machine_learning directory to find .pkl
-    model_path = os.path.join(base_dir, '..', 'machine_learning', 'bike_availability_model.pkl')
-    features_path = os.path.join(base_dir, '..', 'machine_learning', 'model_features.pkl')
-
-    if not os.path.exists(model_path) or not os.path.exists(features_path):
-        raise FileNotFoundError(
-            f"Model files not found! Please ensure your training output files "
-            f"are located at {model_path} and {features_path}."
-        )
-
-    with open(model_path, 'rb') as f:
-        _model = pickle.load(f)
-    
-    with open(features_path, 'rb') as f:
-        _features = pickle.load(f)
+from app.ml.batching import prediction_batcher
+from app.ml.features import build_features
+from app.ml.registry import get_model
+from app.models.weather import WeatherForecast
+from app.services.station_service import find_station
+from app.utils.single_flight import read_flights
 
 
 class PredictionError(Exception):
@@ -45,14 +17,16 @@ class PredictionError(Exception):
         self.message = message
 
 
+@read_flights.wrap
 def get_station_predictions(station_id: int) -> List[Dict[str, Any]]:
     """
     Get available bike predictions for a station based on cached weather forecasts.
     """
-    _load_model()
+    # One model reference for the whole request: a version swapped in meanwhile is used from the next one
+    loaded = get_model()
 
     # 1. Get station fixed information (capacity, lat/lon)
-    station = db.session.get(Station, station_id)
+    station = find_station(station_id)
     if not station:
         raise PredictionError(f"Station {station_id} not found")
 
@@ -65,47 +39,28 @@ def get_station_predictions(station_id: int) -> List[Dict[str, Any]]:
     if not forecasts:
         raise PredictionError("No weather forecast data available to make predictions")
 
-    # 3. Construct features required for batch prediction
-    input_rows = []
-    for f in forecasts:
-        dt = f.forecast_time
-        day_of_week = dt.weekday() # 0-6 corresponding to Monday-Sunday
-        is_weekend = 1 if day_of_week >= 5 else 0
-
-        # Complete dictionary required in DataFrame, corresponding to model feature list
-        row = {
-            'station_id': station.number,
-            'capacity': station.bike_stands,
-            'lat': station.latitude,
-            'lon': station.longitude,
-            'hour': dt.hour,
-            'day': dt.day,
-            'day_of_week': day_of_week,
-            'is_weekend': is_weekend,
-            'avg_temperature': f.temperature,
-            'avg_humidity': f.humidity,
-            'avg_pressure': f.pressure
-        }
-        input_rows.append(row)
-
-    # Reorder strictly according to _features column names and order
-    df_input = pd.DataFrame(input_rows)[_features]
-
-    # Use the currently exported sklearn regression model for batch prediction
-    predictions = _model.predict(df_input)
-
-    # 4. Assemble and return results
-    result = []
-    for idx, f in enumerate(forecasts):
-        # Round the predicted decimals and forcefully convert to integer
-        predicted_bikes = int(round(predictions[idx]))
-        
-        # Correction: available bikes count cannot be less than 0 or more than station's maximum capacity
-        predicted_bikes = max(0, min(predicted_bikes, station.bike_stands))
-
-        result.append({
-            "forecast_time": f.forecast_time.isoformat(),
-            "predicted_available_bikes": predicted_bikes
-        })
+    # 3. Build the feature matrix in one vectorised call (the same code builds the training chunks),
+    #    columns strictly in the model's feature order
+    matrix = build_features(
+        station.number,
+        station.bike_stands,
+        station.latitude,
+        station.longitude,
+        [f.forecast_time for f in forecasts],
+        [f.temperature for f in forecasts],
+        [f.humidity for f in forecasts],
+        [f.pressure for f in forecasts],
+        loaded.features,
+    )
+
+    # Predict with the loaded model, in one call with the other requests arriving within MODEL_BATCH_WAIT_MS
+    predictions = prediction_batcher.predict(loaded, matrix)
+
+    # 4. Round to whole bikes and clamp: available bikes cannot be less than 0 or more than the station's capacity
+    predicted_bikes = np.clip(np.rint(np.asarray(predictions, dtype=np.float64)), 0, station.bike_stands).astype(int)
+    result = [
+        {"forecast_time": f.forecast_time.isoformat(), "predicted_available_bikes": int(bikes)}
+        for f, bikes in zip(forecasts, predicted_bikes)
+    ]
 
     return result
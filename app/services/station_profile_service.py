@@ -0,0 +1,206 @@
+"""
+Station profiles: typical bikes per station, weekday and hour.
+
+`flask stations profile` streams availability rows newer than the watermark (the highest
+availability id already merged) in id order, counts them into per-slot histograms and merges those
+into station_profile with one upsert per batch. Each batch is committed on its own, so an interrupted
+run resumes where it stopped and a scheduled run only reads the rows scraped since the last one.
+Reading a profile is a primary-key lookup.
+"""
+
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import tuple_
+
+import config
+from app.extensions import db
+from app.models import Availability, StationProfile
+from app.services.station_service import StationNotFoundError, find_station
+from app.utils.db_upsert import bulk_upsert_statement
+
+logger = logging.getLogger(__name__)
+
+# Column -> quantile, computed from the slot histogram (linear interpolation, like numpy.percentile)
+QUANTILES = {
+    "p10_bikes": 0.10,
+    "p25_bikes": 0.25,
+    "median_bikes": 0.50,
+    "p75_bikes": 0.75,
+    "p90_bikes": 0.90,
+}
+STAT_COLUMNS = ("samples", "mean_bikes", *QUANTILES, "histogram", "last_availability_id", "updated_at")
+
+
+@dataclass
+class ProfileBuildResult:
+    rows_read: int = 0
+    slots_updated: int = 0
+    batches: int = 0
+    watermark: int = 0
+
+
+def _value_at_rank(histogram: Sequence[int], rank: int) -> int:
+    """The value at 0-based ``rank`` of the sorted samples."""
+    seen = 0
+    for value, count in enumerate(histogram):
+        seen += count
+        if seen > rank:
+            return value
+    raise IndexError(rank)
+
+
+def histogram_quantile(histogram: Sequence[int], q: float) -> float:
+    """The q-quantile of the values described by ``histogram`` (histogram[v] = count of value v)."""
+    total = sum(histogram)
+    if total == 0:
+        raise ValueError("empty histogram")
+    position = q * (total - 1)
+    rank = int(position)
+    lower = _value_at_rank(histogram, rank)
+    if rank + 1 >= total or position == rank:
+        return float(lower)
+    upper = _value_at_rank(histogram, rank + 1)
+    return lower + (upper - lower) * (position - rank)
+
+
+def _merge_histograms(existing: Sequence[int], counts: Counter) -> list[int]:
+    size = max(len(existing), max(counts) + 1)
+    merged = list(existing) + [0] * (size - len(existing))
+    for value, count in counts.items():
+        merged[value] += count
+    return merged
+
+
+def profile_stats(histogram: Sequence[int]) -> dict[str, Any]:
+    total = sum(histogram)
+    stats: dict[str, Any] = {
+        "samples": total,
+        "mean_bikes": sum(value * count for value, count in enumerate(histogram)) / total,
+    }
+    for column, q in QUANTILES.items():
+        stats[column] = histogram_quantile(histogram, q)
+    return stats
+
+
+def get_profile_watermark() -> int:
+    return db.session.execute(db.select(db.func.max(StationProfile.last_availability_id))).scalar() or 0
+
+
+def _read_batch(after_id: int, batch_size: int) -> list[Any]:
+    # Only the four columns the histograms need, in id order from the watermark (keyset pagination)
+    return db.session.execute(
+        db.select(Availability.id, Availability.number, Availability.available_bikes, Availability.timestamp)
+        .where(Availability.id > after_id)
+        .order_by(Availability.id.asc())
+        .limit(batch_size)
+    ).all()
+
+
+def _merge_batch(rows: list[Any], now: datetime) -> int:
+    counts: dict[tuple[int, int, int], Counter] = defaultdict(Counter)
+    last_ids: dict[tuple[int, int, int], int] = {}
+    for row_id, number, bikes, timestamp in rows:
+        if bikes is None or bikes < 0 or timestamp is None:
+            continue
+        key = (number, timestamp.weekday(), timestamp.hour)
+        counts[key][bikes] += 1
+        last_ids[key] = row_id
+    if not counts:
+        return 0
+
+    slot = tuple_(StationProfile.number, StationProfile.weekday, StationProfile.hour)
+    existing = {
+        (number, weekday, hour): histogram
+        for number, weekday, hour, histogram in db.session.execute(
+            db.select(StationProfile.number, StationProfile.weekday, StationProfile.hour, StationProfile.histogram)
+            .where(slot.in_(list(counts)))
+        )
+    }
+    upserts = []
+    for key, slot_counts in counts.items():
+        histogram = _merge_histograms(existing.get(key, ()), slot_counts)
+        number, weekday, hour = key
+        upserts.append(
+            {
+                "number": number,
+                "weekday": weekday,
+                "hour": hour,
+                **profile_stats(histogram),
+                "histogram": histogram,
+                "last_availability_id": last_ids[key],
+                "updated_at": now,
+            }
+        )
+    db.session.execute(
+        bulk_upsert_statement(StationProfile.__table__, upserts, ["number", "weekday", "hour"], STAT_COLUMNS)
+    )
+    return len(upserts)
+
+
+def build_station_profiles(batch_size: Optional[int] = None, max_batches: Optional[int] = None) -> ProfileBuildResult:
+    """
+    Merge availability rows newer than the watermark into station_profile, one committed batch at a
+    time. Runs must not overlap (schedule a single job): two runs would count the same rows twice.
+    """
+    batch_size = batch_size or config.STATION_PROFILE_BATCH_SIZE
+    result = ProfileBuildResult(watermark=get_profile_watermark())
+    while max_batches is None or result.batches < max_batches:
+        rows = _read_batch(result.watermark, batch_size)
+        if not rows:
+            break
+        result.slots_updated += _merge_batch(rows, datetime.utcnow())
+        db.session.commit()
+        db.session.expunge_all()
+        result.rows_read += len(rows)
+        result.batches += 1
+        result.watermark = rows[-1][0]
+        if len(rows) < batch_size:
+            break
+    if result.rows_read:
+        logger.info("station profiles: merged %d rows into %d slots", result.rows_read, result.slots_updated)
+    return result
+
+
+def reset_station_profiles() -> int:
+    """Delete every profile (the next build starts again from the first availability row)."""
+    deleted = db.session.execute(db.delete(StationProfile)).rowcount
+    db.session.commit()
+    return deleted
+
+
+def _profile_to_dict(profile: StationProfile) -> dict[str, Any]:
+    return {
+        "number": profile.number,
+        "weekday": profile.weekday,
+        "hour": profile.hour,
+        "samples": profile.samples,
+        "mean_bikes": profile.mean_bikes,
+        "median_bikes": profile.median_bikes,
+        "p10_bikes": profile.p10_bikes,
+        "p25_bikes": profile.p25_bikes,
+        "p75_bikes": profile.p75_bikes,
+        "p90_bikes": profile.p90_bikes,
+    }
+
+
+def get_station_profile(number: int, weekday: Optional[int] = None, hour: Optional[int] = None) -> list[dict[str, Any]]:
+    """
+    Profile rows of a station: one slot when weekday and hour are given (a primary-key lookup), else
+    every hour of ``weekday`` or of the whole week, ordered by weekday and hour.
+    """
+    if find_station(number) is None:
+        raise StationNotFoundError()
+    if weekday is not None and hour is not None:
+        profile = db.session.get(StationProfile, (number, weekday, hour))
+        return [_profile_to_dict(profile)] if profile is not None else []
+    stmt = db.select(StationProfile).where(StationProfile.number == number)
+    if weekday is not None:
+        stmt = stmt.where(StationProfile.weekday == weekday)
+    if hour is not None:
+        stmt = stmt.where(StationProfile.hour == hour)
+    rows = db.session.execute(stmt.order_by(StationProfile.weekday, StationProfile.hour)).scalars().all()
+    return [_profile_to_dict(profile) for profile in rows]
@@ -1,11 +1,22 @@
+import hashlib
+import threading
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Callable, Hashable, NamedTuple, Optional, TypeVar
 
+import numpy as np
+
+import config
 from app.extensions import db
-from app.models import Availability, Station
+from app.models import Availability, Station, StationTableVersion
+from app.utils.single_flight import read_flights
 
 from sqlalchemy import func
 
+T = TypeVar("T")
+
 
 class StationNotFoundError(Exception):
     def __init__(self, message: str = "station not found") -> None:
@@ -43,18 +54,41 @@ def _station_to_dict(station: Station) -> dict[str, Any]:
     }
 
 
+# The columns of _station_to_dict, selected as plain tuples for the registry and its row digest
+_STATION_COLUMNS = (
+    Station.number,
+    Station.contract_name,
+    Station.name,
+    Station.address,
+    Station.latitude,
+    Station.longitude,
+    Station.banking,
+    Station.bonus,
+    Station.bike_stands,
+)
+
+
+def _query_station_rows() -> list[Any]:
+    return db.session.execute(db.select(*_STATION_COLUMNS).order_by(Station.number)).all()
+
+
+def _station_rows_digest(rows: list[Any]) -> str:
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update(repr(tuple(row)).encode("utf-8"))
+    return digest.hexdigest()
+
+
 def list_stations() -> list[dict[str, Any]]:
-    stations = (
-        db.session.execute(db.select(Station).order_by(Station.number)).scalars().all()
-    )
-    return [_station_to_dict(station) for station in stations]
+    """All stations ordered by number, from the station registry (no query unless the table changed)."""
+    return [dict(row) for row in get_station_registry().rows]
 
 
+@read_flights.wrap
 def get_recent_station_availability(
     number: int, lookback: timedelta = timedelta(days=1)
 ) -> list[dict[str, Any]]:
-    station = db.session.get(Station, number)
-    if station is None:
+    if find_station(number) is None:
         raise StationNotFoundError()
 
     since = datetime.now() - lookback
@@ -69,12 +103,315 @@ def get_recent_station_availability(
 
 
 def get_all_stations_latest_availability() -> list[dict[str, Any]]:
-    # 1. Find the latest Availability ID for each station
+    """Latest status of every station ordered by number, from the per-worker availability snapshot."""
+    return list(availability_snapshots.get().rows)
+
+
+class Snapshot:
+    """
+    One version of a station result set. Rows are shared by every request and must be treated as
+    read-only; encodings of them (JSON, columnar, MessagePack, ...) are built once per snapshot.
+    """
+
+    def __init__(self, version: Hashable, rows: tuple[dict[str, Any], ...]) -> None:
+        self.version = version
+        self.rows = rows
+        self._lock = threading.Lock()
+        self._encoded: dict[Hashable, Any] = {}
+
+    def columns(self, fields: tuple[str, ...]) -> dict[str, list[Any]]:
+        """The rows as parallel arrays, one per field."""
+        return self.encoded(("columns", fields), lambda snap: {f: [row[f] for row in snap.rows] for f in fields})
+
+    def encoded(self, key: Hashable, build: Callable[["Snapshot"], T]) -> T:
+        """Return the memoised ``build(self)`` for ``key``."""
+        with self._lock:
+            if key in self._encoded:
+                return self._encoded[key]
+        value = build(self)
+        with self._lock:
+            return self._encoded.setdefault(key, value)
+
+
+class SnapshotCache:
+    """
+    Keeps the current Snapshot of a result set per worker.
+
+    Within ``revalidate_seconds`` of the last check the snapshot is served without touching the DB.
+    After that ``probe()`` (a cheap change stamp) is compared with the stamp taken before the last load
+    and the rows are only reloaded when it moved. Without a probe, ``load()`` itself is the check.
+    Either way the snapshot (and its encodings) is kept if the reloaded version is unchanged.
+    ``load()`` returns ``(version, rows)``; the version may be the stamp itself or, like the station
+    table's row digest, something derived from the rows.
+
+    The last ``history`` snapshots are kept in a ring buffer so callers can diff against a version a
+    client already has (see changed_rows).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        load: Callable[[], tuple[Hashable, list[dict[str, Any]]]],
+        probe: Optional[Callable[[], Hashable]] = None,
+        revalidate_seconds: float = 5.0,
+        history: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self._load = load
+        self._probe = probe
+        self.revalidate_seconds = revalidate_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Snapshot] = None
+        # probe() result taken just before the current snapshot was loaded
+        self._stamp: Hashable = None
+        self._history: deque[Snapshot] = deque(maxlen=max(history, 1))
+        self._checked_at = 0.0
+        self.hits = 0
+        self.revalidations = 0
+        self.builds = 0
+
+    def get(self) -> Snapshot:
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and self._clock() - self._checked_at < self.revalidate_seconds:
+                self.hits += 1
+                return snapshot
+
+        stamp = None
+        if self._probe is not None:
+            stamp = self._probe()
+            if snapshot is not None and stamp == self._stamp:
+                return self._revalidated(snapshot)
+        return read_flights.do((self.name, "snapshot"), self._build, stamp)
+
+    def refresh(self) -> Snapshot:
+        """Check the DB version now, ignoring the revalidation window."""
+        with self._lock:
+            self._checked_at = float("-inf")
+        return self.get()
+
+    def find(self, version: Hashable) -> Optional[Snapshot]:
+        """The snapshot with this version if it is still in the history ring buffer."""
+        with self._lock:
+            for snapshot in reversed(self._history):
+                if snapshot.version == version:
+                    return snapshot
+        return None
+
+    def _revalidated(self, snapshot: Snapshot, stamp: Hashable = None) -> Snapshot:
+        with self._lock:
+            if stamp is not None:
+                self._stamp = stamp
+            self._checked_at = self._clock()
+            self.revalidations += 1
+        return snapshot
+
+    def _build(self, stamp: Hashable = None) -> Snapshot:
+        # Stamp before rows: a change landing in between moves the next probe and reloads again
+        version, rows = self._load()
+        with self._lock:
+            current = self._snapshot
+        if current is not None and current.version == version:
+            return self._revalidated(current, stamp)
+        snapshot = Snapshot(version, tuple(rows))
+        with self._lock:
+            self._snapshot = snapshot
+            self._stamp = stamp
+            self._history.append(snapshot)
+            self._checked_at = self._clock()
+            self.builds += 1
+        return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._stamp = None
+            self._history.clear()
+            self._checked_at = 0.0
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "revalidations": self.revalidations, "builds": self.builds}
+
+
+def get_station_table_version() -> int:
+    """
+    Change stamp of the station table: the station_table_version counter, which database triggers
+    bump on every insert, delete and value-changing update (one single-row read).
+    """
+    return db.session.execute(
+        db.select(StationTableVersion.version).where(StationTableVersion.id == 1)
+    ).scalar() or 0
+
+
+def _load_station_rows() -> tuple[str, list[dict[str, Any]]]:
+    # The version is the rows' digest: a bump without a real change (e.g. a REPLACE of equal rows)
+    # keeps the current snapshot, its encodings and its ETag
+    rows = _query_station_rows()
+    return _station_rows_digest(rows), [dict(row._mapping) for row in rows]
+
+
+def get_latest_availability_version() -> int:
+    """max(Availability.id): every scrape appends rows, so it moves whenever any station changed."""
+    return db.session.execute(db.select(func.max(Availability.id))).scalar() or 0
+
+
+def _load_latest_availability() -> tuple[int, list[dict[str, Any]]]:
     subquery = db.select(func.max(Availability.id)).group_by(Availability.number)
+    rows = db.session.execute(
+        db.select(Availability).where(Availability.id.in_(subquery)).order_by(Availability.number)
+    ).scalars().all()
+    # The newest row overall is the latest row of its station, so this equals the probe's version
+    version = max((row.id for row in rows), default=0)
+    return version, [_availability_to_dict(row) for row in rows]
 
-    # 2. Fetch the complete records based on these latest IDs
-    stmt = db.select(Availability).where(Availability.id.in_(subquery))
-    rows = db.session.execute(stmt).scalars().all()
 
-    # 3. Reuse the team's original conversion function to keep the return format completely consistent
-    return [_availability_to_dict(availability) for availability in rows]
+def snapshot_last_modified(snapshot: Snapshot, field: str = "timestamp") -> Optional[datetime]:
+    """Newest ``field`` timestamp across the snapshot rows (memoised), for Last-Modified."""
+
+    def build(snap: Snapshot) -> Optional[datetime]:
+        return max((datetime.fromisoformat(row[field]) for row in snap.rows if row.get(field)), default=None)
+
+    return snapshot.encoded(("last_modified", field), build)
+
+
+# Fields whose change makes a station part of a ?since= delta
+DELTA_FIELDS = ("available_bikes", "available_bike_stands", "status")
+
+
+def changed_rows(base: Snapshot, snapshot: Snapshot, key: str = "number", fields: tuple[str, ...] = DELTA_FIELDS) -> tuple[dict[str, Any], ...]:
+    """Rows of ``snapshot`` that are new or differ from ``base`` in ``fields`` (memoised on snapshot)."""
+
+    def build(snap: Snapshot) -> tuple[dict[str, Any], ...]:
+        previous = {row[key]: row for row in base.rows}
+        return tuple(
+            row
+            for row in snap.rows
+            if (old := previous.get(row[key])) is None or any(old[field] != row[field] for field in fields)
+        )
+
+    return snapshot.encoded(("changed", base.version, key, fields), build)
+
+
+def get_availability_changes(since: int) -> tuple[Snapshot, Optional[tuple[dict[str, Any], ...]]]:
+    """
+    The current latest-availability snapshot and the stations that changed since version ``since``,
+    or None for the changes when ``since`` is no longer (or not yet) in this worker's history.
+    """
+    snapshot = availability_snapshots.get()
+    if since > snapshot.version:
+        # The client saw a newer scrape through another worker: catch up before answering
+        snapshot = availability_snapshots.refresh()
+    if since == snapshot.version:
+        return snapshot, ()
+    base = availability_snapshots.find(since)
+    if base is None:
+        return snapshot, None
+    return snapshot, changed_rows(base, snapshot)
+
+
+# Per-worker snapshots behind /api/stations/ and the station registry (version: the station table
+# stamp) and /api/stations/status (version: max(Availability.id))
+station_snapshots = SnapshotCache(
+    "stations",
+    _load_station_rows,
+    probe=get_station_table_version,
+    revalidate_seconds=config.STATION_REGISTRY_REVALIDATE_SECONDS,
+)
+availability_snapshots = SnapshotCache(
+    "latest_availability",
+    _load_latest_availability,
+    probe=get_latest_availability_version,
+    revalidate_seconds=config.STATION_SNAPSHOT_REVALIDATE_SECONDS,
+    history=config.STATION_SNAPSHOT_HISTORY,
+)
+
+
+class StationEntry(NamedTuple):
+    number: int
+    contract_name: str
+    name: str
+    address: str
+    latitude: float
+    longitude: float
+    banking: bool
+    bonus: bool
+    bike_stands: int
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class StationRegistry:
+    """
+    Immutable view of one version of the station table: entries by number plus parallel NumPy arrays
+    (``numbers``, ``latitudes``, ``longitudes``, ``capacities``, in station-number order) for vectorised
+    geometry and model features.
+    Built once per station snapshot and shared by every thread of the worker.
+    """
+
+    def __init__(self, version: Hashable, rows: tuple[dict[str, Any], ...]) -> None:
+        self.version = version
+        self.rows = rows
+        self.entries = tuple(StationEntry(**row) for row in rows)
+        self.by_number = MappingProxyType({entry.number: entry for entry in self.entries})
+        self.index = MappingProxyType({entry.number: i for i, entry in enumerate(self.entries)})
+        self.numbers = _read_only(np.array([entry.number for entry in self.entries], dtype=np.int64))
+        self.latitudes = _read_only(np.array([entry.latitude for entry in self.entries], dtype=np.float64))
+        self.longitudes = _read_only(np.array([entry.longitude for entry in self.entries], dtype=np.float64))
+        self.capacities = _read_only(np.array([entry.bike_stands for entry in self.entries], dtype=np.int64))
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Snapshot) -> "StationRegistry":
+        return cls(snapshot.version, snapshot.rows)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, number: object) -> bool:
+        return number in self.by_number
+
+    def get(self, number: int) -> Optional[StationEntry]:
+        return self.by_number.get(number)
+
+    def positions(self, numbers: np.ndarray) -> np.ndarray:
+        """Index into the parallel arrays of each station number, -1 for numbers not in the table."""
+        numbers = np.asarray(numbers, dtype=np.int64)
+        if not len(self.numbers):
+            return np.full(numbers.shape, -1, dtype=np.int64)
+        # numbers is sorted: binary search, then keep only exact hits
+        found = np.minimum(np.searchsorted(self.numbers, numbers), len(self.numbers) - 1)
+        return np.where(self.numbers[found] == numbers, found, -1)
+
+    def distances_km(self, lat: float, lon: float) -> np.ndarray:
+        """Haversine distance (km) from (lat, lon) to every station, aligned with ``entries``."""
+        lat1 = np.radians(lat)
+        lat2 = np.radians(self.latitudes)
+        dlat = lat2 - lat1
+        dlon = np.radians(self.longitudes - lon)
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+        a = np.clip(a, 0.0, 1.0)
+        return 6371 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def _registry_of(snapshot: Snapshot) -> StationRegistry:
+    return snapshot.encoded(("registry",), StationRegistry.from_snapshot)
+
+
+def get_station_registry() -> StationRegistry:
+    """The current StationRegistry (the table is re-read only when its version stamp changed)."""
+    return _registry_of(station_snapshots.get())
+
+
+def find_station(number: int) -> Optional[StationEntry]:
+    """
+    The registry entry for a station number. A miss re-checks the table version once, so a station
+    added since the last revalidation is found without waiting for the window to pass.
+    """
+    entry = get_station_registry().get(number)
+    if entry is None:
+        entry = _registry_of(station_snapshots.refresh()).get(number)
+    return entry
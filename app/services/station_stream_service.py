@@ -0,0 +1,237 @@
+"""
+Server-sent station updates for /api/stations/stream.
+
+One StationBroadcaster per worker polls the latest-availability version (a single max(id) query,
+the rows are only reloaded when a scrape landed) and turns each new snapshot into one pre-encoded
+``changes`` event holding just the stations that changed. Every connected client of the worker reads
+that same event from a shared, sequence-numbered log, so the DB cost is one probe per poll interval
+per worker no matter how many map clients are connected. Each worker polling the shared database is
+also what keeps the workers in step with each other. Deployed, the stream is served by the gevent
+stream server (entrypoint.sh stream, stream_wsgi.py), where a client is a greenlet, not a thread.
+"""
+
+import json
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+import config
+from app.services.station_service import Snapshot, availability_snapshots, changed_rows
+
+logger = logging.getLogger(__name__)
+
+
+class StreamFullError(Exception):
+    def __init__(self, message: str = "too many stream clients, retry later", status_code: int = 503) -> None:
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class StreamEvent(NamedTuple):
+    seq: int
+    version: int
+    frame: bytes
+
+
+def encode_event(event: str, version: int, full: bool, rows: tuple[dict[str, Any], ...]) -> bytes:
+    data = json.dumps({"version": version, "full": full, "changed": list(rows)}, separators=(",", ":"))
+    return f"event: {event}\nid: {version}\ndata: {data}\n\n".encode("utf-8")
+
+
+class Subscription:
+    """One client's event stream; close() (called by the WSGI server on disconnect) frees its slot."""
+
+    def __init__(self, frames: Iterator[bytes], release: Callable[[], None]) -> None:
+        self._frames = frames
+        self._release = release
+        self._closed = False
+
+    def __iter__(self) -> "Subscription":
+        return self
+
+    def __next__(self) -> bytes:
+        return next(self._frames)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._frames.close()
+        finally:
+            self._release()
+
+
+def _snapshot_frame(snapshot: Snapshot) -> bytes:
+    return snapshot.encoded(("sse", "snapshot"), lambda snap: encode_event("snapshot", snap.version, True, snap.rows))
+
+
+class StationBroadcaster:
+    """
+    Polls ``poll()`` every ``poll_seconds`` on a daemon thread and publishes each new version as a
+    ``changes`` event (the rows changed since the previous version, encoded once). Subscribers wait on
+    one condition variable and read the shared event log from their own cursor; a subscriber that falls
+    more than ``backlog`` events behind is sent a full ``snapshot`` event instead.
+    """
+
+    def __init__(
+        self,
+        poll: Callable[[], Snapshot],
+        poll_seconds: float = 5.0,
+        keepalive_seconds: float = 15.0,
+        max_clients: int = 8,
+        backlog: int = 64,
+        app_context: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        self._poll = poll
+        self.poll_seconds = poll_seconds
+        self.keepalive_seconds = keepalive_seconds
+        self.max_clients = max_clients
+        self._app_context = app_context
+        self._cond = threading.Condition()
+        self._poll_lock = threading.Lock()
+        self._events: deque[StreamEvent] = deque(maxlen=backlog)
+        self._seq = 0
+        self._snapshot: Optional[Snapshot] = None
+        self._clients = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.polls = 0
+
+    # ----- producer -----
+
+    def poll_once(self) -> Optional[StreamEvent]:
+        """Check for a new snapshot and publish the changed stations; returns the event, if any."""
+        with self._poll_lock:
+            snapshot = self._poll()
+            self.polls += 1
+            with self._cond:
+                previous = self._snapshot
+                if previous is not None and snapshot.version == previous.version:
+                    return None
+                self._snapshot = snapshot
+                if previous is None:
+                    # Nothing to diff against yet: new clients get the full snapshot on connect anyway
+                    return None
+            frame = encode_event("changes", snapshot.version, False, changed_rows(previous, snapshot))
+            with self._cond:
+                self._seq += 1
+                event = StreamEvent(self._seq, snapshot.version, frame)
+                self._events.append(event)
+                self._cond.notify_all()
+            return event
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self._app_context is not None:
+                    with self._app_context():
+                        self.poll_once()
+                else:
+                    self.poll_once()
+            except Exception:
+                logger.exception("station stream poll failed")
+            self._stop.wait(self.poll_seconds)
+
+    def start(self, app_context: Optional[Callable[[], Any]] = None) -> None:
+        """Start the poller thread unless it is running; ``app_context`` wraps each poll (DB access)."""
+        with self._cond:
+            if app_context is not None:
+                self._app_context = app_context
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="station-stream", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout=5)
+
+    # ----- consumers -----
+
+    def _initial_frame(self, last_version: Optional[int]) -> tuple[Snapshot, bytes]:
+        with self._cond:
+            snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self._poll()
+            with self._cond:
+                self._snapshot = self._snapshot or snapshot
+        if last_version is not None:
+            if last_version == snapshot.version:
+                return snapshot, b""
+            base = availability_snapshots.find(last_version)
+            if base is not None:
+                return snapshot, encode_event("changes", snapshot.version, False, changed_rows(base, snapshot))
+        return snapshot, _snapshot_frame(snapshot)
+
+    def subscribe(self, last_version: Optional[int] = None) -> Subscription:
+        """
+        Register a client and return its event stream: the full snapshot (or the delta since
+        ``last_version``, from Last-Event-ID), then one ``changes`` event per new scrape and keep-alive
+        comments in between. Raises StreamFullError when the worker is at max_clients.
+        """
+        with self._cond:
+            if self._clients >= self.max_clients:
+                raise StreamFullError()
+            self._clients += 1
+            cursor = self._seq
+        try:
+            snapshot, first = self._initial_frame(last_version)
+        except Exception:
+            self._release()
+            raise
+        return Subscription(self._stream(cursor, snapshot.version, first), self._release)
+
+    def _release(self) -> None:
+        with self._cond:
+            self._clients -= 1
+
+    def _stream(self, cursor: int, version: int, first: bytes) -> Iterator[bytes]:
+        yield first or b": connected\n\n"
+        while not self._stop.is_set():
+            with self._cond:
+                self._cond.wait_for(lambda: self._seq > cursor or self._stop.is_set(), timeout=self.keepalive_seconds)
+                pending = [event for event in self._events if event.seq > cursor]
+                lost = bool(pending) and pending[0].seq > cursor + 1
+                snapshot = self._snapshot
+            if not pending:
+                yield b": keepalive\n\n"
+                continue
+            if lost and snapshot is not None:
+                # This client fell further behind than the backlog: resend everything
+                yield _snapshot_frame(snapshot)
+            else:
+                for event in pending:
+                    if event.version > version:
+                        yield event.frame
+            cursor = pending[-1].seq
+            version = pending[-1].version
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            return {"clients": self._clients, "events": self._seq, "polls": self.polls}
+
+
+def _poll_availability() -> Snapshot:
+    return availability_snapshots.refresh()
+
+
+station_broadcaster = StationBroadcaster(
+    _poll_availability,
+    poll_seconds=config.STATION_STREAM_POLL_SECONDS,
+    keepalive_seconds=config.STATION_STREAM_KEEPALIVE_SECONDS,
+    max_clients=config.STATION_STREAM_MAX_CLIENTS,
+)
+
+
+def ensure_broadcaster_started(app) -> StationBroadcaster:
+    """Start this worker's poller (on the first stream request) with the app context it needs for the DB."""
+    station_broadcaster.start(app.app_context)
+    return station_broadcaster
@@ -0,0 +1,194 @@
+"""
+Per-worker cache of each user's (token_version, is_active), so verifying an access token does not
+need a primary-key lookup on every request.
+
+Entries expire after AUTH_TOKEN_CACHE_TTL_SECONDS, which bounds how long another worker can keep
+accepting a revoked token. logout_user evicts the entry in its own worker immediately and publishes
+the revocation on a channel that every worker polls (at most every AUTH_REVOCATION_POLL_SECONDS):
+  - "db":    the token_revocation table (works across processes and hosts)
+  - "local": an in-process stand-in (single worker, development, tests)
+  - "none":  no cross-worker invalidation; other workers rely on the TTL alone
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, NamedTuple, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+import config
+from app.extensions import db
+from app.models import TokenRevocation, User
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class UserTokenState(NamedTuple):
+    token_version: int
+    is_active: bool
+
+
+class LocalRevocationChannel:
+    """In-process stand-in for a pub/sub channel: a sequence-numbered event log."""
+
+    def __init__(self, max_events: int = 10000) -> None:
+        self._lock = threading.Lock()
+        self._events: deque[tuple[int, int]] = deque(maxlen=max_events)
+        self._seq = 0
+
+    def publish(self, user_id: int, token_version: int) -> None:
+        with self._lock:
+            self._seq += 1
+            self._events.append((self._seq, user_id))
+
+    def latest_id(self) -> int:
+        with self._lock:
+            return self._seq
+
+    def events_since(self, cursor: int) -> list[tuple[int, int]]:
+        with self._lock:
+            return [event for event in self._events if event[0] > cursor]
+
+
+class DatabaseRevocationChannel:
+    """Revocation log in the token_revocation table; the max id is the revocation epoch."""
+
+    def __init__(self, retention_seconds: float = 3600.0) -> None:
+        # Older events are irrelevant once every cached entry from before them has expired
+        self.retention_seconds = retention_seconds
+
+    def publish(self, user_id: int, token_version: int) -> None:
+        """Record a revocation in the caller's transaction (committed together with the version bump)."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention_seconds)
+        db.session.execute(db.delete(TokenRevocation).where(TokenRevocation.created_at < cutoff))
+        db.session.add(TokenRevocation(user_id=user_id, token_version=token_version))
+
+    def latest_id(self) -> int:
+        return db.session.execute(db.select(db.func.max(TokenRevocation.id))).scalar() or 0
+
+    def events_since(self, cursor: int) -> list[tuple[int, int]]:
+        rows = db.session.execute(
+            db.select(TokenRevocation.id, TokenRevocation.user_id)
+            .where(TokenRevocation.id > cursor)
+            .order_by(TokenRevocation.id.asc())
+        ).all()
+        return [(row.id, row.user_id) for row in rows]
+
+
+class TokenStateCache:
+    def __init__(
+        self,
+        ttl: float,
+        maxsize: int = 10000,
+        channel=None,
+        poll_seconds: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.enabled = ttl > 0
+        self._cache = TTLCache(maxsize=max(maxsize, 1), ttl=ttl, clock=clock)
+        self.channel = channel
+        self.poll_seconds = poll_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._cursor: Optional[int] = None
+        self._next_poll = 0.0
+        # Bumped on every eviction; a load that overlaps an eviction is not cached (it may be stale)
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, user_id: int) -> Optional[UserTokenState]:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        return UserTokenState(user.token_version, bool(user.is_active))
+
+    def _poll_channel(self) -> None:
+        if self.channel is None:
+            return
+        now = self._clock()
+        with self._lock:
+            if now < self._next_poll:
+                return
+            self._next_poll = now + self.poll_seconds
+            cursor = self._cursor
+        try:
+            if cursor is None:
+                # First poll: nothing is cached yet, so only the current epoch matters
+                latest = self.channel.latest_id()
+                with self._lock:
+                    self._cursor = latest if self._cursor is None else self._cursor
+                return
+            events = self.channel.events_since(cursor)
+        except SQLAlchemyError:
+            db.session.rollback()
+            logger.warning("token revocation poll failed; relying on cache TTL", exc_info=True)
+            return
+        if not events:
+            return
+        for _, user_id in events:
+            self.invalidate(user_id)
+        with self._lock:
+            self._cursor = max(self._cursor or 0, events[-1][0])
+
+    def get_state(self, user_id: int) -> Optional[UserTokenState]:
+        """Return (token_version, is_active) for the user, or None if the user does not exist."""
+        if not self.enabled:
+            return self._load(user_id)
+        self._poll_channel()
+        state = self._cache.get(user_id)
+        if state is not None:
+            self.hits += 1
+            return state
+        self.misses += 1
+        with self._lock:
+            epoch = self._epoch
+        state = self._load(user_id)
+        if state is not None:
+            with self._lock:
+                if epoch == self._epoch:
+                    self._cache.set(user_id, state)
+        return state
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._cache.pop(user_id)
+
+    def publish_revocation(self, user_id: int, token_version: int) -> None:
+        """Evict locally and tell the other workers; call before committing the version bump."""
+        self.invalidate(user_id)
+        if self.channel is not None:
+            self.channel.publish(user_id, token_version)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._cache.clear()
+            self._cursor = None
+            self._next_poll = 0.0
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+
+def _build_channel(name: str):
+    if name == "db":
+        return DatabaseRevocationChannel(retention_seconds=max(3600.0, config.AUTH_TOKEN_CACHE_TTL_SECONDS * 10))
+    if name == "local":
+        return LocalRevocationChannel()
+    if name in ("", "none"):
+        return None
+    raise ValueError(f"unknown AUTH_REVOCATION_CHANNEL {name!r} (expected db, local or none)")
+
+
+token_state_cache = TokenStateCache(
+    ttl=config.AUTH_TOKEN_CACHE_TTL_SECONDS,
+    maxsize=config.AUTH_TOKEN_CACHE_MAX_ENTRIES,
+    channel=_build_channel(config.AUTH_REVOCATION_CHANNEL),
+    poll_seconds=config.AUTH_REVOCATION_POLL_SECONDS,
+)
@@ -5,14 +5,16 @@ from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
 
 import jwt
-from sqlalchemy import or_
+from sqlalchemy import ColumnElement, or_
 from sqlalchemy.exc import IntegrityError
-from werkzeug.security import check_password_hash, generate_password_hash
 
 import config
 from app.extensions import db
 from app.models import User
-from app.utils.email import send_verification_code_email_async
+from app.services.email_outbox_service import enqueue_verification_email
+from app.services.jwt_key_service import access_token_keys
+from app.services.password_service import password_hasher
+from app.services.token_state_service import token_state_cache
 
 
 class UserRegistrationError(Exception):
@@ -33,9 +35,11 @@ class AuthError(Exception):
 def _create_token(
     user_id: int,
     token_version: int,
-    secret: str,
+    secret: Any,
     expires_seconds: int,
     token_type: str,
+    algorithm: str = "HS256",
+    headers: Optional[dict[str, Any]] = None,
 ) -> str:
     now = int(time.time())
     payload = {
@@ -45,12 +49,18 @@ def _create_token(
         "iat": now,
         "exp": now + expires_seconds,
     }
-    return jwt.encode(payload, secret, algorithm="HS256")
+    return jwt.encode(payload, secret, algorithm=algorithm, headers=headers)
 
 
-def _decode_token(token: str, secret: str, expired_msg: str, invalid_msg: str) -> dict[str, Any]:
+def _decode_token(
+    token: str,
+    secret: Any,
+    expired_msg: str,
+    invalid_msg: str,
+    algorithm: str = "HS256",
+) -> dict[str, Any]:
     try:
-        return jwt.decode(token, secret, algorithms=["HS256"])
+        return jwt.decode(token, secret, algorithms=[algorithm])
     except jwt.ExpiredSignatureError:
         raise AuthError(expired_msg, 401)
     except jwt.InvalidTokenError:
@@ -82,9 +92,11 @@ def create_access_token(user_id: int, token_version: int) -> str:
     return _create_token(
         user_id=user_id,
         token_version=token_version,
-        secret=config.JWT_SECRET_KEY,
+        secret=access_token_keys.signing_key,
         expires_seconds=config.JWT_ACCESS_EXPIRES_SECONDS,
         token_type="access",
+        algorithm=access_token_keys.algorithm,
+        headers=access_token_keys.headers,
     )
 
 
@@ -102,18 +114,20 @@ def verify_access_token(token: str) -> dict[str, Any]:
     """Decode and validate the access token, returning the payload; raises AuthError on failure."""
     payload = _decode_token(
         token=token,
-        secret=config.JWT_SECRET_KEY,
+        secret=access_token_keys.verification_key,
         expired_msg="access token expired",
         invalid_msg="invalid access token",
+        algorithm=access_token_keys.algorithm,
     )
     if payload.get("type") != "access":
         raise AuthError("invalid token type", 401)
     user_id = _extract_user_id(payload)
     token_version = _extract_token_version(payload)
-    user = db.session.get(User, user_id)
-    if user is None or not user.is_active:
+    # Cached per worker; logout_user evicts it (see token_state_service)
+    state = token_state_cache.get_state(user_id)
+    if state is None or not state.is_active:
         raise AuthError("user not found or disabled", 401)
-    if token_version != user.token_version:
+    if token_version != state.token_version:
         raise AuthError("access token has been revoked", 401)
     payload["sub"] = user_id
     payload["ver"] = token_version
@@ -135,20 +149,35 @@ def verify_refresh_token(token: str) -> dict[str, Any]:
     return payload
 
 
+def identifier_filter(identifier: str) -> ColumnElement[bool]:
+    """
+    WHERE clause for a login identifier. Usernames cannot contain '@', so an identifier with '@' is an
+    email (stored lowercased) and anything else a username: each lookup hits exactly one unique index,
+    instead of an OR across both that MySQL may answer with an index merge or a scan.
+    """
+    if "@" in identifier:
+        return User.email == identifier.lower()
+    return User.username == identifier
+
+
+def find_user_by_identifier(identifier: str) -> Optional[User]:
+    return db.session.scalar(db.select(User).where(identifier_filter(identifier)))
+
+
 def login_user(identifier: str, password: str) -> dict[str, Any]:
     """Login with username or email and password, returning access_token, refresh_token, and expires_in."""
-    user = db.session.scalar(
-        db.select(User).where(
-            or_(User.username == identifier, User.email == identifier.lower())
-        )
-    )
+    user = find_user_by_identifier(identifier)
     if user is None:
         raise AuthError("invalid username/email or password", 401)
     if not user.is_active:
         print(f"[Email Verification] Login rejected: account not activated, please complete email verification email={user.email} username={user.username}")
         raise AuthError("account is disabled", 403)
-    if not check_password_hash(user.password_hash, password):
+    if not password_hasher.verify(user.password_hash, password):
         raise AuthError("invalid username/email or password", 401)
+    if password_hasher.needs_rehash(user.password_hash):
+        # Transparent upgrade to the configured method / cost while the plaintext is at hand
+        user.password_hash = password_hasher.hash(password)
+        db.session.commit()
 
     return {
         "access_token": create_access_token(user.id, user.token_version),
@@ -187,8 +216,16 @@ def logout_user(access_token: str) -> None:
     user = db.session.get(User, payload["sub"])
     if user is None or not user.is_active:
         raise AuthError("user not found or disabled", 401)
+    revoke_user_tokens(user)
+
+
+def revoke_user_tokens(user: User) -> None:
+    """Increment token_version for an already-authenticated user (see logout_user)."""
     user.token_version += 1
+    token_state_cache.publish_revocation(user.id, user.token_version)
     db.session.commit()
+    # Evict again: a concurrent request may have re-cached the old version before the commit
+    token_state_cache.invalidate(user.id)
 
 
 def _generate_verification_code() -> str:
@@ -236,7 +273,7 @@ def register_user(payload: dict[str, Any]) -> dict[str, Any]:
     user = User(
         username=payload["username"],
         email=payload["email"],
-        password_hash=generate_password_hash(payload["password"]),
+        password_hash=password_hasher.hash(payload["password"]),
         avatar_url=payload["avatar_url"],
         is_active=False,
         email_verification_code=verification_code,
@@ -246,21 +283,22 @@ def register_user(payload: dict[str, Any]) -> dict[str, Any]:
     )
 
     db.session.add(user)
+    # Auto-send on registration: the email (if configured) is queued in the outbox in the same transaction
+    enqueue_verification_email(
+        user.email,
+        verification_code,
+        config.VERIFICATION_CODE_EXPIRE_SECONDS // 60,
+        activation_token=activation_token,
+    )
     try:
         db.session.commit()
     except IntegrityError:
         db.session.rollback()
         raise UserRegistrationError("username or email already exists.", "user_conflict", 409) from None
 
-    # Auto-send on registration: SMTP email (if configured) + console output for debugging
+    # Console output for debugging
     print(f"[Email Verification] Registration successful, verification code sent (see below)")
     print(f"[Email Verification - Register] email={user.email} username={user.username} code={verification_code} expires={expires_at.isoformat()}")
-    send_verification_code_email_async(
-        user.email,
-        verification_code,
-        config.VERIFICATION_CODE_EXPIRE_SECONDS // 60,
-        activation_token=activation_token,
-    )
 
     return serialize_user(user)
 
@@ -272,11 +310,7 @@ def send_verification_code(identifier: str) -> dict[str, Any]:
     """
     print(f"[Email Verification] Requesting verification code identifier={identifier!r}")
 
-    user = db.session.scalar(
-        db.select(User).where(
-            or_(User.username == identifier, User.email == identifier.lower())
-        )
-    )
+    user = find_user_by_identifier(identifier)
     if user is None:
         print(f"[Email Verification] Send failed: user does not exist identifier={identifier!r}")
         raise AuthError("user not found", 404)
@@ -298,14 +332,14 @@ def send_verification_code(identifier: str) -> dict[str, Any]:
     user.email_verification_code = code
     user.email_verification_code_expires_at = expires_at
     user.email_verification_code_sent_at = now
-    db.session.commit()
-
-    print(f"[Email Verification - Resend] email={user.email} username={user.username} code={code} expires={expires_at.isoformat()}")
-    send_verification_code_email_async(
+    enqueue_verification_email(
         user.email,
         code,
         config.VERIFICATION_CODE_EXPIRE_SECONDS // 60,
     )
+    db.session.commit()
+
+    print(f"[Email Verification - Resend] email={user.email} username={user.username} code={code} expires={expires_at.isoformat()}")
     return {"message": "verification code sent"}
 
 
@@ -318,11 +352,7 @@ def activate_user(identifier: str, code: str) -> dict[str, Any]:
     code_stripped = code.strip()
     print(f"[Email Verification] Attempting activation identifier={identifier!r} code={code_stripped!r}")
 
-    user = db.session.scalar(
-        db.select(User).where(
-            or_(User.username == identifier, User.email == identifier.lower())
-        )
-    )
+    user = find_user_by_identifier(identifier)
     if user is None:
         print(f"[Email Verification] Activation failed: user does not exist identifier={identifier!r}")
         raise AuthError("user not found", 404)
@@ -0,0 +1,228 @@
+"""
+OpenWeatherMap ingestion: fetches the OneCall hourly block and upserts it into weather_forecast.
+
+Rows are keyed on forecast_time. Unchanged hours are not rewritten (so max(fetched_at) only moves
+when the forecast actually changed), and all new or changed hours go out in one multi-row
+INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE statement.
+"""
+
+import logging
+import math
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+import requests
+
+import config
+from app.extensions import db
+from app.models.weather import WeatherForecast
+from app.services.weather_retention_service import prune_weather_forecasts
+from app.services.weather_service import get_latest_fetched_at, weather_payload_cache
+from app.utils.db_upsert import bulk_upsert_statement
+
+logger = logging.getLogger(__name__)
+
+# Columns compared to decide whether a stored hour changed (everything except id / fetched_at)
+VALUE_COLUMNS = (
+    "temperature",
+    "weather_code",
+    "description",
+    "icon",
+    "feels_like",
+    "pressure",
+    "humidity",
+    "uvi",
+    "clouds",
+    "visibility",
+    "wind_speed",
+    "wind_deg",
+    "pop",
+)
+
+
+class WeatherIngestError(Exception):
+    """Fetching or parsing the upstream forecast failed."""
+    def __init__(self, message: str = "weather ingest error", status_code: int = 502) -> None:
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+@dataclass
+class IngestResult:
+    fetched: bool = False
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.inserted or self.updated)
+
+
+def fetch_onecall(session: Optional[requests.Session] = None) -> dict[str, Any]:
+    """Call the OneCall endpoint for the configured location (metric units, hourly block only)."""
+    params = {
+        "lat": config.OPENWEATHER_LAT,
+        "lon": config.OPENWEATHER_LON,
+        "appid": config.OPENWEATHER_API_KEY,
+        "units": "metric",
+        "exclude": "minutely,daily,alerts",
+    }
+    http = session or requests
+    try:
+        resp = http.get(config.OPENWEATHER_API_BASE_URL, params=params, timeout=config.OPENWEATHER_TIMEOUT_SECONDS)
+    except requests.RequestException as exc:
+        raise WeatherIngestError(f"OpenWeatherMap request failed: {exc}") from exc
+    if resp.status_code != 200:
+        raise WeatherIngestError(f"OpenWeatherMap returned HTTP {resp.status_code}", resp.status_code)
+    try:
+        return resp.json()
+    except ValueError as exc:
+        raise WeatherIngestError("OpenWeatherMap returned invalid JSON") from exc
+
+
+def parse_hourly(payload: dict[str, Any]) -> list[dict[str, Any]]:
+    """Map OneCall ``hourly`` entries to weather_forecast column dicts (naive UTC forecast_time)."""
+    hourly = payload.get("hourly")
+    if not isinstance(hourly, list) or not hourly:
+        raise WeatherIngestError("OpenWeatherMap response has no hourly forecast")
+    rows = []
+    for entry in hourly:
+        try:
+            weather = (entry.get("weather") or [{}])[0]
+            rows.append({
+                "forecast_time": datetime.fromtimestamp(entry["dt"], tz=timezone.utc).replace(tzinfo=None),
+                "temperature": entry["temp"],
+                "weather_code": weather.get("id", 0),
+                "description": weather.get("description"),
+                "icon": weather.get("icon"),
+                "feels_like": entry.get("feels_like"),
+                "pressure": entry.get("pressure"),
+                "humidity": entry.get("humidity"),
+                "uvi": entry.get("uvi"),
+                "clouds": entry.get("clouds"),
+                "visibility": entry.get("visibility"),
+                "wind_speed": entry.get("wind_speed"),
+                "wind_deg": entry.get("wind_deg"),
+                "pop": entry.get("pop", 0.0),
+            })
+        except (KeyError, TypeError, ValueError) as exc:
+            raise WeatherIngestError(f"Malformed hourly entry: {exc}") from exc
+    return rows
+
+
+def _same_value(old: Any, new: Any) -> bool:
+    # FLOAT columns are single precision on MySQL, so compare floats with a tolerance
+    if isinstance(old, float) or isinstance(new, float):
+        if old is None or new is None:
+            return old is new
+        return math.isclose(float(old), float(new), rel_tol=1e-6, abs_tol=1e-6)
+    return old == new
+
+
+def upsert_forecasts(rows: list[dict[str, Any]], fetched_at: Optional[datetime] = None) -> IngestResult:
+    """Write new or changed hours with a single multi-row upsert; returns per-row counts."""
+    fetched_at = fetched_at or datetime.utcnow()
+    result = IngestResult(fetched=True)
+    if not rows:
+        return result
+
+    times = [row["forecast_time"] for row in rows]
+    existing = {
+        wf.forecast_time: wf
+        for wf in db.session.execute(
+            db.select(WeatherForecast).where(WeatherForecast.forecast_time.in_(times))
+        ).scalars()
+    }
+
+    pending = []
+    for row in rows:
+        current = existing.get(row["forecast_time"])
+        if current is None:
+            result.inserted += 1
+        elif all(_same_value(getattr(current, c), row[c]) for c in VALUE_COLUMNS):
+            result.unchanged += 1
+            continue
+        else:
+            result.updated += 1
+        pending.append({**row, "fetched_at": fetched_at})
+
+    if pending:
+        try:
+            stmt = bulk_upsert_statement(
+                WeatherForecast.__table__, pending, ["forecast_time"], VALUE_COLUMNS + ("fetched_at",)
+            )
+        except ValueError as exc:
+            raise WeatherIngestError(str(exc), 500) from exc
+        db.session.execute(stmt)
+        db.session.commit()
+        # The ORM identity map still holds the pre-upsert rows
+        db.session.expire_all()
+    return result
+
+
+def invalidate_forecast_caches() -> None:
+    """
+    Drop in-process results derived from weather_forecast in this process.
+    Web workers running elsewhere notice the new max(fetched_at) on their next revalidation.
+    """
+    weather_payload_cache.invalidate()
+
+
+def ingest_weather(force: bool = False, session: Optional[requests.Session] = None) -> IngestResult:
+    """
+    Fetch and store the hourly forecast.
+
+    Unless ``force`` is set, the upstream call is skipped while the newest stored row is younger
+    than WEATHER_INGEST_MIN_AGE_SECONDS (another worker or the external scraper refreshed it).
+    """
+    if not force:
+        latest = get_latest_fetched_at()
+        min_age = timedelta(seconds=config.WEATHER_INGEST_MIN_AGE_SECONDS)
+        if latest is not None and datetime.utcnow() - latest < min_age:
+            return IngestResult(fetched=False)
+
+    rows = parse_hourly(fetch_onecall(session))
+    result = upsert_forecasts(rows)
+    if result.changed:
+        invalidate_forecast_caches()
+    logger.info(
+        "weather ingest: %d inserted, %d updated, %d unchanged",
+        result.inserted, result.updated, result.unchanged,
+    )
+    return result
+
+
+def run_scheduler(
+    interval: float,
+    force: bool = False,
+    stop_event: Optional[threading.Event] = None,
+    max_runs: Optional[int] = None,
+) -> int:
+    """
+    Run ingest_weather, then the retention pass, every ``interval`` seconds until stopped.
+    Errors are logged and retried on the next tick.
+    """
+    stop_event = stop_event or threading.Event()
+    runs = 0
+    while not stop_event.is_set():
+        try:
+            ingest_weather(force=force)
+        except WeatherIngestError as exc:
+            logger.warning("weather ingest failed: %s", exc.message)
+        except Exception:
+            db.session.rollback()
+            logger.exception("weather ingest crashed")
+        try:
+            prune_weather_forecasts()
+        except Exception:
+            db.session.rollback()
+            logger.exception("weather retention crashed")
+        runs += 1
+        if max_runs is not None and runs >= max_runs:
+            break
+        stop_event.wait(interval)
+    return runs
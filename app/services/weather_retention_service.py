@@ -0,0 +1,99 @@
+"""
+Retention for weather_forecast: past hours are archived into observed_weather and deleted in batches,
+so the hot table only holds the upcoming forecast window.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import config
+from app.extensions import db
+from app.models.weather import ObservedWeather, WeatherForecast
+from app.utils.db_upsert import bulk_upsert_statement
+
+logger = logging.getLogger(__name__)
+
+OBSERVED_COLUMNS = (
+    "temperature",
+    "feels_like",
+    "humidity",
+    "pressure",
+    "weather_code",
+    "clouds",
+    "wind_speed",
+    "pop",
+)
+
+
+@dataclass
+class PruneResult:
+    archived: int = 0
+    deleted: int = 0
+    batches: int = 0
+
+
+def _observed_row(forecast: WeatherForecast) -> dict:
+    row = {"observed_time": forecast.forecast_time}
+    row.update({c: getattr(forecast, c) for c in OBSERVED_COLUMNS})
+    return row
+
+
+def prune_weather_forecasts(
+    batch_size: Optional[int] = None,
+    before: Optional[datetime] = None,
+) -> PruneResult:
+    """
+    Archive and delete forecast rows older than ``before`` (default: the start of the current UTC hour,
+    which is the oldest row get_weather and get_station_predictions still read).
+
+    Each batch is one upsert into observed_weather plus one DELETE by id, committed on its own, so
+    locks stay short and an interrupted run simply resumes next time.
+    """
+    batch_size = batch_size or config.WEATHER_PRUNE_BATCH_SIZE
+    cutoff = before or datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    result = PruneResult()
+
+    while True:
+        batch = db.session.execute(
+            db.select(WeatherForecast)
+            .where(WeatherForecast.forecast_time < cutoff)
+            .order_by(WeatherForecast.forecast_time.asc())
+            .limit(batch_size)
+        ).scalars().all()
+        if not batch:
+            break
+
+        db.session.execute(
+            bulk_upsert_statement(
+                ObservedWeather.__table__,
+                [_observed_row(f) for f in batch],
+                ["observed_time"],
+                OBSERVED_COLUMNS,
+            )
+        )
+        ids = [f.id for f in batch]
+        deleted = db.session.execute(
+            db.delete(WeatherForecast).where(WeatherForecast.id.in_(ids))
+        ).rowcount
+        db.session.commit()
+        db.session.expunge_all()
+
+        result.archived += len(batch)
+        result.deleted += deleted
+        result.batches += 1
+        if len(batch) < batch_size:
+            break
+
+    if result.deleted:
+        logger.info("weather retention: archived %d past hours in %d batches", result.archived, result.batches)
+    return result
+
+
+def get_observed_weather(since: datetime, until: Optional[datetime] = None) -> list[ObservedWeather]:
+    """Archived hours in [since, until), oldest first."""
+    stmt = db.select(ObservedWeather).where(ObservedWeather.observed_time >= since)
+    if until is not None:
+        stmt = stmt.where(ObservedWeather.observed_time < until)
+    return db.session.execute(stmt.order_by(ObservedWeather.observed_time.asc())).scalars().all()
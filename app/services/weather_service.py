@@ -1,9 +1,19 @@
 """Weather forecast service, retrieves weather data from database."""
 
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Callable, Optional
 
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+
+import config
+from app.extensions import db
 from app.models.weather import WeatherForecast
+from app.utils.single_flight import read_flights
 
 
 class WeatherAPIError(Exception):
@@ -14,6 +24,7 @@ class WeatherAPIError(Exception):
         self.status_code = status_code
 
 
+@read_flights.wrap
 def get_weather() -> dict[str, Any]:
     """
     Retrieves Dublin weather forecast data from database.
@@ -82,3 +93,95 @@ def get_weather() -> dict[str, Any]:
     except Exception as e:
         error_msg = f"Failed to fetch weather data from database: {str(e)}"
         raise WeatherAPIError(error_msg, 500)
+
+
+def get_latest_fetched_at() -> Optional[datetime]:
+    """Most recent scrape time across all forecast rows (a single aggregate query)."""
+    return db.session.execute(db.select(func.max(WeatherForecast.fetched_at))).scalar()
+
+
+@dataclass(frozen=True)
+class WeatherPayload:
+    """Serialized /api/weather response body for one forecast hour and one scrape."""
+    body: bytes
+    etag: str
+    hour: datetime
+    fetched_at: Optional[datetime]
+
+
+class WeatherPayloadCache:
+    """
+    Holds the pre-serialized weather response for the current hour.
+
+    A payload stays valid until the hour rolls over or a newer scrape lands (a newer max(fetched_at)).
+    Within ``revalidate_seconds`` of the last check the payload is served without touching the DB;
+    after that a single aggregate query confirms it is still current. Ingestion code can call
+    invalidate() to drop it immediately.
+    """
+
+    def __init__(
+        self,
+        revalidate_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        utcnow: Callable[[], datetime] = datetime.utcnow,
+    ) -> None:
+        self.revalidate_seconds = revalidate_seconds
+        self._clock = clock
+        self._utcnow = utcnow
+        self._lock = threading.Lock()
+        self._payload: Optional[WeatherPayload] = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.revalidations = 0
+        self.builds = 0
+
+    def get(self, build_body: Callable[[], bytes]) -> WeatherPayload:
+        """
+        Return the cached payload, rebuilding it with ``build_body()`` when stale (errors are not cached).
+        Raises WeatherAPIError when the freshness check fails.
+        """
+        hour = self._utcnow().replace(minute=0, second=0, microsecond=0)
+        with self._lock:
+            payload = self._payload
+            if payload is not None and payload.hour == hour and self._clock() - self._checked_at < self.revalidate_seconds:
+                self.hits += 1
+                return payload
+
+        try:
+            latest = get_latest_fetched_at()
+        except SQLAlchemyError as exc:
+            raise WeatherAPIError(f"Failed to fetch weather data from database: {exc}", 500) from exc
+        with self._lock:
+            payload = self._payload
+            if payload is not None and payload.hour == hour and payload.fetched_at == latest:
+                self._checked_at = self._clock()
+                self.revalidations += 1
+                return payload
+
+        return read_flights.do(("weather_payload", hour, latest), self._build, hour, latest, build_body)
+
+    def _build(self, hour: datetime, latest: Optional[datetime], build_body: Callable[[], bytes]) -> WeatherPayload:
+        body = build_body()
+        payload = WeatherPayload(
+            body=body,
+            etag=hashlib.sha1(body).hexdigest(),
+            hour=hour,
+            fetched_at=latest,
+        )
+        with self._lock:
+            self._payload = payload
+            self._checked_at = self._clock()
+            self.builds += 1
+        return payload
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._payload = None
+            self._checked_at = 0.0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "revalidations": self.revalidations, "builds": self.builds}
+
+
+weather_payload_cache = WeatherPayloadCache(revalidate_seconds=config.WEATHER_CACHE_REVALIDATE_SECONDS)
@@ -0,0 +1,212 @@
+"""
+Admission control for expensive outbound calls (LLM requests).
+
+A per-process controller caps how many calls run at once and how many each user may have in flight.
+Requests over the global cap wait in a short, bounded FIFO queue; anything that cannot be admitted
+quickly is rejected with AdmissionRejected so the route can answer 429 instead of hanging until the
+gunicorn timeout. Optionally, a directory of lock files adds a cross-process cap shared by all
+workers on the host.
+"""
+
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Hashable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+
+class AdmissionRejected(Exception):
+    def __init__(
+        self,
+        message: str,
+        reason: str,
+        retry_after: int = 1,
+        queue_position: Optional[int] = None,
+    ) -> None:
+        super().__init__(message)
+        self.message = message
+        self.reason = reason
+        self.retry_after = retry_after
+        self.queue_position = queue_position
+
+
+class FileSlotPool:
+    """Cross-process counting semaphore built from ``slots`` flock()-ed files in ``directory``."""
+
+    def __init__(self, directory: str, slots: int, poll_interval: float = 0.05) -> None:
+        if fcntl is None:
+            raise RuntimeError("cross-process admission slots require fcntl (POSIX)")
+        os.makedirs(directory, exist_ok=True)
+        self._paths = [os.path.join(directory, f"slot-{i}.lock") for i in range(slots)]
+        self._poll_interval = poll_interval
+
+    def _try_acquire(self) -> Optional[int]:
+        for path in self._paths:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except OSError:
+                os.close(fd)
+        return None
+
+    def acquire(self, deadline: float) -> Optional[int]:
+        """Return a held file descriptor, or None if no slot freed up before ``deadline`` (monotonic)."""
+        while True:
+            fd = self._try_acquire()
+            if fd is not None or time.monotonic() >= deadline:
+                return fd
+            time.sleep(self._poll_interval)
+
+    @staticmethod
+    def release(fd: int) -> None:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+class AdmissionTicket:
+    """Proof of admission; release() is idempotent so it is safe in both finally blocks and generator close."""
+
+    def __init__(
+        self, controller: "AdmissionController", user_key: Hashable, slot_fd: Optional[int], generation: int
+    ) -> None:
+        self._controller = controller
+        self._user_key = user_key
+        self._slot_fd = slot_fd
+        self._generation = generation
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self._user_key, self._slot_fd, self._generation)
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int,
+        per_user_limit: int,
+        max_queue: int = 0,
+        queue_timeout: float = 0.0,
+        slot_pool: Optional[FileSlotPool] = None,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.per_user_limit = per_user_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slot_pool = slot_pool
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._per_user: dict[Hashable, int] = defaultdict(int)
+        self._queue: deque = deque()
+        self._rejected = 0
+        self._admitted = 0
+        self._generation = 0
+
+    def _retry_after(self) -> int:
+        return max(1, int(round(self.queue_timeout)) or 1)
+
+    def _reject(self, message: str, reason: str, queue_position: Optional[int] = None) -> AdmissionRejected:
+        self._rejected += 1
+        return AdmissionRejected(message, reason, self._retry_after(), queue_position)
+
+    def acquire(self, user_key: Hashable) -> AdmissionTicket:
+        """Admit one call for ``user_key`` or raise AdmissionRejected; waits at most ``queue_timeout`` seconds."""
+        deadline = time.monotonic() + self.queue_timeout
+        with self._cond:
+            if self._per_user.get(user_key, 0) >= self.per_user_limit:
+                raise self._reject("too many concurrent chat requests for this user", "user_limit")
+
+            if self._in_flight >= self.max_concurrent or self._queue:
+                if len(self._queue) >= self.max_queue:
+                    raise self._reject("server busy, please retry shortly", "queue_full", len(self._queue) + 1)
+                waiter = object()
+                self._queue.append(waiter)
+                # Reserve the user's slot while queued so one user cannot flood the queue
+                self._per_user[user_key] += 1
+                try:
+                    while self._queue[0] is not waiter or self._in_flight >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            position = self._queue.index(waiter) + 1
+                            raise self._reject("server busy, please retry shortly", "queue_timeout", position)
+                        self._cond.wait(remaining)
+                except AdmissionRejected:
+                    self._queue.remove(waiter)
+                    self._drop_user(user_key)
+                    self._cond.notify_all()
+                    raise
+                self._queue.popleft()
+            else:
+                self._per_user[user_key] += 1
+            self._in_flight += 1
+            self._admitted += 1
+            generation = self._generation
+            self._cond.notify_all()
+
+        slot_fd = None
+        if self._slot_pool is not None:
+            slot_fd = self._slot_pool.acquire(deadline)
+            if slot_fd is None:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._admitted -= 1
+                    self._drop_user(user_key)
+                    self._cond.notify_all()
+                    raise self._reject("server busy, please retry shortly", "global_limit")
+        return AdmissionTicket(self, user_key, slot_fd, generation)
+
+    @contextmanager
+    def admit(self, user_key: Hashable) -> Iterator[AdmissionTicket]:
+        ticket = self.acquire(user_key)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def _drop_user(self, user_key: Hashable) -> None:
+        self._per_user[user_key] -= 1
+        if self._per_user[user_key] <= 0:
+            del self._per_user[user_key]
+
+    def _release(self, user_key: Hashable, slot_fd: Optional[int], generation: int) -> None:
+        if slot_fd is not None:
+            FileSlotPool.release(slot_fd)
+        with self._cond:
+            if generation != self._generation:
+                return
+            self._in_flight -= 1
+            self._drop_user(user_key)
+            self._cond.notify_all()
+
+    def reset(self) -> None:
+        """Forget all in-flight bookkeeping (test isolation; tickets issued before the reset become no-ops)."""
+        with self._cond:
+            self._in_flight = 0
+            self._per_user.clear()
+            self._queue.clear()
+            self._admitted = 0
+            self._rejected = 0
+            self._generation += 1
+            self._cond.notify_all()
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "in_flight": self._in_flight,
+                "queued": len(self._queue),
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "max_concurrent": self.max_concurrent,
+                "per_user_limit": self.per_user_limit,
+            }
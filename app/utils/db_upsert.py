@@ -0,0 +1,33 @@
+"""Dialect-specific multi-row upsert (INSERT ... ON DUPLICATE KEY UPDATE / ON CONFLICT DO UPDATE)."""
+
+from typing import Any, Sequence
+
+from sqlalchemy import Table
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app.extensions import db
+
+
+def bulk_upsert_statement(
+    table: Table,
+    rows: list[dict[str, Any]],
+    key_columns: Sequence[str],
+    update_columns: Sequence[str],
+):
+    """
+    Build one INSERT for all ``rows`` that updates ``update_columns`` when a row with the same
+    ``key_columns`` (a primary key or unique index) already exists. Raises ValueError on a database
+    other than MySQL, PostgreSQL or SQLite.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(table).values(rows)
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_columns})
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(table).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={c: stmt.excluded[c] for c in update_columns},
+        )
+    raise ValueError(f"bulk upsert not supported for dialect {dialect!r}")
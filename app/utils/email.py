@@ -1,37 +1,90 @@
-"""Email sending utility using Flask-Mail to send verification codes, etc. Asynchronous sending does not block requests."""
+"""
+Email rendering and SMTP delivery. Messages are queued in the email_outbox table by the request
+path and delivered by the `flask email worker` process through SMTPSender.
+"""
 
 import os
-from concurrent.futures import ThreadPoolExecutor
-from typing import Optional
+import re
+import smtplib
+import ssl
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import Iterable, Optional
 
 import config
 
-# Background thread pool for asynchronous email sending, does not block requests
-_email_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="email-send")
-
-# HTML email template path
+# HTML email template, read and compiled once at import
 _TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
 _VERIFICATION_TEMPLATE = os.path.join(_TEMPLATE_DIR, "email_verification.html")
 
+VERIFICATION_SUBJECT = "[Dublin Bikes] Verify your email to start riding"
+
+
+class CompiledTemplate:
+    """
+    A template split once into static chunks and ``{field}`` slots; render() fills the slots and does a
+    single join. Only the declared field names are placeholders, so other braces (CSS) are left alone.
+    """
+
+    def __init__(self, text: str, fields: Iterable[str]) -> None:
+        fields = tuple(fields)
+        pattern = re.compile("{(" + "|".join(re.escape(name) for name in fields) + ")}")
+        # re.split with one group alternates static text and field names: [text, name, text, ..., text]
+        pieces = pattern.split(text)
+        self.fields = fields
+        self._parts = pieces
+        self._slots = [(i, pieces[i]) for i in range(1, len(pieces), 2)]
+
+    def render(self, **values: object) -> str:
+        parts = self._parts.copy()
+        for i, name in self._slots:
+            parts[i] = str(values[name])
+        return "".join(parts)
+
+
+def _load_template(path: str, fields: Iterable[str]) -> CompiledTemplate:
+    with open(path, "r", encoding="utf-8") as f:
+        return CompiledTemplate(f.read(), fields)
+
+
+_verification_html = _load_template(_VERIFICATION_TEMPLATE, ("code", "expires_minutes", "activation_link_section"))
+_activation_section_html = CompiledTemplate(
+    '<tr><td style="padding: 20px 40px 8px 40px; text-align: center;">'
+    '<p style="margin: 0 0 12px 0; font-size: 13px; color: #666666;">Or click the link below to verify your email:</p>'
+    '<a href="{activation_link}" style="display: inline-block; padding: 14px 28px; background: linear-gradient(135deg, #1DB954 0%, #0A8F3F 100%); color: #ffffff; font-size: 15px; font-weight: 600; text-decoration: none; border-radius: 10px;">Verify my email</a>'
+    "</td></tr>",
+    ("activation_link",),
+)
+
 
 def _render_verification_html(
     code: str, expires_minutes: int, activation_link: str = ""
 ) -> str:
-    """Read HTML template and fill in verification code, expiration time, and activation link."""
-    with open(_VERIFICATION_TEMPLATE, "r", encoding="utf-8") as f:
-        html = f.read()
-    html = html.replace("{code}", code).replace("{expires_minutes}", str(expires_minutes))
+    """Fill in verification code, expiration time, and activation link (no file I/O)."""
+    activation_section = _activation_section_html.render(activation_link=activation_link) if activation_link else ""
+    return _verification_html.render(
+        code=code, expires_minutes=expires_minutes, activation_link_section=activation_section
+    )
+
+
+def _render_verification_text(code: str, expires_minutes: int, activation_link: str = "") -> str:
+    """Plain-text fallback of the verification email."""
+    body = (
+        f"Hi there! Thanks for signing up for Dublin Bikes.\n\n"
+        f"Your verification code is: {code}\n\n"
+        f"This code will expire in {expires_minutes} minutes.\n\n"
+    )
     if activation_link:
-        activation_section = (
-            '<tr><td style="padding: 20px 40px 8px 40px; text-align: center;">'
-            '<p style="margin: 0 0 12px 0; font-size: 13px; color: #666666;">Or click the link below to verify your email:</p>'
-            f'<a href="{activation_link}" style="display: inline-block; padding: 14px 28px; background: linear-gradient(135deg, #1DB954 0%, #0A8F3F 100%); color: #ffffff; font-size: 15px; font-weight: 600; text-decoration: none; border-radius: 10px;">Verify my email</a>'
-            "</td></tr>"
-        )
-    else:
-        activation_section = ""
-    html = html.replace("{activation_link_section}", activation_section)
-    return html
+        body += f"Or click this link to verify your email: {activation_link}\n\n"
+    body += "If you didn't sign up for an account, please ignore this message."
+    return body
+
+
+def activation_link_for(activation_token: Optional[str]) -> str:
+    """Frontend "click to activate" URL for the token, or "" without a token."""
+    if not activation_token:
+        return ""
+    return f"{config.FRONTEND_BASE_URL}/activate/{activation_token}"
 
 
 def _mail_configured() -> bool:
@@ -44,65 +97,117 @@ def _mail_configured() -> bool:
     )
 
 
-def _send_verification_code_with_flask_mail(
-    app, to_email: str, code: str, expires_minutes: int, activation_token: Optional[str] = None
-) -> None:
-    """
-    Send verification code email using Flask-Mail in application context (HTML + plain-text dual format).
-    If activation_token is provided, the email will include a 'click to activate' link.
-    """
-    if not _mail_configured():
-        return
-    with app.app_context():
-        from flask_mail import Message
-
-        mail = app.extensions["mail"]
-        subject = "[Dublin Bikes] Verify your email to start riding"
-
-        activation_link = ""
-        if activation_token:
-            activation_link = f"{config.FRONTEND_BASE_URL}/activate/{activation_token}"
-
-        # Plain-text fallback
-        body = (
-            f"Hi there! Thanks for signing up for Dublin Bikes.\n\n"
-            f"Your verification code is: {code}\n\n"
-            f"This code will expire in {expires_minutes} minutes.\n\n"
-        )
-        if activation_link:
-            body += f"Or click this link to verify your email: {activation_link}\n\n"
-        body += "If you didn't sign up for an account, please ignore this message."
-
-        html_body = _render_verification_html(code, expires_minutes, activation_link)
-
-        msg = Message(subject=subject, recipients=[to_email], body=body, html=html_body)
-        try:
-            mail.send(msg)
-            print(f"[Email Verification] Flask-Mail sent successfully to={to_email}")
-        except Exception as e:
-            print(f"[Email Verification] Flask-Mail failed to send to={to_email} error={e!r}")
+def _default_sender() -> str:
+    if config.MAIL_DEFAULT_FROM_NAME:
+        return formataddr((config.MAIL_DEFAULT_FROM_NAME, config.MAIL_FROM))
+    return config.MAIL_FROM
 
 
-def send_verification_code_email_async(
+def build_verification_message(
     to_email: str,
     code: str,
     expires_minutes: int,
-    activation_token: Optional[str] = None,
-) -> None:
+    activation_link: str = "",
+    sender: Optional[str] = None,
+) -> EmailMessage:
+    """Verification code email (plain text + HTML alternative)."""
+    msg = EmailMessage()
+    msg["Subject"] = VERIFICATION_SUBJECT
+    msg["From"] = sender or _default_sender()
+    msg["To"] = to_email
+    msg.set_content(_render_verification_text(code, expires_minutes, activation_link))
+    msg.add_alternative(_render_verification_html(code, expires_minutes, activation_link), subtype="html")
+    return msg
+
+
+class SMTPSender:
     """
-    Asynchronously send verification code email: returns immediately after submitting to thread pool, does not block current request.
-    If activation_token is provided, the email will include activation link /activate/:token.
+    One SMTP connection reused for every message until close(). The connection is opened on the first
+    send; a connection the server dropped while idle is re-opened once and the message retried.
     """
-    if not _mail_configured():
-        return
-    from flask import current_app
-
-    app = current_app._get_current_object()
-    _email_executor.submit(
-        _send_verification_code_with_flask_mail,
-        app,
-        to_email,
-        code,
-        expires_minutes,
-        activation_token,
-    )
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str = "",
+        password: str = "",
+        use_tls: bool = False,
+        use_ssl: bool = False,
+        timeout: float = 30.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self._smtp: Optional[smtplib.SMTP] = None
+        self.connections = 0
+
+    @classmethod
+    def from_config(cls) -> "SMTPSender":
+        return cls(
+            config.MAIL_SERVER,
+            config.MAIL_PORT,
+            config.MAIL_USERNAME,
+            config.MAIL_PASSWORD,
+            use_tls=config.MAIL_USE_TLS and not config.MAIL_USE_SSL,
+            use_ssl=config.MAIL_USE_SSL,
+        )
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.use_tls:
+                smtp.starttls(context=ssl.create_default_context())
+        if self.username:
+            try:
+                smtp.login(self.username, self.password)
+            except (smtplib.SMTPException, OSError):
+                smtp.close()
+                raise
+        self.connections += 1
+        return smtp
+
+    def send(self, message: EmailMessage) -> None:
+        """Send one message; raises smtplib.SMTPException / OSError if it could not be delivered."""
+        reused = self._smtp is not None
+        if self._smtp is None:
+            self._smtp = self._connect()
+        try:
+            self._smtp.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            self._smtp = None
+            if not reused:
+                raise
+            self._smtp = self._connect()
+            self._smtp.send_message(message)
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+            # The session is still usable; reset it for the next message
+            try:
+                self._smtp.rset()
+            except (smtplib.SMTPException, OSError):
+                self.close()
+            raise
+        except (smtplib.SMTPException, OSError):
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._smtp is None:
+            return
+        smtp, self._smtp = self._smtp, None
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    def __enter__(self) -> "SMTPSender":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
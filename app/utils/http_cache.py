@@ -0,0 +1,158 @@
+"""
+HTTP validators and response compression for the read endpoints.
+
+Routes that know the version of the data they serve call ``conditional_response`` with a strong ETag
+derived from that version: a matching If-None-Match (or If-Modified-Since) is answered 304 before the
+body is built. The ``compress_response`` after_request hook gzips JSON bodies above
+HTTP_COMPRESS_MIN_BYTES (brotli when the package is installed and the client accepts ``br``). A body
+with an ETag is compressed once per encoding and the bytes reused until its ETag changes; the
+compressed variant gets its own strong ETag (``"<etag>-gzip"``), which conditional_response accepts too.
+"""
+
+import gzip
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+
+from flask import Response, request
+
+import config
+from app.utils.ttl_cache import TTLCache
+
+try:
+    import brotli
+except ImportError:  # optional dependency; gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset({"application/json", "text/html", "text/plain", "text/css", "application/javascript"})
+
+
+def _gzip(body: bytes) -> bytes:
+    # mtime=0 keeps the output (and so the variant ETag) identical across workers
+    return gzip.compress(body, compresslevel=config.HTTP_COMPRESS_LEVEL, mtime=0)
+
+
+def _brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=config.HTTP_BROTLI_QUALITY)
+
+
+# Preferred first
+ENCODERS: dict[str, Callable[[bytes], bytes]] = {"gzip": _gzip}
+if brotli is not None:
+    ENCODERS = {"br": _brotli, **ENCODERS}
+
+# (path, etag, encoding) -> compressed body
+compressed_variants = TTLCache(maxsize=config.HTTP_COMPRESS_CACHE_ENTRIES, ttl=3600.0)
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    return f"{etag}-{encoding}"
+
+
+def cache_control(max_age: int, public: bool = True) -> str:
+    """``public, max-age=N`` (or ``no-cache`` for 0: always revalidate with the ETag)."""
+    if max_age <= 0:
+        return "no-cache"
+    return f"{'public' if public else 'private'}, max-age={max_age}"
+
+
+def _http_date(value: datetime) -> datetime:
+    # Naive DB timestamps are UTC; HTTP dates have second precision
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def _matching_etag(etag: str) -> Optional[str]:
+    """The tag in If-None-Match naming ``etag`` or one of its compressed variants, if any."""
+    for tag in (etag, *(variant_etag(etag, enc) for enc in ENCODERS)):
+        if request.if_none_match.contains_weak(tag):
+            return tag
+    return None
+
+
+def is_not_modified(etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """True if the request's validators say the client already has this version."""
+    if request.if_none_match:
+        return _matching_etag(etag) is not None
+    if last_modified is not None and request.if_modified_since is not None:
+        return _http_date(last_modified) <= request.if_modified_since
+    return False
+
+
+def set_validators(
+    resp: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    max_age: int = 0,
+    vary: Iterable[str] = (),
+) -> Response:
+    resp.set_etag(etag)
+    if last_modified is not None:
+        resp.last_modified = _http_date(last_modified)
+    resp.headers["Cache-Control"] = cache_control(max_age)
+    for header in vary:
+        resp.vary.add(header)
+    return resp
+
+
+def conditional_response(
+    etag: str,
+    build: Callable[[], Response],
+    last_modified: Optional[datetime] = None,
+    max_age: int = 0,
+    vary: Iterable[str] = (),
+) -> Response:
+    """
+    A 304 carrying the validators if the client already has this version (``build`` is not called),
+    otherwise ``build()`` with ETag / Last-Modified / Cache-Control / Vary set.
+    """
+    vary = (*vary, "Accept-Encoding")
+    if is_not_modified(etag, last_modified):
+        # Echo the tag the client holds so a compressed variant stays valid in its cache
+        matched = _matching_etag(etag) if request.if_none_match else None
+        return set_validators(Response(status=304), matched or etag, last_modified, max_age, vary)
+    return set_validators(build(), etag, last_modified, max_age, vary)
+
+
+def negotiate_encoding() -> Optional[str]:
+    """The best content coding the client accepts among ENCODERS, or None for identity."""
+    accepted = request.accept_encodings
+    best = max(ENCODERS, key=lambda enc: accepted[enc], default=None)
+    if best is None or accepted[best] <= 0:
+        return None
+    return best
+
+
+def compress_response(resp: Response) -> Response:
+    """after_request hook: compress large compressible bodies, reusing cached bytes for ETagged ones."""
+    if (
+        resp.status_code != 200
+        or resp.direct_passthrough
+        or resp.is_streamed
+        or "Content-Encoding" in resp.headers
+        or resp.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return resp
+    resp.vary.add("Accept-Encoding")
+    if resp.content_length is not None and resp.content_length < config.HTTP_COMPRESS_MIN_BYTES:
+        return resp
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return resp
+    body = resp.get_data()
+    if len(body) < config.HTTP_COMPRESS_MIN_BYTES:
+        return resp
+
+    etag, weak = resp.get_etag()
+    if etag is None:
+        compressed = ENCODERS[encoding](body)
+    else:
+        key = (request.path, etag, encoding)
+        compressed = compressed_variants.get(key)
+        if compressed is None:
+            compressed = ENCODERS[encoding](body)
+            compressed_variants.set(key, compressed)
+        resp.set_etag(variant_etag(etag, encoding), weak=weak)
+    resp.set_data(compressed)
+    resp.headers["Content-Encoding"] = encoding
+    return resp
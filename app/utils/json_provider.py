@@ -0,0 +1,45 @@
+"""
+orjson-backed Flask JSON provider, used for jsonify / request.get_json when orjson is installed.
+
+Output matches DefaultJSONProvider: keys sorted, and datetimes go through the same default hook (HTTP date
+strings) rather than orjson's ISO format. Non-ASCII text is written as UTF-8 instead of \\u escapes, and
+NaN / Infinity become null (the stdlib writes invalid JSON for them).
+"""
+
+from typing import Any
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency; create_app keeps the default provider
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    def _options(self) -> int:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=self.default, option=self._options())
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        # json.dumps-specific arguments (indent, separators, cls, ...) keep the stdlib behaviour
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
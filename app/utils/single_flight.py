@@ -0,0 +1,95 @@
+"""
+Single-flight request coalescing for identical concurrent reads.
+
+When several threads of a worker ask for the same key at the same time, only the first (the leader)
+runs the computation; the others block until it finishes and receive the same result, or the same
+exception. Nothing is kept once the call completes, so this is not a cache: a call that starts after
+the leader has finished runs the computation again. Results are shared objects and must be treated
+as read-only by callers.
+"""
+
+import functools
+import threading
+from typing import Any, Callable, Hashable
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "leader", "waiters")
+
+    def __init__(self, leader: int) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.leader = leader
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Per-process group of in-flight calls keyed by an arbitrary hashable key."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run ``fn(*args, **kwargs)`` unless an identical call is already in flight, then share its outcome."""
+        me = threading.get_ident()
+        with self._lock:
+            call = self._calls.get(key)
+            # A leader re-entering its own key (e.g. a service calling itself) must not wait on itself
+            if call is not None and call.leader != me:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call(me)
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def wrap(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Decorator form: calls of the same function with equal (hashable) arguments are coalesced."""
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            # The module keeps same-named functions of different services apart
+            key = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+            return self.do(key, func, *args, **kwargs)
+
+        return wrapper
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+            }
+
+
+# Shared by the station, weather and prediction services (one group per worker process)
+read_flights = SingleFlight()
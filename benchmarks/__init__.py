@@ -0,0 +1,5 @@
+"""
+Standalone micro-benchmarks; run from the project root, e.g. ``python -m benchmarks.bench_password_hashing``.
+
+They import the app's modules, so the required variables from .env must be set.
+"""
@@ -0,0 +1,42 @@
+"""
+Verification email HTML rendering: renders/s of the precompiled split/join template vs the previous
+approach (read email_verification.html from disk, then chained str.replace over the document).
+
+    python -m benchmarks.bench_email_render [--renders 50000]
+"""
+
+import argparse
+import time
+
+from app.utils.email import _VERIFICATION_TEMPLATE, _render_verification_html
+
+LINK = "https://bikes.example.com/activate/0123456789abcdef0123456789abcdef"
+
+
+def _read_and_replace(code: str, expires_minutes: int, activation_link: str) -> str:
+    with open(_VERIFICATION_TEMPLATE, "r", encoding="utf-8") as f:
+        html = f.read()
+    html = html.replace("{code}", code).replace("{expires_minutes}", str(expires_minutes))
+    return html.replace("{activation_link_section}", f'<a href="{activation_link}">Verify my email</a>')
+
+
+def _measure(render, renders: int) -> float:
+    start = time.perf_counter()
+    for i in range(renders):
+        render(f"{i % 1000000:06d}", 5, LINK)
+    return renders / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--renders", type=int, default=50000)
+    args = parser.parse_args()
+
+    baseline = _measure(_read_and_replace, args.renders)
+    compiled = _measure(_render_verification_html, args.renders)
+    print(f"read + str.replace : {baseline:10.0f} renders/s")
+    print(f"precompiled        : {compiled:10.0f} renders/s ({compiled / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
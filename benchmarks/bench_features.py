@@ -0,0 +1,87 @@
+"""
+Model feature construction, for a prediction request (one station over the forecast hours) and for a
+training chunk.
+
+    python -m benchmarks.bench_features [--hours 48] [--chunk 20000] [--repeat 50]
+
+Compares:
+  loop    one dict per row + pd.DataFrame(rows)[features] (what get_station_predictions did)
+  vector  app.ml.features.build_features: datetime64 calendar columns into one float32 matrix
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.ml.features import FEATURES, build_features
+
+
+def _inputs(rows: int, stations: int) -> tuple[list, ...]:
+    rng = random.Random(0)
+    start = datetime(2026, 10, 19)
+    return (
+        [rng.randint(1, stations) for _ in range(rows)],
+        [rng.randint(10, 40) for _ in range(rows)],
+        [53.3 + rng.random() / 10 for _ in range(rows)],
+        [-6.3 + rng.random() / 10 for _ in range(rows)],
+        [start + timedelta(hours=i % 48, minutes=rng.randint(0, 59)) for i in range(rows)],
+        [rng.uniform(0, 20) for _ in range(rows)],
+        [rng.randint(50, 100) for _ in range(rows)],
+        [rng.randint(990, 1030) for _ in range(rows)],
+    )
+
+
+def _loop(numbers, capacities, lats, lons, times, temperatures, humidities, pressures) -> np.ndarray:
+    rows = []
+    for number, capacity, lat, lon, dt, temperature, humidity, pressure in zip(
+        numbers, capacities, lats, lons, times, temperatures, humidities, pressures
+    ):
+        day_of_week = dt.weekday()
+        rows.append(
+            {
+                "station_id": number,
+                "capacity": capacity,
+                "lat": lat,
+                "lon": lon,
+                "hour": dt.hour,
+                "day": dt.day,
+                "day_of_week": day_of_week,
+                "is_weekend": 1 if day_of_week >= 5 else 0,
+                "avg_temperature": temperature,
+                "avg_humidity": humidity,
+                "avg_pressure": pressure,
+            }
+        )
+    return pd.DataFrame(rows)[list(FEATURES)].to_numpy()
+
+
+def _measure(build, inputs, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        build(*inputs)
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hours", type=int, default=48)
+    parser.add_argument("--chunk", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for label, inputs in (("request", _inputs(args.hours, 1)), ("chunk", _inputs(args.chunk, 120))):
+        rows = len(inputs[0])
+        np.testing.assert_array_equal(_loop(*inputs).astype(np.float32), build_features(*inputs))
+        baseline = None
+        for name, build in (("loop", _loop), ("vector", build_features)):
+            seconds = _measure(build, inputs, args.repeat)
+            baseline = baseline or seconds
+            print(f"{label:8s} {name:7s} {seconds * 1e6:10.0f} us  {rows / seconds:12,.0f} rows/s  {baseline / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
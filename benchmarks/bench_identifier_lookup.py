@@ -0,0 +1,88 @@
+"""
+Login identifier lookup: the old ``username = :id OR email = lower(:id)`` query vs identifier_filter,
+which resolves the identifier to a single unique index.
+
+    python -m benchmarks.bench_identifier_lookup [--users 1000000] [--lookups 20000] [--url sqlite://]
+
+Builds the user table with synthetic users in the given database (default: in-memory SQLite; pass a
+scratch MySQL URL to see the index-merge plan the OR query gets there), prints both query plans and
+the lookups/s of each form over a mix of username and email identifiers.
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy import create_engine, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.models import User
+from app.services.user_service import identifier_filter
+
+_BATCH = 50000
+
+
+def _or_filter(identifier: str):
+    return or_(User.username == identifier, User.email == identifier.lower())
+
+
+def _populate(engine, users: int) -> None:
+    User.__table__.drop(engine, checkfirst=True)
+    User.__table__.create(engine)
+    with engine.begin() as conn:
+        for start in range(0, users, _BATCH):
+            conn.execute(
+                User.__table__.insert(),
+                [
+                    {
+                        "username": f"user{i:07d}",
+                        "email": f"user{i:07d}@example.com",
+                        "password_hash": "x",
+                        "is_active": True,
+                        "token_version": 0,
+                    }
+                    for i in range(start, min(start + _BATCH, users))
+                ],
+            )
+
+
+def _explain(session: Session, stmt) -> str:
+    compiled = stmt.compile(session.bind, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN " if session.bind.dialect.name == "sqlite" else "EXPLAIN "
+    return "\n    ".join(str(tuple(row)) for row in session.execute(text(prefix + str(compiled))))
+
+
+def _measure(session: Session, make_filter, identifiers: list[str]) -> float:
+    start = time.perf_counter()
+    for identifier in identifiers:
+        session.execute(select(User.id).where(make_filter(identifier))).scalar()
+    return len(identifiers) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--url", default="sqlite://")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    start = time.perf_counter()
+    _populate(engine, args.users)
+    print(f"{args.users} users inserted in {time.perf_counter() - start:.1f}s ({engine.dialect.name})")
+
+    rng = random.Random(0)
+    identifiers = [
+        f"user{rng.randrange(args.users):07d}" + ("@Example.com" if i % 2 else "")
+        for i in range(args.lookups)
+    ]
+    with Session(engine) as session:
+        for label, make_filter in (("OR query", _or_filter), ("resolved", identifier_filter)):
+            print(f"{label} plan (email identifier):\n    {_explain(session, select(User.id).where(make_filter('a@b.c')))}")
+        for label, make_filter in (("OR query", _or_filter), ("resolved", identifier_filter)):
+            rate = _measure(session, make_filter, identifiers)
+            print(f"{label:9s}: {rate:9.0f} lookups/s")
+
+
+if __name__ == "__main__":
+    main()
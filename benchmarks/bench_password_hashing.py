@@ -0,0 +1,47 @@
+"""
+Password hashing throughput: hashes/s on one core (inline) and across a process pool.
+
+    python -m benchmarks.bench_password_hashing [--method scrypt] [--workers N] [--count 64]
+
+Use it to pick PASSWORD_HASH_METHOD (cost) and PASSWORD_HASH_WORKERS for the deployment's CPUs:
+a login costs one verify, so hashes/s per core bounds logins/s per core.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.password_service import PasswordHasher
+
+
+def _measure(hasher: PasswordHasher, count: int, concurrency: int) -> float:
+    password_hash = hasher.hash("benchmark-password")  # also warms up the pool
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as threads:
+        list(threads.map(lambda _: hasher.verify(password_hash, "benchmark-password"), range(count)))
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--method", default=os.environ.get("PASSWORD_HASH_METHOD", "scrypt"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--count", type=int, default=64)
+    args = parser.parse_args()
+
+    inline = PasswordHasher(args.method, workers=0)
+    print(f"method={inline.method} cpus={os.cpu_count()}")
+    rate = _measure(inline, args.count, concurrency=4)
+    print(f"inline (4 request threads)   : {rate:8.1f} hashes/s")
+
+    pooled = PasswordHasher(args.method, workers=args.workers)
+    try:
+        rate = _measure(pooled, args.count, concurrency=args.workers * 2)
+    finally:
+        pooled.shutdown()
+    print(f"pool ({args.workers} processes):      {rate:8.1f} hashes/s, {rate / args.workers:8.1f} per core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Model inference for concurrent prediction requests, per call vs micro-batched.
+
+    python -m benchmarks.bench_prediction_batching [--threads 8] [--requests 400] [--wait-ms 2] [--legacy]
+
+Each request predicts one station over the 48 forecast hours with a decision tree trained on random
+features (the shape `flask model train` produces; --legacy fits on a DataFrame like the notebook, so
+every call also pays pandas' column-name check). Compares:
+  direct   every request calls model.predict on its own 48-row matrix (MODEL_BATCHING_ENABLED=false)
+  queued   requests queued while the previous predict ran share the next call (MODEL_BATCH_WAIT_MS=0)
+  window   the batch also waits up to --wait-ms for more requests
+"""
+
+import argparse
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.tree import DecisionTreeRegressor
+
+from app.ml.batching import PredictionBatcher
+from app.ml.features import FEATURE_DTYPE, FEATURES
+from app.ml.registry import LoadedModel
+
+
+def _loaded(legacy: bool, rows: int = 20000) -> LoadedModel:
+    rng = np.random.default_rng(0)
+    X = rng.random((rows, len(FEATURES))).astype(FEATURE_DTYPE)
+    if legacy:
+        X = pd.DataFrame(X, columns=list(FEATURES))
+    model = DecisionTreeRegressor(max_depth=20, random_state=0).fit(X, rng.integers(0, 40, rows))
+    return LoadedModel(model, list(FEATURES), "bench", {}, datetime.utcnow())
+
+
+def _run(batcher: PredictionBatcher, loaded: LoadedModel, threads: int, requests: int) -> tuple[float, list[float]]:
+    matrix = np.random.default_rng(1).random((48, len(FEATURES))).astype(FEATURE_DTYPE)
+    latencies: list[float] = []
+    per_thread = requests // threads
+
+    def client() -> None:
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            batcher.predict(loaded, matrix)
+            latencies.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=client) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--wait-ms", type=float, default=2.0)
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+
+    loaded = _loaded(args.legacy)
+    for name, enabled, wait_ms in (("direct", False, 0.0), ("queued", True, 0.0), ("window", True, args.wait_ms)):
+        batcher = PredictionBatcher(enabled=enabled, wait_ms=wait_ms, max_rows=4096)
+        try:
+            elapsed, latencies = _run(batcher, loaded, args.threads, args.requests)
+        finally:
+            batcher.stop()
+        stats = batcher.stats()
+        p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+        print(
+            f"{name:8s} {len(latencies) / elapsed:8.0f} requests/s  p50 {p50:6.2f} ms  p99 {p99:6.2f} ms"
+            + (f"  mean batch {stats['mean_batch_size']:.1f} requests" if stats["batches"] else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
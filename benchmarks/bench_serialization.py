@@ -0,0 +1,113 @@
+"""
+Station / availability response serialization, from ORM rows to response bytes.
+
+    python -m benchmarks.bench_serialization [--stations 500] [--repeat 200]
+
+Compares, per request:
+  legacy   rows -> dicts -> model_validate().model_dump() per item -> jsonify (stdlib json, sorted keys)
+  orjson   the same, with the orjson Flask JSON provider doing the final dump
+  adapter  rows -> dicts -> one TypeAdapter validate + dump_json pass (what the routes do now)
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.api.serialization import EnvelopeSerializer
+from app.contracts import AvailabilityVO, StationVO
+from app.models import Availability, Station
+from app.services.station_service import _availability_to_dict, _station_to_dict
+from app.utils.json_provider import OrjsonProvider, orjson
+
+
+def _rows(count: int) -> tuple[list[Station], list[Availability]]:
+    now = datetime(2026, 10, 19, 12, 0, 0)
+    stations = [
+        Station(
+            number=i,
+            contract_name="dublin",
+            name=f"STATION {i}",
+            address=f"{i} Example Street",
+            latitude=53.33 + i * 1e-4,
+            longitude=-6.26 - i * 1e-4,
+            banking=bool(i % 2),
+            bonus=False,
+            bike_stands=20 + i % 20,
+        )
+        for i in range(count)
+    ]
+    availability = [
+        Availability(
+            number=i,
+            available_bikes=i % 20,
+            available_bike_stands=20 - i % 20,
+            status="OPEN",
+            last_update=1760875200000 + i,
+            timestamp=now,
+            requested_at=now,
+        )
+        for i in range(count)
+    ]
+    return stations, availability
+
+
+def _legacy(provider, model, to_dict):
+    def serialize(rows) -> bytes:
+        data = [model.model_validate(to_dict(row)).model_dump() for row in rows]
+        return provider.dumps({"code": 0, "msg": "ok", "data": data}, separators=(",", ":")).encode() + b"\n"
+
+    return serialize
+
+
+def _orjson(provider, model, to_dict):
+    def serialize(rows) -> bytes:
+        data = [model.model_validate(to_dict(row)).model_dump() for row in rows]
+        return provider.dumps_bytes({"code": 0, "msg": "ok", "data": data}) + b"\n"
+
+    return serialize
+
+
+def _adapter(model, to_dict):
+    serializer = EnvelopeSerializer(list[model])
+
+    def serialize(rows) -> bytes:
+        return serializer.dumps([to_dict(row) for row in rows])
+
+    return serialize
+
+
+def _measure(serialize, rows, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        serialize(rows)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stations", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    flask_app = Flask(__name__)
+    default = DefaultJSONProvider(flask_app)
+    stations, availability = _rows(args.stations)
+    for label, model, to_dict, rows in (
+        ("stations", StationVO, _station_to_dict, stations),
+        ("status", AvailabilityVO, _availability_to_dict, availability),
+    ):
+        paths = {"legacy": _legacy(default, model, to_dict), "adapter": _adapter(model, to_dict)}
+        if orjson is not None:
+            paths["orjson"] = _orjson(OrjsonProvider(flask_app), model, to_dict)
+        baseline = None
+        for name, serialize in paths.items():
+            micros = _measure(serialize, rows, args.repeat)
+            baseline = baseline or micros
+            print(f"{label:8s} {name:8s} {micros:9.0f} us/request  {baseline / micros:5.1f}x  ({len(serialize(rows))} bytes)")
+
+
+if __name__ == "__main__":
+    main()
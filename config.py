@@ -18,8 +18,14 @@ SQLALCHEMY_TRACK_MODIFICATIONS = False
 SECRET_KEY = os.environ.get("SECRET_KEY")
 
 # JWT configuration (read from .env, used for access/refresh tokens)
+# Access-token signing algorithm: HS256 (shared secret, default), or EdDSA / RS256 with a PEM private key so other
+# services can verify access tokens locally via /.well-known/jwks.json. Refresh tokens always use HS256.
+JWT_ALGORITHM = os.environ.get("JWT_ALGORITHM", "HS256").strip()
+JWT_PRIVATE_KEY_PATH = os.environ.get("JWT_PRIVATE_KEY_PATH", "")
+JWT_KEY_ID = os.environ.get("JWT_KEY_ID", "")  # Optional "kid"; derived from the public key when empty
+
 JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY")
-if not JWT_SECRET_KEY:
+if not JWT_SECRET_KEY and JWT_ALGORITHM == "HS256":
     raise ValueError("JWT_SECRET_KEY environment variable is not set, please configure in .env file")
 
 JWT_REFRESH_SECRET_KEY = os.environ.get("JWT_REFRESH_SECRET_KEY")
@@ -30,11 +36,24 @@ if not JWT_REFRESH_SECRET_KEY:
 JWT_ACCESS_EXPIRES_SECONDS = int(os.environ.get("JWT_ACCESS_EXPIRES_SECONDS", "900"))   # Default 15 minutes
 JWT_REFRESH_EXPIRES_SECONDS = int(os.environ.get("JWT_REFRESH_EXPIRES_SECONDS", "604800"))  # Default 7 days
 
+# Access-token verification cache (per worker): seconds a user's (token_version, is_active) is trusted without a DB
+# lookup (0 disables). Logout is propagated to other workers through AUTH_REVOCATION_CHANNEL: "db" (token_revocation
+# table, polled every AUTH_REVOCATION_POLL_SECONDS), "local" (single-process stand-in) or "none" (TTL only)
+AUTH_TOKEN_CACHE_TTL_SECONDS = float(os.environ.get("AUTH_TOKEN_CACHE_TTL_SECONDS", "30"))
+AUTH_TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get("AUTH_TOKEN_CACHE_MAX_ENTRIES", "10000"))
+AUTH_REVOCATION_CHANNEL = os.environ.get("AUTH_REVOCATION_CHANNEL", "db").strip().lower()
+AUTH_REVOCATION_POLL_SECONDS = float(os.environ.get("AUTH_REVOCATION_POLL_SECONDS", "2"))
+
+# Password hashing: werkzeug "scrypt[:N:r:p]" / "pbkdf2[:sha256:iterations]", or "argon2[:t:m:p]" (needs argon2-cffi).
+# Hashing runs in a process pool of PASSWORD_HASH_WORKERS processes per worker (0 = inline on the request thread).
+PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+
 # Email verification code: expiration (seconds, e.g. 5 minutes); resend cooldown (seconds, e.g. can only request once within 1 minute)
 VERIFICATION_CODE_EXPIRE_SECONDS = int(os.environ.get("VERIFICATION_CODE_EXPIRE_SECONDS", "300"))   # Default 5 minutes
 VERIFICATION_CODE_RESEND_COOLDOWN_SECONDS = int(os.environ.get("VERIFICATION_CODE_RESEND_COOLDOWN_SECONDS", "60"))  # Default 1 minute
 
-# Flask-Mail / SMTP sender configuration (used for sending verification code emails); when not configured, only outputs to console
+# SMTP sender configuration (used by the email outbox worker to send verification code emails); when not configured, only outputs to console
 MAIL_SERVER = os.environ.get("MAIL_SERVER", "")
 MAIL_PORT = int(os.environ.get("MAIL_PORT", "587"))
 MAIL_USERNAME = os.environ.get("MAIL_USERNAME", "")
@@ -43,10 +62,13 @@ MAIL_USE_TLS = os.environ.get("MAIL_USE_TLS", "true").lower() in ("1", "true", "
 MAIL_USE_SSL = os.environ.get("MAIL_USE_SSL", "").lower() in ("1", "true", "yes") or (MAIL_PORT == 465)
 MAIL_FROM = os.environ.get("MAIL_FROM", "")  # Sender address, e.g. noreply@example.com
 MAIL_DEFAULT_FROM_NAME = os.environ.get("MAIL_DEFAULT_FROM_NAME", "Dublin Bikes")  # Sender display name (optional)
-# Flask-Mail MAIL_DEFAULT_SENDER: tuple (display name, email) or email only
-MAIL_DEFAULT_SENDER = (
-    (MAIL_DEFAULT_FROM_NAME, MAIL_FROM) if MAIL_FROM else None
-)
+# Email outbox worker (flask email worker): messages per batch / transaction, idle poll interval,
+# attempts before a message is marked failed, and the first retry delay (doubles per attempt, capped)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get("EMAIL_OUTBOX_BATCH_SIZE", "50"))
+EMAIL_OUTBOX_POLL_SECONDS = float(os.environ.get("EMAIL_OUTBOX_POLL_SECONDS", "5"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get("EMAIL_OUTBOX_MAX_ATTEMPTS", "6"))
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = float(os.environ.get("EMAIL_OUTBOX_RETRY_BASE_SECONDS", "30"))
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = float(os.environ.get("EMAIL_OUTBOX_RETRY_MAX_SECONDS", "3600"))
 # Frontend activation page base URL, used for "click to activate" link in emails: {FRONTEND_BASE_URL}/activate/{token}
 FRONTEND_BASE_URL = os.environ.get("FRONTEND_BASE_URL", "http://localhost:5173").rstrip("/")
 
@@ -56,8 +78,90 @@ OPENWEATHER_API_KEY = os.environ.get("OPENWEATHER_API_KEY")
 if not OPENWEATHER_API_KEY:
     raise ValueError("OPENWEATHER_API_KEY environment variable is not set, please configure in .env file")
 
+# Forecast ingestion (flask weather ingest / schedule): location, HTTP timeout, schedule interval, and the
+# minimum age of the newest stored row before the API is called again (conditional refresh)
+OPENWEATHER_LAT = float(os.environ.get("OPENWEATHER_LAT", "53.3498"))   # Default Dublin city centre
+OPENWEATHER_LON = float(os.environ.get("OPENWEATHER_LON", "-6.2603"))
+OPENWEATHER_TIMEOUT_SECONDS = float(os.environ.get("OPENWEATHER_TIMEOUT_SECONDS", "10"))
+WEATHER_INGEST_INTERVAL_SECONDS = int(os.environ.get("WEATHER_INGEST_INTERVAL_SECONDS", "3600"))  # Default 1 hour
+WEATHER_INGEST_MIN_AGE_SECONDS = int(os.environ.get("WEATHER_INGEST_MIN_AGE_SECONDS", "900"))  # Default 15 minutes
+# Retention: past forecast hours are archived to observed_weather and deleted this many rows per transaction
+WEATHER_PRUNE_BATCH_SIZE = int(os.environ.get("WEATHER_PRUNE_BATCH_SIZE", "500"))
+
+# Cached /api/weather payload: seconds a warm payload is served before re-checking the DB for a newer scrape
+WEATHER_CACHE_REVALIDATE_SECONDS = float(os.environ.get("WEATHER_CACHE_REVALIDATE_SECONDS", "60"))
+
+# Cached latest availability snapshot: seconds served before re-checking the DB version
+STATION_SNAPSHOT_REVALIDATE_SECONDS = float(os.environ.get("STATION_SNAPSHOT_REVALIDATE_SECONDS", "5"))
+# Past availability snapshots kept per worker for /api/stations/status?since=<version> deltas
+STATION_SNAPSHOT_HISTORY = int(os.environ.get("STATION_SNAPSHOT_HISTORY", "32"))
+# Station registry (station list, lookups, coordinates): seconds between checks of the station table's
+# change counter (station_table_version, bumped by DB triggers); the rows are only re-read after it moved
+STATION_REGISTRY_REVALIDATE_SECONDS = float(os.environ.get("STATION_REGISTRY_REVALIDATE_SECONDS", "60"))
+# `flask stations profile`: availability rows read and merged into station_profile per transaction
+STATION_PROFILE_BATCH_SIZE = int(os.environ.get("STATION_PROFILE_BATCH_SIZE", "5000"))
+# Request threads per gunicorn worker (entrypoint.sh passes it to --threads)
+GUNICORN_THREADS = int(os.environ.get("GUNICORN_THREADS", "16"))
+# /api/stations/stream: seconds between this worker's checks for a new scrape, keep-alive comment interval
+# and the most SSE clients one worker holds open (further clients get 503). The stream is meant to be
+# served by the stream server (entrypoint.sh stream: gevent workers, one greenlet per client), capped at
+# STATION_STREAM_SERVER_MAX_CLIENTS per worker. When it reaches the gthread web server instead, every
+# open stream occupies one of the worker's GUNICORN_THREADS, so there the cap defaults to half of them
+STATION_STREAM_POLL_SECONDS = float(os.environ.get("STATION_STREAM_POLL_SECONDS", "5"))
+STATION_STREAM_KEEPALIVE_SECONDS = float(os.environ.get("STATION_STREAM_KEEPALIVE_SECONDS", "15"))
+STATION_STREAM_MAX_CLIENTS = int(os.environ.get("STATION_STREAM_MAX_CLIENTS", str(max(GUNICORN_THREADS // 2, 1))))
+STATION_STREAM_SERVER_MAX_CLIENTS = int(os.environ.get("STATION_STREAM_SERVER_MAX_CLIENTS", "5000"))
+
+# HTTP caching: Cache-Control max-age (seconds) of the versioned read endpoints; 0 = no-cache (revalidate
+# with the ETag every time). Unchanged data is answered 304 either way.
+HTTP_MAX_AGE_STATIONS = int(os.environ.get("HTTP_MAX_AGE_STATIONS", "300"))
+HTTP_MAX_AGE_STATION_STATUS = int(os.environ.get("HTTP_MAX_AGE_STATION_STATUS", "5"))
+HTTP_MAX_AGE_WEATHER = int(os.environ.get("HTTP_MAX_AGE_WEATHER", "60"))
+# Response compression: JSON bodies from this size are gzipped (brotli if installed and accepted);
+# compressed variants of ETagged bodies are kept per worker in an LRU of this many entries
+HTTP_COMPRESS_MIN_BYTES = int(os.environ.get("HTTP_COMPRESS_MIN_BYTES", "1024"))
+HTTP_COMPRESS_LEVEL = int(os.environ.get("HTTP_COMPRESS_LEVEL", "6"))
+HTTP_BROTLI_QUALITY = int(os.environ.get("HTTP_BROTLI_QUALITY", "5"))
+HTTP_COMPRESS_CACHE_ENTRIES = int(os.environ.get("HTTP_COMPRESS_CACHE_ENTRIES", "64"))
+
+# Availability model (`flask model train`): directory of the versioned artifacts and model_manifest.json;
+# days of availability history per training run, rows read per chunk, newest fraction held out for evaluation,
+# versions kept on disk, and the decision tree's limits (MODEL_MAX_DEPTH 0 = unlimited)
+MODEL_DIR = os.environ.get("MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "machine_learning"))
+MODEL_TRAINING_DAYS = int(os.environ.get("MODEL_TRAINING_DAYS", "90"))
+MODEL_TRAINING_CHUNK_SIZE = int(os.environ.get("MODEL_TRAINING_CHUNK_SIZE", "20000"))
+MODEL_TEST_FRACTION = float(os.environ.get("MODEL_TEST_FRACTION", "0.2"))
+MODEL_KEEP_VERSIONS = int(os.environ.get("MODEL_KEEP_VERSIONS", "5"))
+MODEL_MAX_DEPTH = int(os.environ.get("MODEL_MAX_DEPTH", "0"))
+MODEL_MIN_SAMPLES_LEAF = int(os.environ.get("MODEL_MIN_SAMPLES_LEAF", "5"))
+# Prediction micro-batching (per worker): requests queued while a predict call runs share the next one;
+# MODEL_BATCH_WAIT_MS additionally holds a batch open for late arrivals (0 = never wait), and at most
+# MODEL_BATCH_MAX_ROWS feature rows are stacked into one call
+MODEL_BATCHING_ENABLED = os.environ.get("MODEL_BATCHING_ENABLED", "true").lower() in ("1", "true", "yes")
+MODEL_BATCH_WAIT_MS = float(os.environ.get("MODEL_BATCH_WAIT_MS", "0"))
+MODEL_BATCH_MAX_ROWS = int(os.environ.get("MODEL_BATCH_MAX_ROWS", "4096"))
+# Seconds between checks of model_manifest.json by each worker's model registry thread; a newly promoted
+# version is loaded off the request path and swapped in atomically
+MODEL_RELOAD_CHECK_SECONDS = float(os.environ.get("MODEL_RELOAD_CHECK_SECONDS", "30"))
+
 # Google Maps API configuration (used for route planning)
 GOOGLE_MAPS_API_KEY = os.environ.get("GOOGLE_MAPS_API_KEY")
 
 # Aliyun Qwen configuration (used for LLM etc.)
 ALIYUN_API_KEY = os.environ.get("ALIYUN_API_KEY")
+
+# Chat response cache (opt-in): replays answers to repeated first-turn questions instead of calling the LLM again
+CHAT_RESPONSE_CACHE_ENABLED = os.environ.get("CHAT_RESPONSE_CACHE_ENABLED", "").lower() in ("1", "true", "yes")
+CHAT_RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get("CHAT_RESPONSE_CACHE_TTL_SECONDS", "3600"))  # Default 1 hour
+CHAT_RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("CHAT_RESPONSE_CACHE_MAX_ENTRIES", "512"))
+# Cosine similarity (0-1) for the local embedding tier; 0 disables it and only exact (normalized) matches are served
+CHAT_RESPONSE_CACHE_SIMILARITY_THRESHOLD = float(os.environ.get("CHAT_RESPONSE_CACHE_SIMILARITY_THRESHOLD", "0"))
+
+# Chat LLM admission control (per worker process): concurrent LLM calls, per-user in-flight cap, and a short wait queue
+CHAT_MAX_CONCURRENT_LLM_CALLS = int(os.environ.get("CHAT_MAX_CONCURRENT_LLM_CALLS", "4"))
+CHAT_MAX_IN_FLIGHT_PER_USER = int(os.environ.get("CHAT_MAX_IN_FLIGHT_PER_USER", "2"))
+CHAT_ADMISSION_MAX_QUEUE = int(os.environ.get("CHAT_ADMISSION_MAX_QUEUE", "8"))
+CHAT_ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("CHAT_ADMISSION_QUEUE_TIMEOUT_SECONDS", "5"))
+# Optional cross-process cap shared by all workers on the host (lock files in CHAT_ADMISSION_SLOT_DIR); 0 disables
+CHAT_ADMISSION_GLOBAL_SLOTS = int(os.environ.get("CHAT_ADMISSION_GLOBAL_SLOTS", "0"))
+CHAT_ADMISSION_SLOT_DIR = os.environ.get("CHAT_ADMISSION_SLOT_DIR", "/tmp/flask-app-llm-slots")
@@ -3,13 +3,48 @@
 # Exit immediately on error
 set -e
 
-# 1. Apply database migrations (only run upgrade, not migrate)
-echo "Running DB migrations..."
-flask db upgrade
-
-# 2. Start Gunicorn
-echo "Starting Gunicorn..."
-# exec allows gunicorn to replace the current shell process and receive system signals
-# gthread multi-threaded mode: suitable for long-running I/O (e.g., SSE streaming), prevents a single request from monopolizing the process and causing timeout
-# --preload: load the application (including ML model) in the Master process early, workers fork and share memory, avoiding each worker loading its own copy of the model
-exec gunicorn -w 2 -b 0.0.0.0:5000 --worker-class gthread --threads 4 --timeout 120 --preload --access-logfile - wsgi:app
+# Process to run in this container (first argument, default "web"):
+#   web                apply migrations, then serve the API with Gunicorn
+#   stream             serve /api/stations/stream with Gunicorn's gevent workers (route that path here)
+#   email-worker       deliver the email outbox (`flask email worker`); run exactly one alongside the web container
+#   weather-scheduler  ingest and prune weather_forecast (`flask weather schedule`); run exactly one as well
+MODE="${1:-web}"
+
+case "$MODE" in
+web)
+    # 1. Apply database migrations (only run upgrade, not migrate)
+    echo "Running DB migrations..."
+    flask db upgrade
+
+    # 2. Start Gunicorn
+    echo "Starting Gunicorn..."
+    # exec allows gunicorn to replace the current shell process and receive system signals
+    # gthread multi-threaded mode: suitable for long-running I/O (e.g., SSE streaming), prevents a single request from monopolizing the process and causing timeout
+    # --threads: /api/stations/stream belongs on the stream server; a stream that reaches this one holds a thread, so STATION_STREAM_MAX_CLIENTS defaults to half of GUNICORN_THREADS
+    # --preload: load the application (including ML model) in the Master process early, workers fork and share memory, avoiding each worker loading its own copy of the model
+    exec gunicorn -w "${GUNICORN_WORKERS:-2}" -b 0.0.0.0:5000 --worker-class gthread --threads "${GUNICORN_THREADS:-16}" --timeout 120 --preload --access-logfile - wsgi:app
+    ;;
+stream)
+    # gevent workers: each SSE client is a greenlet, so one worker holds thousands of idle connections
+    # while its single broadcaster polls the DB and encodes every change once for all of them.
+    # No --preload: gunicorn monkey-patches each worker before loading the app (and no model is loaded)
+    echo "Starting station stream server..."
+    exec gunicorn -w "${STREAM_WORKERS:-2}" -b 0.0.0.0:5001 --worker-class gevent \
+        --worker-connections "$(( ${STATION_STREAM_SERVER_MAX_CLIENTS:-5000} + 100 ))" \
+        --timeout 120 --access-logfile - stream_wsgi:app
+    ;;
+email-worker)
+    # Migrations are applied by the web container; the worker only reads and updates email_outbox
+    echo "Starting email outbox worker..."
+    exec flask email worker
+    ;;
+weather-scheduler)
+    # Fetches the OneCall forecast every WEATHER_INGEST_INTERVAL_SECONDS, then archives and deletes past hours
+    echo "Starting weather scheduler..."
+    exec flask weather schedule
+    ;;
+*)
+    echo "Unknown mode '$MODE' (expected: web, stream, email-worker, weather-scheduler)" >&2
+    exit 2
+    ;;
+esac
@@ -0,0 +1,40 @@
+"""add email_outbox table drained by the email worker command
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "a7b8c9d0e1f2"
+down_revision = "f6a7b8c9d0e1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("recipient", sa.String(length=120), nullable=False),
+        sa.Column("template", sa.String(length=64), nullable=False),
+        sa.Column("context", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.String(length=500), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("email_outbox", schema=None) as batch_op:
+        batch_op.create_index("ix_email_outbox_status_next_attempt", ["status", "next_attempt_at"], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table("email_outbox", schema=None) as batch_op:
+        batch_op.drop_index("ix_email_outbox_status_next_attempt")
+    op.drop_table("email_outbox")
@@ -0,0 +1,44 @@
+"""add station_profile table (per station, weekday and hour availability statistics)
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "b8c9d0e1f2a3"
+down_revision = "a7b8c9d0e1f2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "station_profile",
+        sa.Column("number", sa.Integer(), nullable=False),
+        sa.Column("weekday", sa.SmallInteger(), nullable=False),
+        sa.Column("hour", sa.SmallInteger(), nullable=False),
+        sa.Column("samples", sa.Integer(), nullable=False),
+        sa.Column("mean_bikes", sa.Float(), nullable=False),
+        sa.Column("median_bikes", sa.Float(), nullable=False),
+        sa.Column("p10_bikes", sa.Float(), nullable=False),
+        sa.Column("p25_bikes", sa.Float(), nullable=False),
+        sa.Column("p75_bikes", sa.Float(), nullable=False),
+        sa.Column("p90_bikes", sa.Float(), nullable=False),
+        sa.Column("histogram", sa.JSON(), nullable=False),
+        sa.Column("last_availability_id", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["number"], ["station.number"]),
+        sa.PrimaryKeyConstraint("number", "weekday", "hour"),
+    )
+    with op.batch_alter_table("station_profile", schema=None) as batch_op:
+        batch_op.create_index("ix_station_profile_last_availability_id", ["last_availability_id"], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table("station_profile", schema=None) as batch_op:
+        batch_op.drop_index("ix_station_profile_last_availability_id")
+    op.drop_table("station_profile")
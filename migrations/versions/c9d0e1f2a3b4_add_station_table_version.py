@@ -0,0 +1,68 @@
+"""add station_table_version counter bumped by triggers on station changes
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "c9d0e1f2a3b4"
+down_revision = "b8c9d0e1f2a3"
+branch_labels = None
+depends_on = None
+
+
+STATION_COLUMNS = ("number", "contract_name", "name", "address", "latitude", "longitude", "banking", "bonus", "bike_stands")
+BUMP = "UPDATE station_table_version SET version = version + 1 WHERE id = 1"
+
+TRIGGERS = {
+    "sqlite": [
+        f"CREATE TRIGGER station_version_insert AFTER INSERT ON station BEGIN {BUMP}; END",
+        f"CREATE TRIGGER station_version_delete AFTER DELETE ON station BEGIN {BUMP}; END",
+        "CREATE TRIGGER station_version_update AFTER UPDATE ON station WHEN "
+        + " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in STATION_COLUMNS)
+        + f" BEGIN {BUMP}; END",
+    ],
+    "mysql": [
+        f"CREATE TRIGGER station_version_insert AFTER INSERT ON station FOR EACH ROW {BUMP}",
+        f"CREATE TRIGGER station_version_delete AFTER DELETE ON station FOR EACH ROW {BUMP}",
+        f"CREATE TRIGGER station_version_update AFTER UPDATE ON station FOR EACH ROW {BUMP} AND NOT ("
+        + " AND ".join(f"OLD.{c} <=> NEW.{c}" for c in STATION_COLUMNS)
+        + ")",
+    ],
+    "postgresql": [
+        "CREATE OR REPLACE FUNCTION bump_station_table_version() RETURNS trigger AS $$ "
+        f"BEGIN {BUMP}; RETURN NULL; END $$ LANGUAGE plpgsql",
+        "CREATE TRIGGER station_version_change AFTER INSERT OR DELETE ON station "
+        "FOR EACH ROW EXECUTE FUNCTION bump_station_table_version()",
+        "CREATE TRIGGER station_version_update AFTER UPDATE ON station "
+        "FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION bump_station_table_version()",
+    ],
+}
+
+
+def upgrade():
+    op.create_table(
+        "station_table_version",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute("INSERT INTO station_table_version (id, version) VALUES (1, 0)")
+    for statement in TRIGGERS.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("DROP TRIGGER IF EXISTS station_version_change ON station")
+        op.execute("DROP TRIGGER IF EXISTS station_version_update ON station")
+        op.execute("DROP FUNCTION IF EXISTS bump_station_table_version()")
+    else:
+        for name in ("station_version_insert", "station_version_delete", "station_version_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_table("station_table_version")
@@ -0,0 +1,35 @@
+"""Add observed_weather table
+
+Revision ID: e5f6a7b8c9d0
+Revises: 5f165b9082ae
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f6a7b8c9d0'
+down_revision = '5f165b9082ae'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('observed_weather',
+    sa.Column('observed_time', sa.DateTime(), nullable=False),
+    sa.Column('temperature', sa.Float(), nullable=False),
+    sa.Column('feels_like', sa.Float(), nullable=True),
+    sa.Column('humidity', sa.SmallInteger(), nullable=True),
+    sa.Column('pressure', sa.SmallInteger(), nullable=True),
+    sa.Column('weather_code', sa.SmallInteger(), nullable=False),
+    sa.Column('clouds', sa.SmallInteger(), nullable=True),
+    sa.Column('wind_speed', sa.Float(), nullable=True),
+    sa.Column('pop', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('observed_time')
+    )
+
+
+def downgrade():
+    op.drop_table('observed_weather')
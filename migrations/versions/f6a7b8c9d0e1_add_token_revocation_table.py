@@ -0,0 +1,34 @@
+"""add token_revocation table for cross-worker token state invalidation
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "f6a7b8c9d0e1"
+down_revision = "e5f6a7b8c9d0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "token_revocation",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("token_version", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("token_revocation", schema=None) as batch_op:
+        batch_op.create_index(batch_op.f("ix_token_revocation_created_at"), ["created_at"], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table("token_revocation", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_token_revocation_created_at"))
+    op.drop_table("token_revocation")
@@ -0,0 +1,4 @@
+from app import create_stream_app
+
+
+app = create_stream_app()
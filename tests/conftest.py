@@ -23,6 +23,8 @@ os.environ["JWT_REFRESH_SECRET_KEY"] = "test-jwt-refresh-secret-key-12345678"
 os.environ["OPENWEATHER_API_KEY"] = "test-openweather-api-key"
 os.environ["GOOGLE_MAPS_API_KEY"] = "test-google-maps-api-key"
 os.environ["ALIYUN_API_KEY"] = "test-aliyun-api-key"
+# Hash passwords inline: no helper processes in the test run
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
 
 from unittest.mock import MagicMock, patch
 
@@ -84,12 +86,36 @@ def db(app):
     with app.app_context():
         yield _db
         _db.session.rollback()
-        # Delete all rows so tests don't bleed state into each other
+        # Delete all rows so tests don't bleed state into each other (the trigger-maintained
+        # station_table_version counter row is schema, not data: the triggers need it to exist)
         for table in reversed(_db.metadata.sorted_tables):
-            _db.session.execute(table.delete())
+            if table.name != "station_table_version":
+                _db.session.execute(table.delete())
         _db.session.commit()
 
 
+@pytest.fixture(autouse=True)
+def reset_in_process_caches():
+    """Clear per-worker caches so cached state never leaks between tests."""
+    from app.api.chat_routes import llm_admission
+    from app.ml.registry import model_registry
+    from app.services.chat_cache_service import response_cache
+    from app.services.station_service import availability_snapshots, station_snapshots
+    from app.services.token_state_service import token_state_cache
+    from app.services.weather_service import weather_payload_cache
+    from app.utils.http_cache import compressed_variants
+
+    token_state_cache.clear()
+    response_cache.clear()
+    llm_admission.reset()
+    weather_payload_cache.invalidate()
+    station_snapshots.invalidate()
+    availability_snapshots.invalidate()
+    compressed_variants.clear()
+    model_registry.reset()
+    yield
+
+
 @pytest.fixture()
 def client(app):
     """Flask test client."""
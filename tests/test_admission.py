@@ -0,0 +1,110 @@
+"""
+Unit tests for app.utils.admission (LLM admission control).
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.utils.admission import AdmissionController, AdmissionRejected, FileSlotPool
+
+
+class TestAdmissionController:
+    def test_admits_up_to_max_concurrent(self):
+        controller = AdmissionController(max_concurrent=2, per_user_limit=5)
+        t1 = controller.acquire("a")
+        t2 = controller.acquire("b")
+        assert controller.stats()["in_flight"] == 2
+        t1.release()
+        t2.release()
+        assert controller.stats()["in_flight"] == 0
+
+    def test_per_user_cap_rejects_immediately(self):
+        controller = AdmissionController(max_concurrent=5, per_user_limit=1)
+        ticket = controller.acquire("user-1")
+        with pytest.raises(AdmissionRejected) as exc_info:
+            controller.acquire("user-1")
+        assert exc_info.value.reason == "user_limit"
+        # Other users are unaffected
+        controller.acquire("user-2").release()
+        ticket.release()
+
+    def test_full_queue_rejects_with_position(self):
+        controller = AdmissionController(max_concurrent=1, per_user_limit=5, max_queue=0)
+        ticket = controller.acquire("a")
+        with pytest.raises(AdmissionRejected) as exc_info:
+            controller.acquire("b")
+        assert exc_info.value.reason == "queue_full"
+        assert exc_info.value.queue_position == 1
+        ticket.release()
+
+    def test_queue_timeout_rejects_with_position(self):
+        controller = AdmissionController(max_concurrent=1, per_user_limit=5, max_queue=4, queue_timeout=0.05)
+        ticket = controller.acquire("a")
+        started = time.monotonic()
+        with pytest.raises(AdmissionRejected) as exc_info:
+            controller.acquire("b")
+        assert exc_info.value.reason == "queue_timeout"
+        assert exc_info.value.queue_position == 1
+        assert time.monotonic() - started < 1
+        assert controller.stats()["queued"] == 0
+        ticket.release()
+
+    def test_queued_request_admitted_when_slot_frees(self):
+        controller = AdmissionController(max_concurrent=1, per_user_limit=5, max_queue=4, queue_timeout=2)
+        ticket = controller.acquire("a")
+        admitted = []
+
+        def _waiter():
+            with controller.admit("b"):
+                admitted.append(True)
+
+        thread = threading.Thread(target=_waiter)
+        thread.start()
+        time.sleep(0.05)
+        assert controller.stats()["queued"] == 1
+        ticket.release()
+        thread.join(timeout=2)
+        assert admitted == [True]
+        assert controller.stats()["in_flight"] == 0
+
+    def test_release_is_idempotent(self):
+        controller = AdmissionController(max_concurrent=1, per_user_limit=1)
+        ticket = controller.acquire("a")
+        ticket.release()
+        ticket.release()
+        assert controller.stats()["in_flight"] == 0
+        controller.acquire("a").release()
+
+    def test_reset_invalidates_outstanding_tickets(self):
+        controller = AdmissionController(max_concurrent=1, per_user_limit=1)
+        ticket = controller.acquire("a")
+        controller.reset()
+        new_ticket = controller.acquire("a")
+        ticket.release()  # stale ticket must not free the new one
+        assert controller.stats()["in_flight"] == 1
+        new_ticket.release()
+
+
+class TestFileSlotPool:
+    def test_slots_shared_through_lock_files(self, tmp_path):
+        pool = FileSlotPool(str(tmp_path), slots=1, poll_interval=0.01)
+        fd = pool.acquire(time.monotonic() + 0.1)
+        assert fd is not None
+        # A second holder (another process in production) cannot get the only slot
+        assert pool.acquire(time.monotonic() + 0.05) is None
+        FileSlotPool.release(fd)
+        fd2 = pool.acquire(time.monotonic() + 0.1)
+        assert fd2 is not None
+        FileSlotPool.release(fd2)
+
+    def test_controller_rejects_when_global_slots_exhausted(self, tmp_path):
+        pool = FileSlotPool(str(tmp_path), slots=1, poll_interval=0.01)
+        controller = AdmissionController(max_concurrent=4, per_user_limit=4, queue_timeout=0.05, slot_pool=pool)
+        ticket = controller.acquire("a")
+        with pytest.raises(AdmissionRejected) as exc_info:
+            controller.acquire("b")
+        assert exc_info.value.reason == "global_limit"
+        assert controller.stats()["in_flight"] == 1
+        ticket.release()
@@ -0,0 +1,87 @@
+"""
+Unit tests for app.api.auth (shared Bearer-token authentication with per-request caching on flask.g).
+"""
+
+from unittest.mock import patch
+
+import pytest
+from flask import g
+
+from app.api.auth import current_user, current_user_id, require_auth, resolve_auth
+from app.services.user_service import AuthError, create_access_token, verify_access_token
+
+PATCH_VERIFY = "app.api.auth.verify_access_token"
+
+
+def _headers(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestResolveAuth:
+    def test_token_verified_once_per_request(self, app, db, make_user):
+        with app.app_context():
+            user = make_user()
+            token = create_access_token(user.id, user.token_version)
+        with app.test_request_context(headers=_headers(token)):
+            with patch(PATCH_VERIFY, return_value={"sub": user.id, "ver": 0}) as mock_verify:
+                resolve_auth()
+                resolve_auth()
+                assert current_user_id() == user.id
+        assert mock_verify.call_count == 1
+
+    def test_failure_cached_and_reraised(self, app):
+        with app.test_request_context(headers=_headers("bad")):
+            with patch(PATCH_VERIFY, side_effect=AuthError("invalid access token", 401)) as mock_verify:
+                for _ in range(2):
+                    with pytest.raises(AuthError):
+                        resolve_auth()
+        assert mock_verify.call_count == 1
+
+    def test_missing_header(self, app):
+        with app.test_request_context():
+            with pytest.raises(AuthError) as exc_info:
+                resolve_auth()
+        assert exc_info.value.message == "missing or invalid Authorization header"
+
+    def test_current_user_loaded_once(self, app, db, make_user):
+        with app.app_context():
+            user = make_user()
+            token = create_access_token(user.id, user.token_version)
+        with app.test_request_context(headers=_headers(token)):
+            resolve_auth()
+            with patch("app.api.auth.db.session.get", wraps=db.session.get) as spy:
+                assert current_user().id == user.id
+                assert current_user() is g.current_user
+        assert spy.call_count == 1
+
+
+class TestRequireAuthDecorator:
+    def test_custom_error_responder(self, app):
+        @require_auth(lambda message, status: ({"error": message}, status))
+        def view():
+            return "ok"
+
+        with app.test_request_context():
+            body, status = view()
+        assert status == 401
+        assert body == {"error": "missing or invalid Authorization header"}
+
+    def test_passes_through_when_authenticated(self, app):
+        @require_auth()
+        def view():
+            return current_user_id()
+
+        with app.test_request_context(headers=_headers("t")):
+            with patch(PATCH_VERIFY, return_value={"sub": 7, "ver": 0}):
+                assert view() == 7
+
+    def test_logout_verifies_token_once(self, client, app, db, make_user):
+        with app.app_context():
+            user = make_user(username="once", email="once@example.com")
+            token = create_access_token(user.id, user.token_version)
+        with patch(PATCH_VERIFY, wraps=verify_access_token) as spy:
+            resp = client.post("/api/users/logout", headers=_headers(token))
+        assert resp.status_code == 200
+        assert spy.call_count == 1
+        # The old token is now revoked
+        assert client.get("/api/users/me", headers=_headers(token)).status_code == 401
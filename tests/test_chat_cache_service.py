@@ -0,0 +1,231 @@
+"""
+Unit tests for app.services.chat_cache_service and its use in chat_service.
+
+The LLM chain is mocked; the cache itself is exercised for real.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services.chat_cache_service import (
+    ChatResponseCache,
+    embed_prompt,
+    normalize_prompt,
+    prompt_key,
+)
+
+
+PATCH_CHAT_OPENAI = "app.services.chat_service.ChatOpenAI"
+PATCH_PROMPT = "app.services.chat_service.ChatPromptTemplate"
+PATCH_RUNNABLE = "app.services.chat_service.RunnableWithMessageHistory"
+PATCH_SQL_HISTORY = "app.services.chat_service.SQLChatMessageHistory"
+PATCH_TITLE = "app.services.chat_service._generate_title"
+PATCH_ENABLED = "config.CHAT_RESPONSE_CACHE_ENABLED"
+
+
+class TestNormalizePrompt:
+    def test_case_punctuation_and_whitespace_folded(self):
+        assert normalize_prompt("  How do I   rent a Bike?! ") == "how do i rent a bike"
+
+    def test_equivalent_prompts_share_key(self):
+        assert prompt_key("How do I rent a bike?") == prompt_key("how do i rent a bike")
+
+    def test_different_prompts_have_different_keys(self):
+        assert prompt_key("rent a bike") != prompt_key("return a bike")
+
+
+class TestEmbedPrompt:
+    def test_embedding_is_unit_length(self):
+        vec = embed_prompt("where is the nearest station")
+        assert vec.shape == (512,)
+        assert float((vec ** 2).sum()) == pytest.approx(1.0, rel=1e-5)
+
+    def test_near_duplicates_more_similar_than_unrelated(self):
+        a = embed_prompt("how do I rent a bike")
+        b = embed_prompt("how can I rent a bike")
+        c = embed_prompt("what is the weather tomorrow")
+        assert float(a @ b) > float(a @ c)
+
+
+class TestChatResponseCache:
+    def test_exact_hit_after_store(self):
+        cache = ChatResponseCache(maxsize=4, ttl=60)
+        cache.store("How do I rent a bike?", "Use the app.", "Renting bikes")
+        hit = cache.lookup("how do i rent a bike")
+        assert hit.reply == "Use the app."
+        assert hit.title == "Renting bikes"
+        assert cache.stats()["exact_hits"] == 1
+
+    def test_miss_counted(self):
+        cache = ChatResponseCache(maxsize=4, ttl=60)
+        assert cache.lookup("anything") is None
+        stats = cache.stats()
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.0
+
+    def test_semantic_tier_disabled_by_default(self):
+        cache = ChatResponseCache(maxsize=4, ttl=60)
+        cache.store("how do I rent a bike", "Use the app.")
+        assert cache.lookup("how can I rent a bike") is None
+
+    def test_semantic_hit_above_threshold(self):
+        cache = ChatResponseCache(maxsize=4, ttl=60, similarity_threshold=0.7)
+        cache.store("how do I rent a bike", "Use the app.")
+        hit = cache.lookup("how can I rent a bike")
+        assert hit is not None
+        assert cache.stats()["semantic_hits"] == 1
+
+    def test_semantic_miss_below_threshold(self):
+        cache = ChatResponseCache(maxsize=4, ttl=60, similarity_threshold=0.7)
+        cache.store("how do I rent a bike", "Use the app.")
+        assert cache.lookup("what is the weather tomorrow") is None
+
+    def test_lru_eviction(self):
+        cache = ChatResponseCache(maxsize=1, ttl=60)
+        cache.store("first", "one")
+        cache.store("second", "two")
+        assert cache.lookup("first") is None
+        assert cache.stats()["evictions"] == 1
+
+    def test_empty_reply_not_stored(self):
+        cache = ChatResponseCache(maxsize=4, ttl=60)
+        cache.store("question", "")
+        assert cache.stats()["stores"] == 0
+
+
+def _mock_chain(mock_prompt_cls, mock_runnable_cls, content="Live answer"):
+    mock_prompt = MagicMock()
+    mock_prompt_cls.from_messages.return_value = mock_prompt
+    mock_prompt.__or__ = MagicMock(return_value=MagicMock())
+    chain_with_history = MagicMock()
+    mock_runnable_cls.return_value = chain_with_history
+    response = MagicMock()
+    response.content = content
+    chain_with_history.invoke.return_value = response
+    chunk = MagicMock()
+    chunk.content = content
+    chain_with_history.stream.side_effect = lambda *a, **kw: iter([chunk])
+    return chain_with_history
+
+
+class TestGenerateChatResponseWithCache:
+    def test_second_identical_first_turn_served_from_cache(self, app, db, make_user):
+        from app.services.chat_service import generate_chat_response
+
+        with app.app_context():
+            user = make_user(username="cacheuser", email="cache@example.com")
+            with patch(PATCH_ENABLED, True), \
+                 patch(PATCH_CHAT_OPENAI), \
+                 patch(PATCH_PROMPT) as mock_p, \
+                 patch(PATCH_RUNNABLE) as mock_r, \
+                 patch(PATCH_SQL_HISTORY) as mock_history, \
+                 patch(PATCH_TITLE, return_value="Renting"):
+                chain = _mock_chain(mock_p, mock_r)
+                first = generate_chat_response("user_1_chat_a", "How do I rent a bike?", user.id)
+                second = generate_chat_response("user_1_chat_b", "how do i rent a bike", user.id)
+
+        assert first == second == "Live answer"
+        assert chain.invoke.call_count == 1
+        # The cached turn is still written to the new session's history
+        mock_history.return_value.add_messages.assert_called_once()
+
+    def test_cache_not_used_when_disabled(self, app, db, make_user):
+        from app.services.chat_service import generate_chat_response
+
+        with app.app_context():
+            user = make_user(username="nocache", email="nocache@example.com")
+            with patch(PATCH_ENABLED, False), \
+                 patch(PATCH_CHAT_OPENAI), \
+                 patch(PATCH_PROMPT) as mock_p, \
+                 patch(PATCH_RUNNABLE) as mock_r, \
+                 patch(PATCH_SQL_HISTORY), \
+                 patch(PATCH_TITLE, return_value=None):
+                chain = _mock_chain(mock_p, mock_r)
+                generate_chat_response("user_1_chat_c", "hello", user.id)
+                generate_chat_response("user_1_chat_d", "hello", user.id)
+
+        assert chain.invoke.call_count == 2
+
+    def test_turn_with_history_bypasses_cache(self, app, db, make_user):
+        from app.services.chat_service import generate_chat_response
+        from app.services.chat_cache_service import response_cache
+        from app.extensions import db as _db
+
+        with app.app_context():
+            user = make_user(username="histuser", email="hist@example.com")
+            response_cache.store("hello", "Cached answer")
+            with patch(PATCH_ENABLED, True), \
+                 patch(PATCH_CHAT_OPENAI), \
+                 patch(PATCH_PROMPT) as mock_p, \
+                 patch(PATCH_RUNNABLE) as mock_r, \
+                 patch(PATCH_SQL_HISTORY):
+                chain = _mock_chain(mock_p, mock_r)
+                with patch.object(_db.session, "execute") as mock_exec:
+                    # An existing message_store row means this is not the first turn
+                    mock_exec.return_value.fetchone.return_value = (1,)
+                    result = generate_chat_response("user_1_chat_e", "hello", user.id)
+
+        assert result == "Live answer"
+        assert chain.invoke.call_count == 1
+
+
+class TestGenerateChatStreamWithCache:
+    def test_cached_answer_replayed_as_sse_chunks(self, app, db, make_user):
+        from app.services.chat_service import generate_chat_stream
+        from app.services.chat_cache_service import response_cache
+
+        reply = "You can rent a bike with the app or a leap card at any station."
+        with app.app_context():
+            user = make_user(username="streamcache", email="streamcache@example.com")
+            response_cache.store("how do I rent a bike", reply)
+            with patch(PATCH_ENABLED, True), \
+                 patch(PATCH_CHAT_OPENAI) as mock_oai, \
+                 patch(PATCH_SQL_HISTORY):
+                chunks = list(generate_chat_stream("user_1_chat_f", "How do I rent a bike?", user.id))
+
+        mock_oai.assert_not_called()
+        assert chunks[-1] == "data: [DONE]\n\n"
+        content_chunks = [c for c in chunks if '"content"' in c]
+        assert len(content_chunks) > 1
+        import json
+        replayed = "".join(json.loads(c[len("data: "):])["content"] for c in content_chunks)
+        assert replayed == reply
+
+    def test_streamed_answer_stored_for_next_request(self, app, db, make_user):
+        from app.services.chat_service import generate_chat_stream
+        from app.services.chat_cache_service import response_cache
+
+        with app.app_context():
+            user = make_user(username="streamstore", email="streamstore@example.com")
+            with patch(PATCH_ENABLED, True), \
+                 patch(PATCH_CHAT_OPENAI), \
+                 patch(PATCH_PROMPT) as mock_p, \
+                 patch(PATCH_RUNNABLE) as mock_r, \
+                 patch(PATCH_SQL_HISTORY), \
+                 patch(PATCH_TITLE, return_value=None):
+                _mock_chain(mock_p, mock_r, content="Streamed answer")
+                list(generate_chat_stream("user_1_chat_g", "Where can I park?", user.id))
+
+        assert response_cache.lookup("where can i park").reply == "Streamed answer"
+
+    def test_answer_grounded_in_tool_data_not_cached(self, app, db, make_user):
+        from app.services.chat_service import generate_chat_stream
+        from app.services.chat_cache_service import response_cache
+        from app.services.chat_tools import ChatToolContext
+
+        tool_ctx = ChatToolContext()
+        tool_ctx.tool_calls.append("find_station_status")
+        with app.app_context():
+            user = make_user(username="toolstream", email="toolstream@example.com")
+            with patch(PATCH_ENABLED, True), \
+                 patch("app.services.chat_service.ChatToolContext", return_value=tool_ctx), \
+                 patch(PATCH_CHAT_OPENAI), \
+                 patch(PATCH_PROMPT) as mock_p, \
+                 patch(PATCH_RUNNABLE) as mock_r, \
+                 patch(PATCH_SQL_HISTORY), \
+                 patch(PATCH_TITLE, return_value=None):
+                _mock_chain(mock_p, mock_r, content="7 bikes at Grafton")
+                list(generate_chat_stream("user_1_chat_h", "Bikes at Grafton?", user.id))
+
+        assert response_cache.lookup("bikes at grafton") is None
@@ -191,6 +191,112 @@ class TestChatStreamEndpoint:
         assert resp.status_code == 400
 
 
+# ---------------------------------------------------------------------------
+# Admission control (429 instead of hanging)
+# ---------------------------------------------------------------------------
+
+
+class TestChatAdmission:
+    def test_chat_over_per_user_cap_returns_429(self, client, app, db, make_user):
+        from app.api.chat_routes import llm_admission
+
+        user, headers = _make_auth_header(
+            app, make_user, username="busyuser", email="busy@example.com"
+        )
+        held = [llm_admission.acquire(user.id) for _ in range(llm_admission.per_user_limit)]
+        try:
+            with patch(PATCH_GENERATE, return_value="never") as mock_generate:
+                resp = client.post(
+                    "/api/chat/",
+                    json={"message": "Hi", "chat_id": "busy-chat"},
+                    headers=headers,
+                )
+        finally:
+            for ticket in held:
+                ticket.release()
+        assert resp.status_code == 429
+        assert resp.headers["Retry-After"]
+        body = resp.get_json()
+        assert body["code"] == 42901
+        assert body["data"]["reason"] == "user_limit"
+        mock_generate.assert_not_called()
+
+    def test_chat_releases_slot_after_response(self, client, app, db, make_user):
+        from app.api.chat_routes import llm_admission
+
+        user, headers = _make_auth_header(
+            app, make_user, username="slotuser", email="slot@example.com"
+        )
+        with patch(PATCH_GENERATE, side_effect=RuntimeError("llm down")):
+            client.post("/api/chat/", json={"message": "Hi", "chat_id": "c"}, headers=headers)
+        assert llm_admission.stats()["in_flight"] == 0
+
+    def test_stream_when_queue_full_returns_429_with_position(self, client, app, db, make_user):
+        from app.api.chat_routes import llm_admission
+
+        user, headers = _make_auth_header(
+            app, make_user, username="queueuser", email="queue@example.com"
+        )
+        held = [llm_admission.acquire(f"other-{i}") for i in range(llm_admission.max_concurrent)]
+        try:
+            with patch.object(llm_admission, "max_queue", 0):
+                resp = client.post(
+                    "/api/chat/stream",
+                    json={"message": "Hi", "chat_id": "queue-chat"},
+                    headers=headers,
+                )
+        finally:
+            for ticket in held:
+                ticket.release()
+        assert resp.status_code == 429
+        body = resp.get_json()
+        assert body["reason"] == "queue_full"
+        assert body["queue_position"] == 1
+
+    def test_stream_holds_slot_until_generator_finishes(self, client, app, db, make_user):
+        from app.api.chat_routes import llm_admission
+
+        user, headers = _make_auth_header(
+            app, make_user, username="holduser", email="hold@example.com"
+        )
+        seen_in_flight = []
+
+        def _gen(*args, **kwargs):
+            seen_in_flight.append(llm_admission.stats()["in_flight"])
+            yield "data: [DONE]\n\n"
+
+        with patch(PATCH_STREAM, new=_gen):
+            resp = client.post(
+                "/api/chat/stream",
+                json={"message": "Hi", "chat_id": "hold-chat"},
+                headers=headers,
+            )
+            resp.get_data()
+            resp.close()
+        assert seen_in_flight == [1]
+        assert llm_admission.stats()["in_flight"] == 0
+
+    def test_stream_closed_before_iteration_releases_slot(self, client, app, db, make_user):
+        from app.api.chat_routes import llm_admission
+
+        user, headers = _make_auth_header(
+            app, make_user, username="goneuser", email="gone@example.com"
+        )
+
+        def _gen(*args, **kwargs):
+            yield "data: [DONE]\n\n"
+
+        with patch(PATCH_STREAM, new=_gen):
+            resp = client.post(
+                "/api/chat/stream",
+                json={"message": "Hi", "chat_id": "gone-chat"},
+                headers=headers,
+            )
+            assert llm_admission.stats()["in_flight"] == 1
+            resp.close()  # client disconnected before the body was iterated
+        assert llm_admission.stats()["in_flight"] == 0
+
+
 # ---------------------------------------------------------------------------
 # GET /api/chat/sessions
 # ---------------------------------------------------------------------------
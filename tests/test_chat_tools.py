@@ -0,0 +1,190 @@
+"""
+Unit tests for app.services.chat_tools.
+
+The model is replaced by a scripted fake that emits AIMessageChunks; station,
+weather and prediction data come from the in-memory SQLite DB or mocks.
+"""
+
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessageChunk, HumanMessage, ToolMessage
+
+from app.services.chat_tools import ChatToolContext, build_chat_tools, run_tool_loop
+from app.services.weather_service import WeatherAPIError
+
+
+class _ScriptedModel:
+    """Fake chat model: each stream() call pops the next scripted list of chunks."""
+
+    def __init__(self, rounds):
+        self.rounds = list(rounds)
+        self.seen = []
+        self.bound_tools = None
+
+    def bind_tools(self, tools):
+        self.bound_tools = tools
+        return self
+
+    def stream(self, messages):
+        self.seen.append(list(messages))
+        return iter(self.rounds.pop(0))
+
+
+def _tool_call_chunk(name, args, call_id="call-1"):
+    return AIMessageChunk(
+        content="",
+        tool_call_chunks=[{"name": name, "args": json.dumps(args), "id": call_id, "index": 0}],
+    )
+
+
+def _tools_by_name(ctx):
+    return {tool.name: tool for tool in build_chat_tools(ctx)}
+
+
+class TestChatToolContext:
+    def test_fetch_memoizes_loader(self):
+        ctx = ChatToolContext()
+        calls = []
+        loader = lambda: calls.append(1) or "value"
+        assert ctx.fetch(("k",), loader) == "value"
+        assert ctx.fetch(("k",), loader) == "value"
+        assert len(calls) == 1
+
+    def test_used_tools_false_initially(self):
+        assert ChatToolContext().used_tools is False
+
+
+class TestFindStationStatusTool:
+    def test_matches_by_name_with_live_availability(self, app, db, make_station, make_availability):
+        with app.app_context():
+            make_station(number=42, name="Grafton Street", address="Grafton St")
+            make_station(number=43, name="Smithfield", address="North King St")
+            make_availability(number=42, available_bikes=7, available_bike_stands=13)
+            result = _tools_by_name(ChatToolContext())["find_station_status"].invoke({"query": "grafton"})
+
+        assert len(result["stations"]) == 1
+        station = result["stations"][0]
+        assert station["number"] == 42
+        assert station["available_bikes"] == 7
+        assert station["available_bike_stands"] == 13
+
+    def test_matches_by_number(self, app, db, make_station):
+        with app.app_context():
+            make_station(number=42, name="Grafton Street")
+            make_station(number=142, name="Other")
+            result = _tools_by_name(ChatToolContext())["find_station_status"].invoke({"query": "42"})
+        assert [s["number"] for s in result["stations"]] == [42]
+
+    def test_no_match_returns_error(self, app, db):
+        with app.app_context():
+            result = _tools_by_name(ChatToolContext())["find_station_status"].invoke({"query": "nowhere"})
+        assert "error" in result
+
+    def test_repeated_calls_query_database_once(self, app, db, make_station):
+        with app.app_context():
+            make_station(number=1, name="Alpha")
+            ctx = ChatToolContext()
+            tool = _tools_by_name(ctx)["find_station_status"]
+            with patch(
+                "app.services.chat_tools.get_all_stations_latest_availability", return_value=[]
+            ) as mock_status, patch(
+                "app.services.chat_tools.list_stations",
+                return_value=[{"number": 1, "name": "Alpha", "address": "A", "bike_stands": 20}],
+            ) as mock_list:
+                tool.invoke({"query": "alpha"})
+                tool.invoke({"query": "1"})
+        assert mock_status.call_count == 1
+        assert mock_list.call_count == 1
+
+
+class TestWeatherAndPredictionTools:
+    def test_weather_tool_condenses_forecast(self, app, db, make_weather_forecast):
+        with app.app_context():
+            make_weather_forecast(
+                forecast_time=datetime.utcnow() + timedelta(hours=1),
+                temperature=12.5,
+                description="light rain",
+            )
+            result = _tools_by_name(ChatToolContext())["get_weather_forecast"].invoke({})
+        assert result["current"]["temp"] == 12.5
+        assert result["current"]["description"] == "light rain"
+        assert len(result["hourly"]) == 1
+
+    def test_weather_tool_reports_service_error(self, app):
+        with app.app_context(), patch(
+            "app.services.chat_tools.get_weather", side_effect=WeatherAPIError("no data", 404)
+        ):
+            result = _tools_by_name(ChatToolContext())["get_weather_forecast"].invoke({})
+        assert result == {"error": "no data"}
+
+    def test_prediction_tool_truncates_horizon(self, app):
+        predictions = [
+            {"forecast_time": f"2026-01-01T{h:02d}:00:00", "predicted_available_bikes": h} for h in range(24)
+        ]
+        with app.app_context(), patch(
+            "app.services.chat_tools.get_station_predictions", return_value=predictions
+        ):
+            result = _tools_by_name(ChatToolContext())["predict_station_availability"].invoke(
+                {"station_number": 5}
+            )
+        assert result["station_number"] == 5
+        assert len(result["predictions"]) == 12
+
+
+class TestRunToolLoop:
+    def test_answer_without_tools_streams_content(self):
+        model = _ScriptedModel([[AIMessageChunk(content="Hello"), AIMessageChunk(content=" there")]])
+        ctx = ChatToolContext()
+        chunks = list(run_tool_loop(model, [HumanMessage(content="hi")], ctx))
+        assert "".join(c.content for c in chunks) == "Hello there"
+        assert ctx.used_tools is False
+        assert {t.name for t in model.bound_tools} == {
+            "find_station_status",
+            "get_weather_forecast",
+            "predict_station_availability",
+        }
+
+    def test_tool_call_executed_and_result_fed_back(self, app):
+        model = _ScriptedModel(
+            [
+                [_tool_call_chunk("predict_station_availability", {"station_number": 3})],
+                [AIMessageChunk(content="Expect 4 bikes.")],
+            ]
+        )
+        ctx = ChatToolContext()
+        with app.app_context(), patch(
+            "app.services.chat_tools.get_station_predictions",
+            return_value=[{"forecast_time": "t", "predicted_available_bikes": 4}],
+        ):
+            chunks = list(run_tool_loop(model, [HumanMessage(content="bikes at 3?")], ctx))
+
+        assert "".join(c.content for c in chunks) == "Expect 4 bikes."
+        assert ctx.tool_calls == ["predict_station_availability"]
+        tool_messages = [m for m in model.seen[1] if isinstance(m, ToolMessage)]
+        assert len(tool_messages) == 1
+        assert json.loads(tool_messages[0].content)["predictions"][0]["predicted_available_bikes"] == 4
+
+    def test_unknown_tool_reported_to_model(self):
+        model = _ScriptedModel(
+            [[_tool_call_chunk("does_not_exist", {})], [AIMessageChunk(content="Sorry.")]]
+        )
+        list(run_tool_loop(model, [HumanMessage(content="?")], ChatToolContext()))
+        tool_message = [m for m in model.seen[1] if isinstance(m, ToolMessage)][0]
+        assert "unknown tool" in tool_message.content
+
+    def test_tool_rounds_are_bounded(self):
+        rounds = [[_tool_call_chunk("does_not_exist", {}, call_id=f"c{i}")] for i in range(2)]
+        rounds.append([AIMessageChunk(content="Final.")])
+        model = _ScriptedModel(rounds)
+        chunks = list(run_tool_loop(model, [HumanMessage(content="?")], ChatToolContext(), max_rounds=2))
+        assert "".join(c.content for c in chunks) == "Final."
+        assert len(model.seen) == 3
+
+    def test_empty_answer_still_yields_a_message(self):
+        model = _ScriptedModel([[AIMessageChunk(content="")]])
+        chunks = list(run_tool_loop(model, [HumanMessage(content="?")], ChatToolContext()))
+        assert len(chunks) == 1
+        assert chunks[0].content == ""
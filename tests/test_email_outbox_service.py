@@ -0,0 +1,263 @@
+"""
+Unit tests for app.services.email_outbox_service (transactional outbox, batched delivery, retry/backoff).
+
+A FakeSender records messages in-process; TestAgainstSMTPServer delivers through a real SMTP session
+to a local aiosmtpd server and is skipped when aiosmtpd is not installed.
+"""
+
+import smtplib
+import socket
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import config
+from app.models import EmailOutbox
+from app.services.email_outbox_service import (
+    drain_outbox,
+    enqueue_email,
+    enqueue_verification_email,
+    prune_sent_emails,
+    retry_delay,
+    run_outbox_worker,
+    send_outbox_batch,
+)
+from app.services.user_service import register_user
+from app.utils.email import SMTPSender
+
+NOW = datetime(2026, 10, 19, 12, 0, 0)
+
+
+class FakeSender:
+    def __init__(self, errors=None):
+        self.sent = []
+        self.errors = dict(errors or {})  # recipient -> exception
+        self.closed = False
+
+    def send(self, message):
+        error = self.errors.get(message["To"])
+        if error is not None:
+            raise error
+        self.sent.append(message)
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@pytest.fixture()
+def mail_configured():
+    with patch("app.services.email_outbox_service._mail_configured", return_value=True):
+        yield
+
+
+def _queue(db, *recipients, next_attempt_at=NOW):
+    rows = []
+    for recipient in recipients:
+        row = enqueue_email(recipient, "verification_code", {"code": "123456", "expires_minutes": 5})
+        row.next_attempt_at = next_attempt_at
+        rows.append(row)
+    db.session.commit()
+    return rows
+
+
+class TestEnqueue:
+    def test_registration_queues_email_in_same_transaction(self, app, db, mail_configured):
+        with app.app_context():
+            register_user(
+                {"username": "outboxuser", "email": "outbox@example.com", "password": "password123", "avatar_url": None}
+            )
+            row = db.session.scalar(db.select(EmailOutbox))
+        assert row.recipient == "outbox@example.com"
+        assert row.status == "pending"
+        assert "/activate/" in row.context["activation_link"]
+
+    def test_rolled_back_transaction_drops_email(self, app, db, mail_configured):
+        with app.app_context():
+            enqueue_verification_email("gone@example.com", "123456", 5)
+            db.session.rollback()
+            assert db.session.scalar(db.select(db.func.count(EmailOutbox.id))) == 0
+
+    def test_nothing_queued_without_mail_config(self, app, db):
+        with app.app_context():
+            with patch("app.services.email_outbox_service._mail_configured", return_value=False):
+                assert enqueue_verification_email("to@example.com", "123456", 5) is None
+
+    def test_unknown_template_rejected(self, app, db):
+        with app.app_context():
+            with pytest.raises(ValueError):
+                enqueue_email("to@example.com", "nope", {})
+
+
+class TestSendBatch:
+    def test_due_rows_sent_over_one_sender(self, app, db):
+        sender = FakeSender()
+        with app.app_context():
+            rows = _queue(db, "a@example.com", "b@example.com")
+            result = send_outbox_batch(sender, batch_size=10, now=NOW)
+            statuses = [db.session.get(EmailOutbox, row.id).status for row in rows]
+        assert result.sent == 2
+        assert statuses == ["sent", "sent"]
+        assert [m["To"] for m in sender.sent] == ["a@example.com", "b@example.com"]
+        assert "123456" in sender.sent[0].get_body(preferencelist=("plain",)).get_content()
+
+    def test_rows_not_due_are_skipped(self, app, db):
+        sender = FakeSender()
+        with app.app_context():
+            _queue(db, "later@example.com", next_attempt_at=NOW + timedelta(minutes=1))
+            assert send_outbox_batch(sender, now=NOW).claimed == 0
+
+    def test_transient_error_retried_with_backoff(self, app, db):
+        sender = FakeSender({"a@example.com": smtplib.SMTPResponseException(451, b"try later")})
+        with app.app_context():
+            (row,) = _queue(db, "a@example.com")
+            result = send_outbox_batch(sender, now=NOW)
+            row = db.session.get(EmailOutbox, row.id)
+            assert result.retried == 1
+            assert row.status == "pending"
+            assert row.attempts == 1
+            assert row.next_attempt_at == NOW + timedelta(seconds=retry_delay(1))
+            assert "451" in row.last_error
+
+    def test_permanent_rejection_fails_immediately(self, app, db):
+        sender = FakeSender({"bad@example.com": smtplib.SMTPRecipientsRefused({"bad@example.com": (550, b"no such user")})})
+        with app.app_context():
+            (row,) = _queue(db, "bad@example.com")
+            result = send_outbox_batch(sender, now=NOW)
+            assert result.failed == 1
+            assert db.session.get(EmailOutbox, row.id).status == "failed"
+
+    def test_failed_after_max_attempts(self, app, db):
+        sender = FakeSender({"a@example.com": smtplib.SMTPResponseException(421, b"busy")})
+        with app.app_context(), patch.object(config, "EMAIL_OUTBOX_MAX_ATTEMPTS", 2):
+            (row,) = _queue(db, "a@example.com")
+            send_outbox_batch(sender, now=NOW)
+            send_outbox_batch(sender, now=NOW + timedelta(days=1))
+            assert db.session.get(EmailOutbox, row.id).status == "failed"
+
+    def test_connection_error_stops_batch(self, app, db):
+        sender = FakeSender({"a@example.com": smtplib.SMTPServerDisconnected("gone")})
+        with app.app_context():
+            first, second = _queue(db, "a@example.com", "b@example.com")
+            result = send_outbox_batch(sender, now=NOW)
+            assert result.retried == 1
+            assert db.session.get(EmailOutbox, second.id).attempts == 0
+        assert sender.sent == []
+
+    def test_rejected_login_leaves_row_pending(self, app, db):
+        smtp = MagicMock()
+        smtp.login.side_effect = smtplib.SMTPAuthenticationError(535, b"5.7.8 authentication failed")
+        with app.app_context(), patch("app.utils.email.smtplib.SMTP", return_value=smtp):
+            first, second = _queue(db, "a@example.com", "b@example.com")
+            with SMTPSender("smtp.example.com", 587, "user", "wrong") as sender:
+                result = drain_outbox(sender, now=NOW)
+            first = db.session.get(EmailOutbox, first.id)
+            assert (first.status, first.attempts) == ("pending", 0)
+            assert first.next_attempt_at == NOW + timedelta(seconds=retry_delay(1))
+            assert "535" in first.last_error
+            assert db.session.get(EmailOutbox, second.id).last_error is None
+        assert result.failed == 0
+        assert "535" in result.connection_error
+        smtp.send_message.assert_not_called()
+        smtp.close.assert_called_once()
+
+    def test_backoff_doubles_and_is_capped(self):
+        with patch.multiple(config, EMAIL_OUTBOX_RETRY_BASE_SECONDS=30, EMAIL_OUTBOX_RETRY_MAX_SECONDS=100):
+            assert [retry_delay(n) for n in (1, 2, 3, 4)] == [30, 60, 100, 100]
+
+
+class TestDrainAndWorker:
+    def test_drain_sends_every_batch(self, app, db):
+        sender = FakeSender()
+        with app.app_context():
+            _queue(db, *(f"u{i}@example.com" for i in range(5)))
+            result = drain_outbox(sender, batch_size=2, now=NOW)
+        assert result.sent == 5
+        assert len(sender.sent) == 5
+
+    def test_worker_cycle_closes_sender(self, app, db):
+        sender = FakeSender()
+        with app.app_context():
+            _queue(db, "a@example.com", next_attempt_at=datetime.utcnow())
+            runs = run_outbox_worker(interval=0, max_runs=1, sender_factory=lambda: sender)
+        assert runs == 1
+        assert len(sender.sent) == 1
+        assert sender.closed
+
+    def test_worker_backs_off_while_smtp_is_down(self, app, db):
+        sender = FakeSender({"a@example.com": smtplib.SMTPConnectError(421, b"unavailable")})
+        stop_event = MagicMock()
+        stop_event.is_set.return_value = False
+        with app.app_context():
+            _queue(db, "a@example.com", next_attempt_at=datetime.utcnow() - timedelta(hours=1))
+            with patch.multiple(config, EMAIL_OUTBOX_RETRY_BASE_SECONDS=30, EMAIL_OUTBOX_RETRY_MAX_SECONDS=900):
+                with patch("app.services.email_outbox_service.datetime") as clock:
+                    # Every cycle sees the row due again
+                    clock.utcnow.side_effect = lambda: datetime.utcnow() + timedelta(hours=clock.utcnow.call_count)
+                    run_outbox_worker(interval=5, max_runs=3, stop_event=stop_event, sender_factory=lambda: sender)
+        assert [c.args[0] for c in stop_event.wait.call_args_list] == [30, 60]
+
+    def test_prune_sent_emails(self, app, db):
+        with app.app_context():
+            old, recent = _queue(db, "old@example.com", "recent@example.com")
+            old.status, old.sent_at = "sent", NOW - timedelta(days=2)
+            recent.status, recent.sent_at = "sent", NOW
+            db.session.commit()
+            assert prune_sent_emails(now=NOW) == 1
+            assert [r.recipient for r in db.session.scalars(db.select(EmailOutbox))] == ["recent@example.com"]
+
+    def test_send_command(self, app, db):
+        sender = FakeSender()
+        with app.app_context():
+            _queue(db, "cli@example.com", next_attempt_at=datetime.utcnow())
+        with patch("app.commands.email._mail_configured", return_value=True):
+            with patch("app.commands.email.SMTPSender.from_config", return_value=sender):
+                result = app.test_cli_runner().invoke(args=["email", "send"])
+        assert result.exit_code == 0, result.output
+        assert "Sent 1" in result.output
+
+
+@pytest.fixture()
+def smtp_server():
+    pytest.importorskip("aiosmtpd")
+    from aiosmtpd.controller import Controller
+
+    class _Handler:
+        def __init__(self):
+            self.messages = []
+            self.sessions = set()
+
+        async def handle_DATA(self, server, session, envelope):
+            self.messages.append(envelope)
+            self.sessions.add(id(session))
+            return "250 OK"
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    handler = _Handler()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        yield handler, port
+    finally:
+        controller.stop()
+
+
+class TestAgainstSMTPServer:
+    def test_batch_delivered_over_one_connection(self, app, db, smtp_server):
+        handler, port = smtp_server
+        with app.app_context():
+            _queue(db, "a@example.com", "b@example.com", "c@example.com")
+            with SMTPSender("127.0.0.1", port) as sender:
+                result = drain_outbox(sender, now=NOW)
+        assert result.sent == 3
+        assert sender.connections == 1
+        assert len(handler.sessions) == 1
+        assert sorted(env.rcpt_tos[0] for env in handler.messages) == ["a@example.com", "b@example.com", "c@example.com"]
@@ -1,12 +1,11 @@
 """
 Unit tests for app/utils/email.py.
 
-Tests verify the mail-configuration guard, the HTML rendering helper, and the
-async dispatch path – without ever connecting to a real SMTP server.
+Tests verify the mail-configuration guard, the rendering helpers, and the
+SMTP connection reuse – without ever connecting to a real SMTP server.
 """
 
-import os
-from unittest.mock import patch, MagicMock, mock_open
+from unittest.mock import patch, MagicMock
 
 import pytest
 
@@ -60,134 +59,165 @@ class TestMailConfigured:
 
 
 class TestRenderVerificationHtml:
+    TEMPLATE = (
+        "<html>{code} expires in {expires_minutes} minutes."
+        "{activation_link_section}</html>"
+    )
+
+    @pytest.fixture(autouse=True)
     def _template(self):
-        return (
-            "<html>{code} expires in {expires_minutes} minutes."
-            "{activation_link_section}</html>"
-        )
+        from app.utils.email import CompiledTemplate
+
+        compiled = CompiledTemplate(self.TEMPLATE, ("code", "expires_minutes", "activation_link_section"))
+        with patch("app.utils.email._verification_html", compiled):
+            yield
 
     def test_renders_code_and_expiry(self):
         from app.utils.email import _render_verification_html
 
-        with patch("builtins.open", mock_open(read_data=self._template())):
-            html = _render_verification_html("123456", 5)
+        html = _render_verification_html("123456", 5)
         assert "123456" in html
         assert "5 minutes" in html
 
     def test_no_activation_link_section_when_no_link(self):
         from app.utils.email import _render_verification_html
 
-        with patch("builtins.open", mock_open(read_data=self._template())):
-            html = _render_verification_html("654321", 10)
+        html = _render_verification_html("654321", 10)
         # activation_link_section placeholder should be replaced with empty string
         assert "{activation_link_section}" not in html
 
     def test_activation_link_section_present_when_token_given(self):
         from app.utils.email import _render_verification_html
 
-        with patch("builtins.open", mock_open(read_data=self._template())):
-            html = _render_verification_html(
-                "111111", 5, activation_link="http://example.com/activate/abc"
-            )
+        html = _render_verification_html(
+            "111111", 5, activation_link="http://example.com/activate/abc"
+        )
         assert "http://example.com/activate/abc" in html
 
+    def test_template_not_read_per_render(self):
+        from app.utils.email import _render_verification_html
+
+        with patch("builtins.open") as mock_file:
+            _render_verification_html("111111", 5)
+        mock_file.assert_not_called()
+
 
 # ---------------------------------------------------------------------------
-# send_verification_code_email_async
+# CompiledTemplate
 # ---------------------------------------------------------------------------
 
 
-class TestSendVerificationCodeEmailAsync:
-    def test_does_nothing_when_mail_not_configured(self):
-        """If mail is not configured, the function should return without submitting."""
-        from app.utils import email as email_mod
+class TestCompiledTemplate:
+    def test_matches_str_replace(self):
+        from app.utils.email import CompiledTemplate
+
+        text = "a {x} b {y} c {x}"
+        assert CompiledTemplate(text, ("x", "y")).render(x=1, y="two") == text.replace("{x}", "1").replace("{y}", "two")
+
+    def test_undeclared_braces_left_alone(self):
+        from app.utils.email import CompiledTemplate
+
+        text = "p { color: red; } {x} {other}"
+        assert CompiledTemplate(text, ("x",)).render(x="X") == "p { color: red; } X {other}"
+
+    def test_values_are_not_reinterpreted(self):
+        from app.utils.email import CompiledTemplate
+
+        # str.replace chains would substitute a placeholder that appears inside an earlier value
+        assert CompiledTemplate("{x}{y}", ("x", "y")).render(x="{y}", y="Y") == "{y}Y"
 
-        with patch.object(email_mod, "_mail_configured", return_value=False):
-            with patch.object(email_mod._email_executor, "submit") as mock_submit:
-                email_mod.send_verification_code_email_async(
-                    "to@example.com", "123456", 5
-                )
-            mock_submit.assert_not_called()
+    def test_verification_template_fields(self):
+        from app.utils.email import _VERIFICATION_TEMPLATE, _load_template
 
-    def test_submits_task_when_configured(self, app):
-        """When mail IS configured, a background task should be submitted."""
-        from app.utils import email as email_mod
+        compiled = _load_template(_VERIFICATION_TEMPLATE, ("code", "expires_minutes", "activation_link_section"))
+        html = compiled.render(code="424242", expires_minutes=5, activation_link_section="")
+        assert "424242" in html
+        assert "{code}" not in html and "{expires_minutes}" not in html
 
-        with app.app_context():
-            with patch.object(email_mod, "_mail_configured", return_value=True):
-                with patch.object(
-                    email_mod._email_executor, "submit"
-                ) as mock_submit:
-                    email_mod.send_verification_code_email_async(
-                        "to@example.com", "654321", 10
-                    )
-            mock_submit.assert_called_once()
+    def test_missing_value_raises(self):
+        from app.utils.email import CompiledTemplate
+
+        with pytest.raises(KeyError):
+            CompiledTemplate("{x}", ("x",)).render()
 
 
 # ---------------------------------------------------------------------------
-# _send_verification_code_with_flask_mail
+# build_verification_message
 # ---------------------------------------------------------------------------
 
 
-class TestSendVerificationCodeWithFlaskMail:
-    def test_does_nothing_when_mail_not_configured(self, app):
-        from app.utils import email as email_mod
-
-        with patch.object(email_mod, "_mail_configured", return_value=False):
-            # Should return without error
-            email_mod._send_verification_code_with_flask_mail(
-                app, "to@example.com", "123456", 5
-            )
-
-    def test_sends_message_when_configured(self, app):
-        from app.utils import email as email_mod
-
-        fake_mail = MagicMock()
-        # Patch _mail_configured and mail instance
-        with patch.object(email_mod, "_mail_configured", return_value=True):
-            with patch.object(email_mod, "_render_verification_html", return_value="<html>body</html>"):
-                with app.app_context():
-                    app.extensions["mail"] = fake_mail
-                    email_mod._send_verification_code_with_flask_mail(
-                        app, "to@example.com", "999999", 5
-                    )
-        fake_mail.send.assert_called_once()
-
-    def test_activation_link_included_when_token_provided(self, app):
-        from app.utils import email as email_mod
+class TestBuildVerificationMessage:
+    def test_plain_text_and_html_parts(self):
+        from app.utils.email import build_verification_message
+
+        msg = build_verification_message("to@example.com", "222222", 5, sender="no-reply@example.com")
+        assert msg["To"] == "to@example.com"
+        assert msg["From"] == "no-reply@example.com"
+        text = msg.get_body(preferencelist=("plain",)).get_content()
+        html = msg.get_body(preferencelist=("html",)).get_content()
+        assert "222222" in text and "222222" in html
+
+    def test_activation_link_included_when_given(self):
+        from app.utils.email import activation_link_for, build_verification_message
         import config as cfg
 
-        captured_body = {}
-
-        def fake_send(msg):
-            captured_body["body"] = msg.body
-
-        fake_mail = MagicMock()
-        fake_mail.send.side_effect = fake_send
-
-        with patch.object(email_mod, "_mail_configured", return_value=True):
-            with patch.object(email_mod, "_render_verification_html", return_value="<html>body</html>"):
-                with patch.object(cfg, "FRONTEND_BASE_URL", "http://localhost:5173"):
-                    with app.app_context():
-                        app.extensions["mail"] = fake_mail
-                        email_mod._send_verification_code_with_flask_mail(
-                            app, "to@example.com", "000000", 5,
-                            activation_token="mytoken"
-                        )
-        assert "http://localhost:5173/activate/mytoken" in captured_body.get("body", "")
-
-    def test_mail_send_exception_is_silenced(self, app):
-        """A send failure must not propagate — just print and continue."""
-        from app.utils import email as email_mod
-
-        fake_mail = MagicMock()
-        fake_mail.send.side_effect = Exception("SMTP error")
-
-        with patch.object(email_mod, "_mail_configured", return_value=True):
-            with patch.object(email_mod, "_render_verification_html", return_value="<html>"):
-                with app.app_context():
-                    app.extensions["mail"] = fake_mail
-                    # Should not raise
-                    email_mod._send_verification_code_with_flask_mail(
-                        app, "to@example.com", "111111", 5
-                    )
+        with patch.object(cfg, "FRONTEND_BASE_URL", "http://localhost:5173"):
+            link = activation_link_for("mytoken")
+        msg = build_verification_message("to@example.com", "000000", 5, link, sender="a@example.com")
+        assert link == "http://localhost:5173/activate/mytoken"
+        assert link in msg.get_body(preferencelist=("plain",)).get_content()
+
+    def test_no_link_without_token(self):
+        from app.utils.email import activation_link_for
+
+        assert activation_link_for(None) == ""
+
+
+# ---------------------------------------------------------------------------
+# SMTPSender
+# ---------------------------------------------------------------------------
+
+
+class TestSMTPSender:
+    def _message(self):
+        from app.utils.email import build_verification_message
+
+        return build_verification_message("to@example.com", "333333", 5, sender="a@example.com")
+
+    def test_one_connection_for_many_messages(self):
+        from app.utils.email import SMTPSender
+
+        with patch("app.utils.email.smtplib.SMTP") as mock_smtp:
+            with SMTPSender("smtp.example.com", 587, "user", "pass", use_tls=True) as sender:
+                sender.send(self._message())
+                sender.send(self._message())
+        mock_smtp.assert_called_once_with("smtp.example.com", 587, timeout=30.0)
+        conn = mock_smtp.return_value
+        conn.starttls.assert_called_once()
+        conn.login.assert_called_once_with("user", "pass")
+        assert conn.send_message.call_count == 2
+        conn.quit.assert_called_once()
+
+    def test_reconnects_once_when_idle_connection_dropped(self):
+        import smtplib
+        from app.utils.email import SMTPSender
+
+        with patch("app.utils.email.smtplib.SMTP") as mock_smtp:
+            stale, fresh = MagicMock(), MagicMock()
+            stale.send_message.side_effect = [None, smtplib.SMTPServerDisconnected("timeout")]
+            mock_smtp.side_effect = [stale, fresh]
+            sender = SMTPSender("smtp.example.com", 25)
+            sender.send(self._message())
+            sender.send(self._message())
+        fresh.send_message.assert_called_once()
+        assert sender.connections == 2
+
+    def test_connection_closed_after_transport_error(self):
+        from app.utils.email import SMTPSender
+
+        with patch("app.utils.email.smtplib.SMTP") as mock_smtp:
+            mock_smtp.return_value.send_message.side_effect = OSError("reset")
+            sender = SMTPSender("smtp.example.com", 25)
+            with pytest.raises(OSError):
+                sender.send(self._message())
+        assert sender._smtp is None
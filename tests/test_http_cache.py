@@ -0,0 +1,160 @@
+"""
+Unit tests for app.utils.http_cache (conditional responses, validators, response compression)
+and the ETag / compression behaviour of the snapshot-backed station endpoints.
+"""
+
+import gzip
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from flask import Flask, Response
+
+import config
+from app.utils import http_cache
+from app.utils.http_cache import cache_control, compress_response, conditional_response, variant_etag
+
+BIG = {"rows": [{"number": i, "name": f"STATION {i}"} for i in range(200)]}
+
+
+@pytest.fixture()
+def mini_app():
+    app = Flask(__name__)
+    builds = []
+
+    @app.get("/data")
+    def data():
+        def build():
+            builds.append(1)
+            return Response(json.dumps(BIG), mimetype="application/json")
+
+        return conditional_response("v1", build, last_modified=datetime(2026, 10, 19, 12, 0, 0), max_age=30)
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    app.after_request(compress_response)
+    app.builds = builds
+    return app
+
+
+class TestConditionalResponse:
+    def test_validators_set(self, mini_app):
+        resp = mini_app.test_client().get("/data")
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] == '"v1"'
+        assert resp.headers["Cache-Control"] == "public, max-age=30"
+        assert resp.headers["Last-Modified"] == "Mon, 19 Oct 2026 12:00:00 GMT"
+        assert "Accept-Encoding" in resp.headers["Vary"]
+
+    def test_matching_etag_is_304_without_building(self, mini_app):
+        resp = mini_app.test_client().get("/data", headers={"If-None-Match": '"v1"'})
+        assert resp.status_code == 304
+        assert resp.data == b""
+        assert resp.headers["ETag"] == '"v1"'
+        assert mini_app.builds == []
+
+    def test_compressed_variant_etag_also_matches(self, mini_app):
+        resp = mini_app.test_client().get("/data", headers={"If-None-Match": '"v1-gzip"'})
+        assert resp.status_code == 304
+        assert resp.headers["ETag"] == '"v1-gzip"'
+
+    def test_stale_etag_gets_body(self, mini_app):
+        resp = mini_app.test_client().get("/data", headers={"If-None-Match": '"v0"'})
+        assert resp.status_code == 200
+        assert mini_app.builds == [1]
+
+    def test_if_modified_since(self, mini_app):
+        client = mini_app.test_client()
+        assert client.get("/data", headers={"If-Modified-Since": "Mon, 19 Oct 2026 12:00:00 GMT"}).status_code == 304
+        assert client.get("/data", headers={"If-Modified-Since": "Mon, 19 Oct 2026 11:59:59 GMT"}).status_code == 200
+
+    def test_cache_control_zero_is_no_cache(self):
+        assert cache_control(0) == "no-cache"
+        assert cache_control(60, public=False) == "private, max-age=60"
+
+
+class TestCompression:
+    def test_large_json_gzipped_with_variant_etag(self, mini_app):
+        resp = mini_app.test_client().get("/data", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert resp.headers["ETag"] == f'"{variant_etag("v1", "gzip")}"'
+        assert json.loads(gzip.decompress(resp.data)) == BIG
+        assert int(resp.headers["Content-Length"]) == len(resp.data)
+
+    def test_compressed_bytes_reused_per_etag(self, mini_app):
+        client = mini_app.test_client()
+        calls = []
+
+        def counting_gzip(body):
+            calls.append(1)
+            return gzip.compress(body, mtime=0)
+
+        with patch.dict(http_cache.ENCODERS, {"gzip": counting_gzip}):
+            first = client.get("/data", headers={"Accept-Encoding": "gzip"})
+            second = client.get("/data", headers={"Accept-Encoding": "gzip"})
+        assert first.data == second.data
+        assert calls == [1]
+
+    def test_not_compressed_without_accept_encoding(self, mini_app):
+        resp = mini_app.test_client().get("/data", headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in resp.headers
+        assert json.loads(resp.data) == BIG
+
+    def test_small_body_left_alone(self, mini_app):
+        resp = mini_app.test_client().get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in resp.headers
+
+    def test_brotli_preferred_when_installed(self, mini_app):
+        brotli = pytest.importorskip("brotli")
+        resp = mini_app.test_client().get("/data", headers={"Accept-Encoding": "gzip, br"})
+        assert resp.headers["Content-Encoding"] == "br"
+        assert json.loads(brotli.decompress(resp.data)) == BIG
+
+
+class TestStationEndpoints:
+    def test_station_list_304_skips_encoding(self, client, db, make_station):
+        make_station(number=1)
+        first = client.get("/api/stations/")
+        etag = first.headers["ETag"]
+        assert first.headers["Cache-Control"] == f"public, max-age={config.HTTP_MAX_AGE_STATIONS}"
+        with patch("app.api.serialization.encode_snapshot") as encode:
+            second = client.get("/api/stations/", headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        encode.assert_not_called()
+
+    def test_etag_differs_per_representation(self, client, db, make_station):
+        make_station(number=1)
+        rows = client.get("/api/stations/").headers["ETag"]
+        columnar = client.get("/api/stations/?format=columnar").headers["ETag"]
+        assert rows != columnar
+
+    def test_etag_changes_with_station_table(self, client, db, make_station):
+        make_station(number=1)
+        before = client.get("/api/stations/").headers["ETag"]
+        make_station(number=2)
+        from app.services.station_service import station_snapshots
+
+        station_snapshots.invalidate()
+        assert client.get("/api/stations/", headers={"If-None-Match": before}).status_code == 200
+
+    def test_status_last_modified_from_scrape_time(self, client, db, make_station, make_availability):
+        make_station(number=3)
+        make_availability(number=3, timestamp=datetime(2026, 10, 19, 8, 30, 15))
+        resp = client.get("/api/stations/status")
+        assert resp.headers["Last-Modified"] == "Mon, 19 Oct 2026 08:30:15 GMT"
+
+    def test_large_station_list_gzipped(self, client, db, make_station):
+        for number in range(1, 30):
+            make_station(number=number, name=f"Station {number}", address=f"{number} Long Street Name, Dublin")
+        resp = client.get("/api/stations/", headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert len(json.loads(gzip.decompress(resp.data))["data"]) == 29
+
+    def test_weather_last_modified(self, client, db):
+        with patch("app.api.weather_routes.get_weather", return_value={"current": {"dt": 1, "temp": 1.0, "weather": []}, "hourly": []}):
+            resp = client.get("/api/weather")
+        assert resp.headers["Cache-Control"] == f"public, max-age={config.HTTP_MAX_AGE_WEATHER}"
+        assert "Last-Modified" in resp.headers
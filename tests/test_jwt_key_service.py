@@ -0,0 +1,105 @@
+"""
+Unit tests for app.services.jwt_key_service (HS256 / EdDSA / RS256 access-token keys and JWKS).
+"""
+
+from unittest.mock import patch
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+from app.services.jwt_key_service import JWTKeyError, load_access_token_keys
+from app.services.user_service import create_access_token, verify_access_token
+
+PATCH_KEYS = "app.services.user_service.access_token_keys"
+
+
+def _pem(private_key) -> bytes:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+@pytest.fixture(scope="module", params=["EdDSA", "RS256"])
+def asymmetric_keys(request):
+    if request.param == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return load_access_token_keys(request.param, private_key_pem=_pem(private_key))
+
+
+class TestLoadAccessTokenKeys:
+    def test_hs256_uses_secret_and_publishes_nothing(self):
+        keys = load_access_token_keys("HS256", secret="s3cret")
+        assert keys.signing_key == keys.verification_key == "s3cret"
+        assert keys.headers is None
+        assert keys.jwks() == {"keys": []}
+
+    def test_asymmetric_keys_are_parsed_objects(self, asymmetric_keys):
+        assert not isinstance(asymmetric_keys.signing_key, (str, bytes))
+        assert asymmetric_keys.kid
+        assert asymmetric_keys.headers == {"kid": asymmetric_keys.kid}
+
+    def test_key_type_must_match_algorithm(self):
+        pem = _pem(ed25519.Ed25519PrivateKey.generate())
+        with pytest.raises(JWTKeyError):
+            load_access_token_keys("RS256", private_key_pem=pem)
+
+    def test_missing_private_key(self):
+        with pytest.raises(JWTKeyError):
+            load_access_token_keys("EdDSA")
+
+    def test_unsupported_algorithm(self):
+        with pytest.raises(JWTKeyError):
+            load_access_token_keys("HS512", secret="x")
+
+    def test_explicit_kid(self):
+        pem = _pem(ed25519.Ed25519PrivateKey.generate())
+        assert load_access_token_keys("EdDSA", private_key_pem=pem, kid="2026-10").kid == "2026-10"
+
+
+class TestAsymmetricAccessTokens:
+    def test_round_trip_through_user_service(self, app, db, make_user, asymmetric_keys):
+        with app.app_context(), patch(PATCH_KEYS, asymmetric_keys):
+            user = make_user()
+            token = create_access_token(user.id, user.token_version)
+            assert verify_access_token(token)["sub"] == user.id
+        header = jwt.get_unverified_header(token)
+        assert header["alg"] == asymmetric_keys.algorithm
+        assert header["kid"] == asymmetric_keys.kid
+
+    def test_peer_can_verify_with_published_jwk(self, asymmetric_keys):
+        with patch(PATCH_KEYS, asymmetric_keys):
+            token = create_access_token(42, 0)
+        jwk = asymmetric_keys.jwks()["keys"][0]
+        assert "d" not in jwk  # private part never published
+        public = jwt.PyJWK(jwk)
+        payload = jwt.decode(token, public.key, algorithms=[jwk["alg"]])
+        assert payload["sub"] == "42"
+
+    def test_hs256_token_rejected_when_asymmetric(self, app, db, make_user, asymmetric_keys):
+        from app.services.user_service import AuthError
+
+        with app.app_context():
+            user = make_user()
+            hs_token = create_access_token(user.id, user.token_version)
+            with patch(PATCH_KEYS, asymmetric_keys), pytest.raises(AuthError):
+                verify_access_token(hs_token)
+
+
+class TestJwksEndpoint:
+    def test_empty_for_hs256(self, client):
+        resp = client.get("/.well-known/jwks.json")
+        assert resp.status_code == 200
+        assert resp.get_json() == {"keys": []}
+
+    def test_publishes_public_key(self, client, asymmetric_keys):
+        with patch("app.api.jwks_routes.access_token_keys", asymmetric_keys):
+            resp = client.get("/.well-known/jwks.json")
+        body = resp.get_json()
+        assert body["keys"][0]["kid"] == asymmetric_keys.kid
+        assert "max-age" in resp.headers["Cache-Control"]
@@ -0,0 +1,96 @@
+"""
+Unit tests for app.ml.features: the vectorised feature builder shared by training and prediction,
+checked for parity against the per-row construction it replaced and the notebook's pandas features.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.features import FEATURE_DTYPE, FEATURES, build_features, calendar_columns, model_input
+
+
+def _reference_row(number, capacity, lat, lon, dt, temperature, humidity, pressure):
+    """The per-row loop get_station_predictions used before the vectorised builder."""
+    day_of_week = dt.weekday()
+    return {
+        "station_id": number,
+        "capacity": capacity,
+        "lat": lat,
+        "lon": lon,
+        "hour": dt.hour,
+        "day": dt.day,
+        "day_of_week": day_of_week,
+        "is_weekend": 1 if day_of_week >= 5 else 0,
+        "avg_temperature": temperature,
+        "avg_humidity": humidity,
+        "avg_pressure": pressure,
+    }
+
+
+def _random_inputs(seed, rows=500):
+    rng = random.Random(seed)
+    start = datetime(2023, 12, 25)
+    stations = [rng.randint(1, 120) for _ in range(rows)]
+    capacities = [rng.randint(10, 40) for _ in range(rows)]
+    lats = [53.3 + rng.random() / 10 for _ in range(rows)]
+    lons = [-6.3 + rng.random() / 10 for _ in range(rows)]
+    # Spans month ends, the 2024 leap day and year ends
+    times = [start + timedelta(minutes=rng.randint(0, 60 * 24 * 800)) for _ in range(rows)]
+    temperatures = [rng.uniform(-5, 30) for _ in range(rows)]
+    humidities = [rng.choice([None, rng.randint(30, 100)]) for _ in range(rows)]
+    pressures = [rng.randint(960, 1040) for _ in range(rows)]
+    return stations, capacities, lats, lons, times, temperatures, humidities, pressures
+
+
+class TestParity:
+    @pytest.mark.parametrize("seed", range(3))
+    def test_matches_per_row_construction(self, seed):
+        inputs = _random_inputs(seed)
+        expected = pd.DataFrame([_reference_row(*row) for row in zip(*inputs)])[list(FEATURES)]
+        matrix = build_features(*inputs)
+        assert matrix.dtype == FEATURE_DTYPE
+        assert matrix.shape == (500, len(FEATURES))
+        np.testing.assert_array_equal(matrix, expected.to_numpy(dtype=np.float64).astype(FEATURE_DTYPE))
+
+    def test_matches_notebook_calendar_features(self):
+        times = _random_inputs(0)[4]
+        frame = pd.DataFrame({"ts": times})
+        columns = calendar_columns(times)
+        np.testing.assert_array_equal(columns["day_of_week"], frame["ts"].dt.dayofweek)
+        np.testing.assert_array_equal(columns["is_weekend"], frame["ts"].dt.dayofweek.apply(lambda x: 1 if x >= 5 else 0))
+        np.testing.assert_array_equal(columns["day"], frame["ts"].dt.day)
+        np.testing.assert_array_equal(columns["hour"], frame["ts"].dt.hour)
+
+
+class TestBuildFeatures:
+    def test_station_scalars_broadcast_over_hours(self):
+        times = [datetime(2026, 10, 17, h) for h in (22, 23)] + [datetime(2026, 10, 18, 0)]
+        matrix = build_features(42, 20, 53.3, -6.2, times, [10.0] * 3, [80] * 3, [1011] * 3)
+        assert matrix[:, FEATURES.index("station_id")].tolist() == [42, 42, 42]
+        assert matrix[:, FEATURES.index("hour")].tolist() == [22, 23, 0]
+        assert matrix[:, FEATURES.index("day")].tolist() == [17, 17, 18]
+        assert matrix[:, FEATURES.index("is_weekend")].tolist() == [1, 1, 1]
+
+    def test_requested_column_subset_and_order(self):
+        matrix = build_features(42, 20, 53.3, -6.2, [datetime(2026, 10, 19, 8)], [10.0], [None], [1011], ["hour", "station_id", "avg_humidity"])
+        assert matrix[0, :2].tolist() == [8, 42]
+        assert np.isnan(matrix[0, 2])
+        assert matrix.flags.c_contiguous
+
+    def test_datetime64_input(self):
+        times = np.array(["2026-10-19T08:59:59"], dtype="datetime64[s]")
+        assert calendar_columns(times)["hour"].tolist() == [8]
+
+    def test_model_input(self):
+        matrix = np.zeros((1, 2), dtype=FEATURE_DTYPE)
+
+        class Fitted:
+            feature_names_in_ = np.array(["hour", "day"])
+
+        assert model_input(object(), matrix, ["hour", "day"]) is matrix
+        frame = model_input(Fitted(), matrix, ["hour", "day"])
+        assert list(frame.columns) == ["hour", "day"]
@@ -0,0 +1,164 @@
+"""
+Unit tests for app.ml.registry (per-worker model registry with manifest watcher and atomic swap)
+and the /api/model/status endpoint.
+
+Each test promotes small picklable stand-in models into its own MODEL_DIR under tmp_path.
+"""
+
+import os
+import pickle
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+import config
+from app.ml import artifacts
+from app.ml.registry import ModelRegistry, model_registry
+
+
+@pytest.fixture()
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "MODEL_DIR", str(tmp_path))
+    return str(tmp_path)
+
+
+@pytest.fixture()
+def registry(model_dir):
+    r = ModelRegistry(check_seconds=0.01)
+    yield r
+    r.stop()
+
+
+def _promote(version, mtime, model=None):
+    artifacts.write_artifact(model if model is not None else {"version": version}, ["hour"], version, {"metrics": {"mae": 1.5}})
+    artifacts.promote_version(version)
+    # Distinct mtimes: two promotions within one filesystem tick must still be told apart
+    os.utime(artifacts.manifest_path(), ns=(mtime, mtime))
+
+
+class TestLoading:
+    def test_first_use_loads_promoted_version(self, registry):
+        _promote("v1", 1_000)
+        loaded = registry.current()
+        assert (loaded.model, loaded.version, loaded.features) == ({"version": "v1"}, "v1", ["hour"])
+        assert registry.current() is loaded
+
+    def test_missing_model_raises(self, registry):
+        with pytest.raises(FileNotFoundError):
+            registry.current()
+
+    def test_legacy_pickles_without_manifest(self, registry, model_dir):
+        for name, value in ((artifacts.LEGACY_MODEL_NAME, {"legacy": True}), (artifacts.LEGACY_FEATURES_NAME, ["hour"])):
+            with open(os.path.join(model_dir, name), "wb") as f:
+                pickle.dump(value, f)
+        assert registry.current().version == "legacy"
+        _promote("v1", 1_000)
+        assert registry.check() is True
+        assert registry.current().version == "v1"
+
+
+class TestCheck:
+    def test_unchanged_manifest_is_not_reread(self, registry):
+        _promote("v1", 1_000)
+        registry.current()
+        with patch("app.ml.registry.read_manifest") as read:
+            assert registry.check() is False
+        read.assert_not_called()
+
+    def test_new_version_swapped_in(self, registry):
+        _promote("v1", 1_000)
+        before = registry.current()
+        _promote("v2", 2_000)
+        assert registry.check() is True
+        after = registry.current()
+        assert after.model == {"version": "v2"}
+        # The reference taken before the swap still holds the old model
+        assert before.model == {"version": "v1"}
+
+    def test_repromoting_same_version_keeps_model(self, registry):
+        _promote("v1", 1_000)
+        loaded = registry.current()
+        artifacts.promote_version("v1")
+        os.utime(artifacts.manifest_path(), ns=(3_000, 3_000))
+        assert registry.check() is False
+        assert registry.current() is loaded
+
+    def test_broken_version_keeps_previous(self, registry, model_dir):
+        _promote("v1", 1_000)
+        registry.current()
+        _promote("v2", 2_000)
+        os.unlink(os.path.join(model_dir, "bike_availability_model-v2.pkl"))
+        assert registry.check() is False
+        assert registry.current().version == "v1"
+        assert "FileNotFoundError" in registry.status()["last_error"]
+        # Not retried on every check, only after the manifest changes again
+        with patch("app.ml.registry.load_artifact") as load:
+            registry.check()
+        load.assert_not_called()
+
+    def test_rollback(self, registry):
+        _promote("v1", 1_000)
+        _promote("v2", 2_000)
+        assert registry.current().version == "v2"
+        artifacts.promote_version("v1")
+        os.utime(artifacts.manifest_path(), ns=(3_000, 3_000))
+        registry.check()
+        assert registry.current().version == "v1"
+
+
+class TestWatcher:
+    def test_thread_swaps_without_request_path_loading(self, registry):
+        _promote("v1", 1_000)
+        registry.current()
+        registry.start()
+        _promote("v2", 2_000)
+        deadline = time.monotonic() + 5
+        while registry.current().version != "v2" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert registry.current().version == "v2"
+        assert registry.status()["watching"] is True
+
+    def test_readers_never_see_a_partial_swap(self, registry):
+        _promote("v1", 1_000)
+        registry.current()
+        seen, stop = set(), threading.Event()
+
+        def read():
+            while not stop.is_set():
+                loaded = registry.current()
+                seen.add((loaded.version, loaded.model["version"]))
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for i, version in enumerate(("v2", "v3", "v4"), start=2):
+            _promote(version, i * 1_000)
+            registry.check()
+        stop.set()
+        for reader in readers:
+            reader.join()
+        assert all(version == model_version for version, model_version in seen)
+
+    def test_start_is_idempotent(self, registry):
+        registry.start()
+        thread = registry._thread
+        registry.start()
+        assert registry._thread is thread
+
+
+class TestStatusEndpoint:
+    def test_reports_active_version(self, client, model_dir):
+        _promote("v1", 1_000)
+        model_registry.current()
+        data = client.get("/api/model/status").get_json()["data"]
+        assert data["loaded"] is True
+        assert data["version"] == "v1"
+        assert data["metrics"] == {"mae": 1.5}
+        assert data["loaded_at"] is not None
+
+    def test_nothing_loaded(self, client, model_dir):
+        resp = client.get("/api/model/status")
+        assert resp.status_code == 200
+        assert resp.get_json()["data"]["loaded"] is False
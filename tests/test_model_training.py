@@ -0,0 +1,142 @@
+"""
+Unit tests for app.ml (versioned artifacts and the chunked training pipeline) and the
+`flask model` commands.
+
+Artifacts are written to a per-test MODEL_DIR under tmp_path.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import config
+from app.ml import artifacts
+from app.ml.features import FEATURES
+from app.ml.training import TrainingError, train_model
+from app.models import ObservedWeather
+
+
+@pytest.fixture()
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "MODEL_DIR", str(tmp_path))
+    return str(tmp_path)
+
+
+@pytest.fixture()
+def history(db, make_station, make_availability):
+    """Two stations scraped every hour of the last 30 hours; weather archived for all but the oldest 5."""
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    make_station(number=1, bike_stands=20)
+    make_station(number=2, bike_stands=30)
+    for offset in range(30, 0, -1):
+        hour = now - timedelta(hours=offset)
+        for number in (1, 2):
+            make_availability(number=number, available_bikes=(offset + number * 7) % 20, timestamp=hour + timedelta(minutes=10))
+        if offset <= 25:
+            db.session.add(ObservedWeather(observed_time=hour, temperature=10.0 + offset % 5, humidity=80, pressure=1010, weather_code=800))
+    db.session.commit()
+
+
+class TestArtifacts:
+    def test_write_promote_load(self, model_dir):
+        manifest = artifacts.write_artifact({"tree": 1}, ["hour"], "20261019T120000", {"metrics": {"mae": 1.0}})
+        assert artifacts.read_manifest() is None
+        artifacts.promote_version("20261019T120000")
+        loaded = artifacts.load_artifact()
+        assert loaded.model == {"tree": 1}
+        assert (loaded.version, loaded.features) == ("20261019T120000", ["hour"])
+        assert loaded.manifest == manifest
+
+    def test_checksum_mismatch_rejected(self, model_dir):
+        manifest = artifacts.write_artifact({"tree": 1}, ["hour"], "v1", {})
+        artifacts.promote_version("v1")
+        with open(os.path.join(model_dir, manifest["model_file"]), "ab") as f:
+            f.write(b"x")
+        with pytest.raises(ValueError):
+            artifacts.load_artifact()
+
+    def test_unknown_version(self, model_dir):
+        with pytest.raises(FileNotFoundError):
+            artifacts.promote_version("nope")
+
+    def test_prune_keeps_newest_and_promoted(self, model_dir):
+        for version in ("v1", "v2", "v3", "v4"):
+            artifacts.write_artifact({}, [], version, {})
+        artifacts.promote_version("v1")
+        assert artifacts.prune_versions(keep=2) == ["v2"]
+        assert artifacts.list_versions() == ["v1", "v3", "v4"]
+        assert not os.path.exists(os.path.join(model_dir, "bike_availability_model-v2.pkl"))
+
+    def test_legacy_pickles_without_manifest(self, model_dir):
+        with pytest.raises(FileNotFoundError):
+            artifacts.load_artifact()
+        import pickle
+
+        for name, value in ((artifacts.LEGACY_MODEL_NAME, {"tree": 0}), (artifacts.LEGACY_FEATURES_NAME, ["hour"])):
+            with open(os.path.join(model_dir, name), "wb") as f:
+                pickle.dump(value, f)
+        assert artifacts.load_artifact().version == "legacy"
+
+
+class TestTrainModel:
+    def test_trains_on_rows_with_weather(self, app, history, model_dir):
+        with app.app_context():
+            result = train_model(days=7)
+        assert result.rows_read == 60
+        assert result.rows_used == 50  # the oldest 5 hours have no archived weather
+        assert result.promoted
+        manifest = artifacts.read_manifest()
+        assert manifest["version"] == result.version
+        assert manifest["features"] == list(FEATURES)
+        assert manifest["train_rows"] + manifest["test_rows"] == 50
+        assert set(manifest["metrics"]) == {"mae", "rmse", "r2"}
+
+    def test_chunking_reads_the_same_rows(self, app, history, model_dir):
+        with app.app_context():
+            result = train_model(days=7, chunk_size=7, promote=False)
+        assert result.chunks == 9
+        assert result.rows_used == 50
+        assert artifacts.read_manifest() is None
+        assert artifacts.list_versions() == [result.version]
+
+    def test_window_limits_rows(self, app, history, model_dir):
+        with app.app_context():
+            with pytest.raises(TrainingError):
+                train_model(days=0.0001)
+
+    def test_no_data(self, app, db, model_dir):
+        with app.app_context():
+            with pytest.raises(TrainingError, match="No availability rows"):
+                train_model()
+
+    def test_trained_model_serves_predictions(self, app, history, model_dir, make_weather_forecast):
+        from app.services import prediction_service
+
+        with app.app_context():
+            train_model(days=7)
+            make_weather_forecast(forecast_time=datetime.utcnow() + timedelta(hours=2))
+            (item,) = prediction_service.get_station_predictions(1)
+        assert 0 <= item["predicted_available_bikes"] <= 20
+
+
+class TestModelCommands:
+    def test_train_and_info(self, app, history, model_dir):
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=["model", "train", "--days", "7", "--chunk-size", "16"])
+        assert result.exit_code == 0, result.output
+        assert "trained on 50 of 60 availability rows (4 chunks)" in result.output
+        info = runner.invoke(args=["model", "info"])
+        assert "Production model:" in info.output
+
+    def test_train_without_data_fails_cleanly(self, app, db, model_dir):
+        result = app.test_cli_runner().invoke(args=["model", "train"])
+        assert result.exit_code != 0
+        assert "No availability rows" in result.output
+
+    def test_promote_rollback(self, app, model_dir):
+        artifacts.write_artifact({}, [], "v1", {})
+        runner = app.test_cli_runner()
+        assert runner.invoke(args=["model", "promote", "v1"]).exit_code == 0
+        assert artifacts.read_manifest()["version"] == "v1"
+        assert runner.invoke(args=["model", "promote", "v9"]).exit_code != 0
@@ -0,0 +1,100 @@
+"""
+Unit tests for app.services.password_service (configurable hashing, process pool, rehash on login).
+
+Low-cost method strings keep the suite fast; the defaults are exercised by the rest of the suite.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app.models import User
+from app.services.password_service import PasswordHasher, normalize_method
+from app.services.user_service import login_user
+
+FAST_SCRYPT = "scrypt:1024:8:1"
+FAST_PBKDF2 = "pbkdf2:sha256:1000"
+
+
+class TestNormalizeMethod:
+    def test_bare_names_expand_to_werkzeug_defaults(self):
+        assert normalize_method("scrypt") == "scrypt:32768:8:1"
+        assert normalize_method(" PBKDF2 ") == "pbkdf2:sha256:1000000"
+
+    def test_explicit_cost_kept(self):
+        assert normalize_method(FAST_SCRYPT) == FAST_SCRYPT
+
+    def test_unknown_method_rejected(self):
+        with pytest.raises(ValueError):
+            normalize_method("md5")
+
+    def test_argon2_requires_optional_package(self):
+        with patch("app.services.password_service.argon2", None):
+            with pytest.raises(ValueError, match="argon2-cffi"):
+                normalize_method("argon2")
+
+
+class TestPasswordHasher:
+    def test_hash_and_verify_inline(self):
+        hasher = PasswordHasher(FAST_SCRYPT)
+        password_hash = hasher.hash("s3cret")
+        assert password_hash.startswith(FAST_SCRYPT + "$")
+        assert hasher.verify(password_hash, "s3cret")
+        assert not hasher.verify(password_hash, "wrong")
+
+    def test_verifies_hashes_made_with_another_method(self):
+        hasher = PasswordHasher(FAST_SCRYPT)
+        assert hasher.verify(generate_password_hash("s3cret", method=FAST_PBKDF2), "s3cret")
+
+    def test_needs_rehash(self):
+        hasher = PasswordHasher(FAST_SCRYPT)
+        assert not hasher.needs_rehash(generate_password_hash("x", method=FAST_SCRYPT))
+        assert hasher.needs_rehash(generate_password_hash("x", method="scrypt:2048:8:1"))
+        assert hasher.needs_rehash(generate_password_hash("x", method=FAST_PBKDF2))
+        assert hasher.needs_rehash("$argon2id$v=19$m=65536,t=3,p=4$c2FsdA$aGFzaA")
+
+    def test_process_pool(self):
+        hasher = PasswordHasher(FAST_SCRYPT, workers=1)
+        try:
+            password_hash = hasher.hash("s3cret")
+            assert hasher.verify(password_hash, "s3cret")
+            assert not hasher.verify(password_hash, "wrong")
+            assert hasher._pool is not None
+        finally:
+            hasher.shutdown()
+        assert hasher._pool is None
+
+
+class TestRehashOnLogin:
+    def test_outdated_hash_upgraded_on_successful_login(self, app, db, make_user):
+        with app.app_context():
+            user = make_user(password="password123")
+            user.password_hash = generate_password_hash("password123", method=FAST_PBKDF2)
+            db.session.commit()
+            with patch("app.services.user_service.password_hasher", PasswordHasher(FAST_SCRYPT)):
+                login_user(user.username, "password123")
+            stored = db.session.get(User, user.id).password_hash
+        assert stored.startswith(FAST_SCRYPT + "$")
+
+    def test_current_hash_left_alone(self, app, db, make_user):
+        with app.app_context():
+            user = make_user(password="password123")
+            user.password_hash = generate_password_hash("password123", method=FAST_SCRYPT)
+            db.session.commit()
+            before = user.password_hash
+            with patch("app.services.user_service.password_hasher", PasswordHasher(FAST_SCRYPT)):
+                login_user(user.username, "password123")
+            assert db.session.get(User, user.id).password_hash == before
+
+    def test_failed_login_does_not_rehash(self, app, db, make_user):
+        from app.services.user_service import AuthError
+
+        with app.app_context():
+            user = make_user(password="password123")
+            user.password_hash = generate_password_hash("password123", method=FAST_PBKDF2)
+            db.session.commit()
+            with patch("app.services.user_service.password_hasher", PasswordHasher(FAST_SCRYPT)):
+                with pytest.raises(AuthError):
+                    login_user(user.username, "wrong")
+            assert db.session.get(User, user.id).password_hash.startswith(FAST_PBKDF2 + "$")
@@ -0,0 +1,150 @@
+"""
+Unit tests for app.ml.batching (micro-batching of model inference across concurrent requests).
+
+The stand-in model returns each row's first feature, so every caller can check it got back exactly
+the predictions for its own rows.
+"""
+
+import threading
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.ml.batching import PredictionBatcher
+from app.ml.registry import LoadedModel
+
+
+class EchoModel:
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+
+    def predict(self, X):
+        self.calls.append(len(X))
+        if self.fail_on is not None and (X[:, 0] == self.fail_on).any():
+            raise ValueError("bad row")
+        return X[:, 0] * 1.0
+
+
+def _loaded(model):
+    return LoadedModel(model, ["station_id", "hour"], "v", {}, datetime.utcnow())
+
+
+def _matrix(value, rows=3):
+    return np.full((rows, 2), value, dtype=np.float32)
+
+
+@pytest.fixture()
+def batcher():
+    b = PredictionBatcher(enabled=True, wait_ms=200, max_rows=1000)
+    yield b
+    b.stop()
+
+
+def _concurrent(batcher, jobs):
+    """Run batcher.predict for each (loaded, matrix) at once; returns results (or exceptions) in order."""
+    results = [None] * len(jobs)
+    barrier = threading.Barrier(len(jobs))
+
+    def call(i, loaded, matrix):
+        barrier.wait()
+        try:
+            results[i] = batcher.predict(loaded, matrix)
+        except Exception as exc:
+            results[i] = exc
+
+    threads = [threading.Thread(target=call, args=(i, *job)) for i, job in enumerate(jobs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+class TestBatching:
+    def test_concurrent_requests_share_one_predict(self, batcher):
+        model = EchoModel()
+        loaded = _loaded(model)
+        results = _concurrent(batcher, [(loaded, _matrix(i, rows=i + 1)) for i in range(8)])
+        assert model.calls == [sum(range(1, 9))]
+        for i, result in enumerate(results):
+            assert result.tolist() == [float(i)] * (i + 1)
+        stats = batcher.stats()
+        assert (stats["batches"], stats["requests"], stats["rows"]) == (1, 8, 36)
+        assert stats["batch_sizes"]["5-8"] == 1
+        assert stats["added_latency_ms"]["max"] > 0
+
+    def test_max_rows_closes_the_batch_early(self):
+        batcher = PredictionBatcher(enabled=True, wait_ms=5_000, max_rows=6)
+        try:
+            model = EchoModel()
+            loaded = _loaded(model)
+            results = _concurrent(batcher, [(loaded, _matrix(i)) for i in range(2)])
+        finally:
+            batcher.stop()
+        assert model.calls == [6]
+        assert [r.tolist() for r in results] == [[0.0] * 3, [1.0] * 3]
+
+    def test_model_versions_are_not_mixed(self, batcher):
+        old, new = EchoModel(), EchoModel()
+        results = _concurrent(batcher, [(_loaded(old), _matrix(1)), (_loaded(new), _matrix(2)), (_loaded(old), _matrix(3))])
+        assert sorted(old.calls) == [6]
+        assert new.calls == [3]
+        assert [r[0] for r in results] == [1.0, 2.0, 3.0]
+
+    def test_bad_request_only_fails_itself(self, batcher):
+        model = EchoModel(fail_on=2)
+        loaded = _loaded(model)
+        results = _concurrent(batcher, [(loaded, _matrix(i)) for i in range(4)])
+        assert isinstance(results[2], ValueError)
+        assert [results[i][0] for i in (0, 1, 3)] == [0.0, 1.0, 3.0]
+        assert batcher.stats()["failed_batches"] == 1
+
+    def test_disabled_predicts_on_calling_thread(self):
+        batcher = PredictionBatcher(enabled=False, wait_ms=0, max_rows=1000)
+        assert batcher.predict(_loaded(EchoModel()), _matrix(4)).tolist() == [4.0] * 3
+        assert batcher._thread is None
+        assert batcher.stats()["enabled"] is False
+
+    def test_lone_request_is_not_held_back(self):
+        batcher = PredictionBatcher(enabled=True, wait_ms=0, max_rows=1000)
+        try:
+            assert batcher.predict(_loaded(EchoModel()), _matrix(1)).tolist() == [1.0] * 3
+        finally:
+            batcher.stop()
+        stats = batcher.stats()
+        assert stats["batch_sizes"]["1"] == 1
+        assert stats["added_latency_ms"]["max"] < 100
+
+    def test_requests_queued_during_a_predict_share_the_next(self):
+        batcher = PredictionBatcher(enabled=True, wait_ms=0, max_rows=1000)
+        entered, release = threading.Event(), threading.Event()
+
+        class SlowFirst(EchoModel):
+            def predict(self, X):
+                if not entered.is_set():
+                    entered.set()
+                    release.wait(5)
+                return super().predict(X)
+
+        model = SlowFirst()
+        loaded = _loaded(model)
+        try:
+            first = threading.Thread(target=batcher.predict, args=(loaded, _matrix(0)))
+            first.start()
+            assert entered.wait(5)
+            # The first predict is running: these queue up behind it
+            threading.Timer(0.2, release.set).start()
+            results = _concurrent(batcher, [(loaded, _matrix(i)) for i in range(1, 4)])
+            first.join()
+        finally:
+            batcher.stop()
+        assert model.calls == [3, 9]
+        assert [r[0] for r in results] == [1.0, 2.0, 3.0]
+
+
+class TestStatusEndpoint:
+    def test_batching_metrics_reported(self, client):
+        data = client.get("/api/model/status").get_json()["data"]
+        assert set(data["batching"]) >= {"batches", "batch_sizes", "added_latency_ms", "mean_batch_size"}
@@ -1,8 +1,8 @@
 """
 Unit tests for app.services.prediction_service.
 
-The ML model (pickle file) and all DB queries are mocked so the tests run
-without trained artefacts or a real database.
+The model registry and the forecast query are mocked so the tests run
+without trained artefacts.
 """
 
 from datetime import datetime, timedelta
@@ -11,12 +11,20 @@ from unittest.mock import MagicMock, patch
 import numpy as np
 import pytest
 
+from app.ml.registry import LoadedModel
 from app.services.prediction_service import PredictionError
 
 
-PATCH_LOAD_MODEL = "app.services.prediction_service._load_model"
-PATCH_MODEL = "app.services.prediction_service._model"
-PATCH_FEATURES = "app.services.prediction_service._features"
+PATCH_GET_MODEL = "app.services.prediction_service.get_model"
+FEATURES = [
+    "station_id", "capacity", "lat", "lon",
+    "hour", "day", "day_of_week", "is_weekend",
+    "avg_temperature", "avg_humidity", "avg_pressure",
+]
+
+
+def _loaded(model, features=FEATURES):
+    return LoadedModel(model, features, "test", {}, datetime.utcnow())
 
 
 class TestPredictionError:
@@ -52,54 +60,49 @@ class TestGetStationPredictions:
     def test_raises_prediction_error_when_station_not_found(self, app, db):
         from app.services import prediction_service
 
+        model = MagicMock()
         with app.app_context():
-            with patch.object(prediction_service, "_load_model"):
-                with patch("app.extensions.db.session") as mock_session:
-                    mock_session.get.return_value = None
+            # Empty station table: the lookup goes through the station registry
+            with patch(PATCH_GET_MODEL, return_value=_loaded(model)):
+                with patch(
+                    "app.services.prediction_service.find_station",
+                    wraps=prediction_service.find_station,
+                ) as mock_find:
                     with pytest.raises(PredictionError, match="not found"):
                         prediction_service.get_station_predictions(9999)
+        mock_find.assert_called_once_with(9999)
+        model.predict.assert_not_called()
 
     def test_raises_prediction_error_when_no_forecasts(self, app, db, make_station):
         from app.services import prediction_service
 
         with app.app_context():
             make_station(number=77)
-            with patch.object(prediction_service, "_load_model"):
-                with patch.object(
-                    prediction_service, "_model", MagicMock()
-                ), patch.object(prediction_service, "_features", ["station_id"]):
-                    with patch(
-                        "app.models.weather.WeatherForecast.query"
-                    ) as mock_query:
-                        mock_query.filter.return_value.order_by.return_value.all.return_value = []
-                        with pytest.raises(PredictionError, match="No weather forecast"):
-                            prediction_service.get_station_predictions(77)
+            with patch(PATCH_GET_MODEL, return_value=_loaded(MagicMock(), ["station_id"])):
+                with patch(
+                    "app.models.weather.WeatherForecast.query"
+                ) as mock_query:
+                    mock_query.filter.return_value.order_by.return_value.all.return_value = []
+                    with pytest.raises(PredictionError, match="No weather forecast"):
+                        prediction_service.get_station_predictions(77)
 
     def test_predictions_returned_for_valid_station_and_forecasts(
         self, app, db, make_station
     ):
         from app.services import prediction_service
-        import pandas as pd
 
         with app.app_context():
             make_station(number=78, bike_stands=15)
             forecasts = [self._make_mock_forecast(i) for i in range(1, 4)]
-            features = [
-                "station_id", "capacity", "lat", "lon",
-                "hour", "day", "day_of_week", "is_weekend",
-                "avg_temperature", "avg_humidity", "avg_pressure",
-            ]
             mock_model = MagicMock()
             mock_model.predict.return_value = [5.3, 7.1, 3.9]
 
-            with patch.object(prediction_service, "_load_model"):
-                with patch.object(prediction_service, "_model", mock_model):
-                    with patch.object(prediction_service, "_features", features):
-                        with patch(
-                            "app.models.weather.WeatherForecast.query"
-                        ) as mock_query:
-                            mock_query.filter.return_value.order_by.return_value.all.return_value = forecasts
-                            result = prediction_service.get_station_predictions(78)
+            with patch(PATCH_GET_MODEL, return_value=_loaded(mock_model)):
+                with patch(
+                    "app.models.weather.WeatherForecast.query"
+                ) as mock_query:
+                    mock_query.filter.return_value.order_by.return_value.all.return_value = forecasts
+                    result = prediction_service.get_station_predictions(78)
 
         assert len(result) == 3
         for item in result:
@@ -116,22 +119,15 @@ class TestGetStationPredictions:
         with app.app_context():
             make_station(number=79, bike_stands=20)
             forecasts = [self._make_mock_forecast(1)]
-            features = [
-                "station_id", "capacity", "lat", "lon",
-                "hour", "day", "day_of_week", "is_weekend",
-                "avg_temperature", "avg_humidity", "avg_pressure",
-            ]
             mock_model = MagicMock()
             mock_model.predict.return_value = [-5.0]  # negative prediction
 
-            with patch.object(prediction_service, "_load_model"):
-                with patch.object(prediction_service, "_model", mock_model):
-                    with patch.object(prediction_service, "_features", features):
-                        with patch(
-                            "app.models.weather.WeatherForecast.query"
-                        ) as mock_query:
-                            mock_query.filter.return_value.order_by.return_value.all.return_value = forecasts
-                            result = prediction_service.get_station_predictions(79)
+            with patch(PATCH_GET_MODEL, return_value=_loaded(mock_model)):
+                with patch(
+                    "app.models.weather.WeatherForecast.query"
+                ) as mock_query:
+                    mock_query.filter.return_value.order_by.return_value.all.return_value = forecasts
+                    result = prediction_service.get_station_predictions(79)
 
         assert result[0]["predicted_available_bikes"] == 0
 
@@ -144,56 +140,52 @@ class TestGetStationPredictions:
         with app.app_context():
             make_station(number=80, bike_stands=10)
             forecasts = [self._make_mock_forecast(1)]
-            features = [
-                "station_id", "capacity", "lat", "lon",
-                "hour", "day", "day_of_week", "is_weekend",
-                "avg_temperature", "avg_humidity", "avg_pressure",
-            ]
             mock_model = MagicMock()
             mock_model.predict.return_value = [999.9]  # way over capacity
 
-            with patch.object(prediction_service, "_load_model"):
-                with patch.object(prediction_service, "_model", mock_model):
-                    with patch.object(prediction_service, "_features", features):
-                        with patch(
-                            "app.models.weather.WeatherForecast.query"
-                        ) as mock_query:
-                            mock_query.filter.return_value.order_by.return_value.all.return_value = forecasts
-                            result = prediction_service.get_station_predictions(80)
+            with patch(PATCH_GET_MODEL, return_value=_loaded(mock_model)):
+                with patch(
+                    "app.models.weather.WeatherForecast.query"
+                ) as mock_query:
+                    mock_query.filter.return_value.order_by.return_value.all.return_value = forecasts
+                    result = prediction_service.get_station_predictions(80)
 
         assert result[0]["predicted_available_bikes"] == 10
 
-    def test_load_model_raises_when_files_missing(self, app):
-        """_load_model must raise FileNotFoundError when pkl files are absent."""
+    def test_request_finishes_on_the_model_it_started_with(self, app, db, make_station):
+        """A swap while a prediction runs must not change the model that request uses."""
         from app.services import prediction_service
 
-        with app.app_context():
-            # Reset cached globals to force re-load
-            prediction_service._model = None
-            prediction_service._features = None
-
-            with patch("os.path.exists", return_value=False):
-                with pytest.raises(FileNotFoundError):
-                    prediction_service._load_model()
+        from app.ml.registry import model_registry
 
-        # Restore so other tests are not affected
-        prediction_service._model = None
-        prediction_service._features = None
+        old, new = MagicMock(), MagicMock()
+        # Different feature lists, so a request mixing the two versions would build the wrong columns
+        old_loaded, new_loaded = _loaded(old), _loaded(new, ["station_id", "hour"])
+        old_inputs = []
 
-    def test_load_model_skips_when_already_loaded(self, app):
-        """_load_model should be a no-op if model is already cached."""
-        from app.services import prediction_service
+        def _predict_then_swap(X):
+            # The watcher promotes a new version while this request is predicting
+            old_inputs.append(X)
+            model_registry._current = new_loaded
+            return [3.0]
 
-        mock_model = MagicMock()
-        mock_features = ["col1"]
+        old.predict.side_effect = _predict_then_swap
+        new.predict.return_value = [9.0]
 
         with app.app_context():
-            prediction_service._model = mock_model
-            prediction_service._features = mock_features
-
-            with patch("builtins.open") as mock_open:
-                prediction_service._load_model()
-            mock_open.assert_not_called()
-
-        prediction_service._model = None
-        prediction_service._features = None
+            make_station(number=81, bike_stands=20)
+            forecasts = [self._make_mock_forecast(1)]
+            with patch.object(model_registry, "start"), patch.object(model_registry, "_current", old_loaded):
+                with patch(
+                    "app.models.weather.WeatherForecast.query"
+                ) as mock_query:
+                    mock_query.filter.return_value.order_by.return_value.all.return_value = forecasts
+                    first = prediction_service.get_station_predictions(81)
+                    assert model_registry._current is new_loaded
+                    second = prediction_service.get_station_predictions(81)
+
+        assert first[0]["predicted_available_bikes"] == 3
+        assert list(old_inputs[0].columns) == FEATURES
+        old.predict.assert_called_once()
+        assert second[0]["predicted_available_bikes"] == 9
+        assert list(new.predict.call_args.args[0].columns) == ["station_id", "hour"]
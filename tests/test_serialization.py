@@ -0,0 +1,92 @@
+"""
+Unit tests for app.api.serialization (TypeAdapter envelope) and app.utils.json_provider (orjson provider).
+
+The envelope and the orjson provider must produce the same JSON the stdlib DefaultJSONProvider wrote
+for these payloads, so clients and cached ETags see no difference.
+"""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.api.serialization import EnvelopeSerializer
+from app.contracts import AvailabilityVO, StationVO
+
+STATION = {
+    "number": 42,
+    "contract_name": "dublin",
+    "name": "SMITHFIELD",
+    "address": "Smithfield North",
+    "latitude": 53.349562,
+    "longitude": -6.278198,
+    "banking": True,
+    "bonus": False,
+    "bike_stands": 30,
+}
+AVAILABILITY = {
+    "number": 42,
+    "available_bikes": 7,
+    "available_bike_stands": 23,
+    "status": "OPEN",
+    "last_update": 1700000000000,
+    "timestamp": "2026-10-19T12:00:00",
+    "requested_at": None,
+}
+
+
+def _legacy_body(model, items):
+    data = [model.model_validate(item).model_dump() for item in items]
+    return json.dumps({"code": 0, "msg": "ok", "data": data}, sort_keys=True, separators=(",", ":")) + "\n"
+
+
+class TestEnvelopeSerializer:
+    @pytest.mark.parametrize(
+        "model, items",
+        [(StationVO, [STATION, {**STATION, "number": 43}]), (AvailabilityVO, [AVAILABILITY]), (StationVO, [])],
+    )
+    def test_matches_legacy_jsonify_output(self, model, items):
+        body = EnvelopeSerializer(list[model]).dumps(items)
+        assert json.loads(body) == json.loads(_legacy_body(model, items))
+
+    def test_contract_still_enforced(self):
+        from pydantic import ValidationError
+
+        with pytest.raises(ValidationError):
+            EnvelopeSerializer(list[StationVO]).dumps([{"number": "not-a-number"}])
+
+    def test_response_mimetype(self):
+        resp = EnvelopeSerializer(list[StationVO]).response([STATION])
+        assert resp.mimetype == "application/json"
+        assert resp.get_data().endswith(b"}\n")
+
+
+class TestOrjsonProvider:
+    @pytest.fixture()
+    def providers(self):
+        pytest.importorskip("orjson")
+        from app.utils.json_provider import OrjsonProvider
+
+        app = Flask(__name__)
+        return OrjsonProvider(app), DefaultJSONProvider(app)
+
+    def test_same_output_as_default_provider(self, providers):
+        fast, default = providers
+        obj = {"b": 1, "a": [1.5, None, True], "when": datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc), "c": {"2": "x"}}
+        assert fast.dumps(obj) == default.dumps(obj, separators=(",", ":"))
+
+    def test_loads(self, providers):
+        fast, _ = providers
+        assert fast.loads(b'{"a": [1, 2]}') == {"a": [1, 2]}
+
+    def test_stdlib_kwargs_fall_back(self, providers):
+        fast, _ = providers
+        assert fast.dumps({"a": 1}, indent=2) == '{\n  "a": 1\n}'
+
+    def test_app_uses_orjson_provider(self, app):
+        pytest.importorskip("orjson")
+        from app.utils.json_provider import OrjsonProvider
+
+        assert isinstance(app.json, OrjsonProvider)
@@ -0,0 +1,140 @@
+"""
+Unit tests for app.services.station_profile_service (incremental per-slot availability statistics)
+and the `flask stations profile` command.
+"""
+
+import random
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.models import StationProfile
+from app.services.station_profile_service import (
+    build_station_profiles,
+    get_profile_watermark,
+    get_station_profile,
+    histogram_quantile,
+    profile_stats,
+)
+from app.services.station_service import StationNotFoundError
+
+# Tuesday 2026-10-20 08:xx
+TUESDAY_8AM = datetime(2026, 10, 20, 8, 15)
+
+
+def _scrapes(make_availability, number, bikes, when=TUESDAY_8AM):
+    return [make_availability(number=number, available_bikes=b, timestamp=when) for b in bikes]
+
+
+class TestHistogramStats:
+    @pytest.mark.parametrize("seed", range(5))
+    def test_quantiles_match_numpy(self, seed):
+        rng = random.Random(seed)
+        values = [rng.randint(0, 30) for _ in range(rng.randint(1, 60))]
+        histogram = [values.count(v) for v in range(31)]
+        for q in (0.1, 0.25, 0.5, 0.75, 0.9):
+            assert histogram_quantile(histogram, q) == pytest.approx(np.percentile(values, q * 100))
+
+    def test_stats(self):
+        stats = profile_stats([0, 2, 0, 2])  # values 1, 1, 3, 3
+        assert stats["samples"] == 4
+        assert stats["mean_bikes"] == 2
+        assert stats["median_bikes"] == 2
+
+    def test_empty_histogram_rejected(self):
+        with pytest.raises(ValueError):
+            histogram_quantile([0, 0], 0.5)
+
+
+class TestBuildProfiles:
+    def test_aggregates_per_station_weekday_hour(self, app, db, make_station, make_availability):
+        with app.app_context():
+            make_station(number=42)
+            _scrapes(make_availability, 42, [2, 4, 6])
+            _scrapes(make_availability, 42, [10], when=datetime(2026, 10, 20, 9, 5))
+            result = build_station_profiles()
+            slot = db.session.get(StationProfile, (42, 1, 8))
+            assert result.rows_read == 4
+            assert result.slots_updated == 2
+            assert (slot.samples, slot.mean_bikes, slot.median_bikes) == (3, 4.0, 4.0)
+            assert slot.histogram == [0, 0, 1, 0, 1, 0, 1]
+
+    def test_incremental_runs_only_read_new_rows(self, app, db, make_station, make_availability):
+        with app.app_context():
+            make_station(number=42)
+            _scrapes(make_availability, 42, [2, 4])
+            first = build_station_profiles()
+            assert get_profile_watermark() == first.watermark
+            assert build_station_profiles().rows_read == 0
+            _scrapes(make_availability, 42, [9])
+            second = build_station_profiles()
+            slot = db.session.get(StationProfile, (42, 1, 8))
+            assert second.rows_read == 1
+            assert slot.samples == 3
+            assert slot.median_bikes == 4.0
+            assert slot.p90_bikes == pytest.approx(np.percentile([2, 4, 9], 90))
+
+    def test_batches_give_the_same_result(self, app, db, make_station, make_availability):
+        with app.app_context():
+            make_station(number=1)
+            make_station(number=2)
+            _scrapes(make_availability, 1, [1, 5, 3, 8])
+            _scrapes(make_availability, 2, [0, 7])
+            result = build_station_profiles(batch_size=2)
+            assert result.batches == 3
+            assert db.session.get(StationProfile, (1, 1, 8)).histogram == [0, 1, 0, 1, 0, 1, 0, 0, 1]
+            assert db.session.get(StationProfile, (2, 1, 8)).samples == 2
+
+    def test_interrupted_run_resumes_from_watermark(self, app, db, make_station, make_availability):
+        with app.app_context():
+            make_station(number=1)
+            _scrapes(make_availability, 1, [1, 2, 3, 4])
+            assert build_station_profiles(batch_size=2, max_batches=1).rows_read == 2
+            assert build_station_profiles(batch_size=2).rows_read == 2
+            assert db.session.get(StationProfile, (1, 1, 8)).samples == 4
+
+    def test_command(self, app, db, make_station, make_availability):
+        with app.app_context():
+            make_station(number=1)
+            _scrapes(make_availability, 1, [3])
+        result = app.test_cli_runner().invoke(args=["stations", "profile", "--rebuild"])
+        assert result.exit_code == 0, result.output
+        assert "Merged 1 availability rows into 1 slots" in result.output
+
+
+class TestGetStationProfile:
+    def test_single_slot_and_week(self, app, db, make_station, make_availability):
+        with app.app_context():
+            make_station(number=42)
+            _scrapes(make_availability, 42, [3])
+            _scrapes(make_availability, 42, [5], when=datetime(2026, 10, 19, 23, 0))
+            build_station_profiles()
+            assert [row["median_bikes"] for row in get_station_profile(42, weekday=1, hour=8)] == [3.0]
+            assert [(row["weekday"], row["hour"]) for row in get_station_profile(42)] == [(0, 23), (1, 8)]
+            assert get_station_profile(42, weekday=2, hour=8) == []
+
+    def test_unknown_station(self, app, db):
+        with app.app_context():
+            with pytest.raises(StationNotFoundError):
+                get_station_profile(999)
+
+
+class TestProfileRoute:
+    def test_returns_slot(self, client, db, make_station, make_availability):
+        make_station(number=42)
+        _scrapes(make_availability, 42, [4, 6])
+        build_station_profiles()
+        resp = client.get("/api/stations/42/profile?weekday=1&hour=8")
+        assert resp.status_code == 200
+        (row,) = resp.get_json()["data"]
+        assert row["mean_bikes"] == 5.0
+        assert "histogram" not in row
+
+    @pytest.mark.parametrize("query", ["weekday=7", "hour=24", "hour=x", "weekday=-1"])
+    def test_invalid_slot(self, client, db, make_station, query):
+        make_station(number=42)
+        assert client.get(f"/api/stations/42/profile?{query}").status_code == 400
+
+    def test_unknown_station_404(self, client, db):
+        assert client.get("/api/stations/999/profile").status_code == 404
@@ -83,6 +83,123 @@ class TestGetAllStationsStatusEndpoint:
         assert data[0]["available_bikes"] == 8
 
 
+class TestSnapshotFormats:
+    def test_columnar_status(self, client, db, make_station, make_availability):
+        make_station(number=60)
+        make_station(number=61)
+        make_availability(number=60, available_bikes=1)
+        make_availability(number=61, available_bikes=2)
+        data = client.get("/api/stations/status?format=columnar").get_json()["data"]
+        assert data["number"] == [60, 61]
+        assert data["available_bikes"] == [1, 2]
+        assert set(data) == {"number", "available_bikes", "available_bike_stands", "status", "last_update", "timestamp", "requested_at"}
+
+    def test_columnar_matches_rows(self, client, db, make_station):
+        make_station(number=62, name="A")
+        make_station(number=63, name="B")
+        rows = client.get("/api/stations/").get_json()["data"]
+        columns = client.get("/api/stations/?format=columnar").get_json()["data"]
+        assert [dict(zip(columns, values)) for values in zip(*columns.values())] == rows
+
+    def test_unknown_format_rejected(self, client, db):
+        resp = client.get("/api/stations/status?format=csv")
+        assert resp.status_code == 400
+        assert resp.get_json()["code"] == 1
+
+    def test_json_when_msgpack_not_requested(self, client, db):
+        resp = client.get("/api/stations/", headers={"Accept": "*/*"})
+        assert resp.mimetype == "application/json"
+        assert "Accept" in resp.headers["Vary"]
+
+    def test_msgpack_via_accept(self, client, db, make_station, make_availability):
+        msgpack = pytest.importorskip("msgpack")
+        make_station(number=64)
+        make_availability(number=64, available_bikes=9)
+        resp = client.get("/api/stations/status?format=columnar", headers={"Accept": "application/msgpack"})
+        assert resp.mimetype == "application/msgpack"
+        body = msgpack.unpackb(resp.data)
+        assert body["code"] == 0
+        assert body["data"]["available_bikes"] == [9]
+
+    def test_repeat_requests_reuse_snapshot(self, client, db, make_station, make_availability):
+        from app.services.station_service import availability_snapshots
+
+        make_station(number=65)
+        make_availability(number=65)
+        builds = availability_snapshots.stats()["builds"]
+        client.get("/api/stations/status")
+        client.get("/api/stations/status?format=columnar")
+        assert availability_snapshots.stats()["builds"] == builds + 1
+
+    def test_new_scrape_visible_after_revalidation(self, client, db, make_station, make_availability):
+        from app.services.station_service import availability_snapshots
+
+        make_station(number=66)
+        make_availability(number=66, available_bikes=1)
+        assert client.get("/api/stations/status").get_json()["data"][0]["available_bikes"] == 1
+        make_availability(number=66, available_bikes=5)
+        with patch.object(availability_snapshots, "revalidate_seconds", 0):
+            assert client.get("/api/stations/status").get_json()["data"][0]["available_bikes"] == 5
+
+
+class TestStatusDelta:
+    def _scrape(self, make_availability, bikes):
+        rows = [make_availability(number=number, available_bikes=count) for number, count in bikes.items()]
+        return max(row.id for row in rows)
+
+    @pytest.fixture(autouse=True)
+    def _always_revalidate(self):
+        from app.services.station_service import availability_snapshots
+
+        with patch.object(availability_snapshots, "revalidate_seconds", 0):
+            yield
+
+    def test_version_header(self, client, db, make_station, make_availability):
+        make_station(number=70)
+        version = self._scrape(make_availability, {70: 1})
+        resp = client.get("/api/stations/status")
+        assert resp.headers["X-Snapshot-Version"] == str(version)
+
+    def test_only_changed_stations_returned(self, client, db, make_station, make_availability):
+        make_station(number=71)
+        make_station(number=72)
+        v1 = self._scrape(make_availability, {71: 1, 72: 2})
+        client.get("/api/stations/status")
+        v2 = self._scrape(make_availability, {71: 1, 72: 5})  # 71 re-scraped unchanged
+        data = client.get(f"/api/stations/status?since={v1}").get_json()["data"]
+        assert data["version"] == v2
+        assert data["full"] is False
+        assert [(row["number"], row["available_bikes"]) for row in data["changed"]] == [(72, 5)]
+
+    def test_current_version_has_no_changes(self, client, db, make_station, make_availability):
+        make_station(number=73)
+        version = self._scrape(make_availability, {73: 1})
+        data = client.get(f"/api/stations/status?since={version}").get_json()["data"]
+        assert data == {"version": version, "full": False, "changed": []}
+
+    def test_unknown_version_falls_back_to_full(self, client, db, make_station, make_availability):
+        make_station(number=74)
+        make_station(number=75)
+        self._scrape(make_availability, {74: 1, 75: 2})
+        data = client.get("/api/stations/status?since=1").get_json()["data"]
+        assert data["full"] is True
+        assert [row["number"] for row in data["changed"]] == [74, 75]
+
+    def test_columnar_delta(self, client, db, make_station, make_availability):
+        make_station(number=76)
+        make_station(number=77)
+        v1 = self._scrape(make_availability, {76: 1, 77: 2})
+        client.get("/api/stations/status")
+        self._scrape(make_availability, {76: 3})
+        data = client.get(f"/api/stations/status?since={v1}&format=columnar").get_json()["data"]
+        assert data["changed"]["number"] == [76]
+        assert data["changed"]["available_bikes"] == [3]
+
+    def test_invalid_since_rejected(self, client, db):
+        resp = client.get("/api/stations/status?since=abc")
+        assert resp.status_code == 400
+
+
 class TestGetStationPredictionEndpoint:
     def test_returns_400_when_prediction_service_raises(
         self, client, db, make_station
@@ -120,3 +237,74 @@ class TestGetStationPredictionEndpoint:
         ):
             resp = client.get("/api/stations/52/prediction")
         assert resp.status_code == 500
+
+
+class TestStationStream:
+    @pytest.fixture()
+    def broadcaster(self):
+        from app.services.station_service import availability_snapshots
+        from app.services.station_stream_service import StationBroadcaster
+
+        b = StationBroadcaster(availability_snapshots.refresh, keepalive_seconds=0.01, max_clients=1)
+        with patch("app.api.station_routes.ensure_broadcaster_started", return_value=b):
+            yield b
+
+    def _first_event(self, resp):
+        frame = next(iter(resp.response))
+        resp.close()
+        return frame.decode()
+
+    def test_streams_snapshot_then_changes(self, client, db, make_station, make_availability, broadcaster):
+        make_station(number=80)
+        make_station(number=81)
+        make_availability(number=80, available_bikes=1)
+        make_availability(number=81, available_bikes=2)
+        resp = client.get("/api/stations/stream", buffered=False)
+        assert resp.status_code == 200
+        assert resp.mimetype == "text/event-stream"
+        assert resp.headers["Cache-Control"] == "no-cache"
+        events = iter(resp.response)
+        assert next(events).startswith(b"event: snapshot\n")
+        latest = make_availability(number=81, available_bikes=9)
+        version = latest.id
+        broadcaster.poll_once()
+        frame = next(events).decode()
+        resp.close()
+        assert frame.startswith(f"event: changes\nid: {version}\n")
+        assert '"number":81' in frame and '"number":80' not in frame
+
+    def test_last_event_id_resumes_with_delta(self, client, db, make_station, make_availability, broadcaster):
+        make_station(number=82)
+        make_station(number=83)
+        v1 = max(make_availability(number=n).id for n in (82, 83))
+        client.get("/api/stations/status")
+        make_availability(number=83, available_bikes=0)
+        resp = client.get("/api/stations/stream", headers={"Last-Event-ID": str(v1)}, buffered=False)
+        frame = self._first_event(resp)
+        assert frame.startswith("event: changes\n")
+        assert '"number":83' in frame and '"number":82' not in frame
+
+    def test_invalid_since(self, client, db, broadcaster):
+        assert client.get("/api/stations/stream?since=abc").status_code == 400
+
+    def test_full_worker_returns_503(self, client, db, broadcaster):
+        first = client.get("/api/stations/stream", buffered=False)
+        resp = client.get("/api/stations/stream")
+        first.close()
+        assert resp.status_code == 503
+        assert "Retry-After" in resp.headers
+        assert broadcaster.stats()["clients"] == 0
+
+
+class TestStreamApp:
+    def test_serves_only_station_routes_with_server_cap(self):
+        import config
+        from app import create_stream_app
+        from app.services.station_stream_service import station_broadcaster
+
+        with patch.object(station_broadcaster, "max_clients", station_broadcaster.max_clients):
+            stream_app = create_stream_app()
+            assert station_broadcaster.max_clients == config.STATION_STREAM_SERVER_MAX_CLIENTS
+        rules = {rule.rule for rule in stream_app.url_map.iter_rules()}
+        assert "/api/stations/stream" in rules
+        assert not any(rule.startswith("/api/chat") for rule in rules)
@@ -5,17 +5,32 @@ All DB operations run against the in-memory SQLite instance.
 """
 
 from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 from app.services.station_service import (
+    Snapshot,
+    SnapshotCache,
     StationNotFoundError,
     _availability_to_dict,
+    _load_latest_availability,
     _station_to_dict,
+    StationRegistry,
+    availability_snapshots,
+    changed_rows,
+    find_station,
     get_all_stations_latest_availability,
+    get_availability_changes,
+    get_latest_availability_version,
     get_recent_station_availability,
+    get_station_registry,
+    get_station_table_version,
     list_stations,
+    station_snapshots,
 )
+from app.models import Station
+from app.utils.calculateDistance import calculate_distance
 
 
 # ---------------------------------------------------------------------------
@@ -200,3 +215,246 @@ class TestGetAllStationsLatestAvailability:
             result = get_all_stations_latest_availability()
         station_numbers = [r["number"] for r in result]
         assert sorted(station_numbers) == [30, 31]
+
+    def test_served_from_availability_snapshot(self, app, make_station, make_availability):
+        with app.app_context(), patch.object(availability_snapshots, "revalidate_seconds", 3600):
+            make_station(number=40)
+            make_availability(number=40)
+            with patch.object(availability_snapshots, "_load", wraps=availability_snapshots._load) as load:
+                first = get_all_stations_latest_availability()
+                second = get_all_stations_latest_availability()
+            assert load.call_count == 1
+            assert first == second == list(availability_snapshots.get().rows)
+
+
+
+# ---------------------------------------------------------------------------
+# Snapshot / SnapshotCache
+# ---------------------------------------------------------------------------
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSnapshot:
+    def test_columns_are_parallel_arrays(self):
+        snap = Snapshot(1, ({"a": 1, "b": "x"}, {"a": 2, "b": "y"}))
+        assert snap.columns(("a", "b")) == {"a": [1, 2], "b": ["x", "y"]}
+
+    def test_encoded_built_once(self):
+        snap = Snapshot(1, ())
+        build = MagicMock(return_value=b"body")
+        assert snap.encoded("json", build) == snap.encoded("json", build) == b"body"
+        build.assert_called_once_with(snap)
+
+
+class TestSnapshotCache:
+    def test_served_without_db_inside_revalidate_window(self):
+        clock = _FakeClock()
+        load = MagicMock(return_value=(1, [{"n": 1}]))
+        probe = MagicMock(return_value=1)
+        cache = SnapshotCache("t", load, probe=probe, revalidate_seconds=5, clock=clock)
+        first = cache.get()
+        probe.reset_mock()  # the stamp taken with the first load
+        assert cache.get() is first
+        probe.assert_not_called()
+        assert cache.stats() == {"hits": 1, "revalidations": 0, "builds": 1}
+
+    def test_probe_keeps_snapshot_when_version_unchanged(self):
+        clock = _FakeClock()
+        load = MagicMock(return_value=(1, [{"n": 1}]))
+        cache = SnapshotCache("t", load, probe=lambda: 1, revalidate_seconds=5, clock=clock)
+        first = cache.get()
+        clock.now = 6
+        assert cache.get() is first
+        assert load.call_count == 1
+
+    def test_reloads_when_probe_moves(self):
+        clock = _FakeClock()
+        load = MagicMock(side_effect=[(1, [{"n": 1}]), (2, [{"n": 2}])])
+        cache = SnapshotCache("t", load, probe=MagicMock(side_effect=[7, 8]), revalidate_seconds=5, clock=clock)
+        cache.get()
+        clock.now = 6
+        assert cache.get().rows == ({"n": 2},)
+
+    def test_stamp_moved_without_row_changes_keeps_snapshot(self):
+        clock = _FakeClock()
+        cache = SnapshotCache(
+            "t", lambda: ("digest", [{"n": 1}]), probe=MagicMock(side_effect=[7, 8, 8]), revalidate_seconds=5, clock=clock
+        )
+        first = cache.get()
+        clock.now = 6
+        assert cache.get() is first  # stamp 8: reloaded, same digest
+        clock.now = 12
+        assert cache.get() is first  # stamp still 8: no reload
+        assert cache.stats() == {"hits": 0, "revalidations": 2, "builds": 1}
+
+    def test_without_probe_unchanged_reload_keeps_encodings(self):
+        clock = _FakeClock()
+        cache = SnapshotCache("t", lambda: ("digest", [{"n": 1}]), revalidate_seconds=5, clock=clock)
+        first = cache.get()
+        first.encoded("json", lambda snap: b"body")
+        clock.now = 6
+        assert cache.get() is first
+        assert cache.stats()["revalidations"] == 1
+
+
+class TestLatestAvailabilitySnapshot:
+    def test_loaded_version_matches_probe(self, app, make_station, make_availability):
+        with app.app_context():
+            make_station(number=40)
+            make_station(number=41)
+            make_availability(number=40)
+            make_availability(number=41)
+            latest = make_availability(number=40, available_bikes=4)
+            version, rows = _load_latest_availability()
+            assert version == get_latest_availability_version() == latest.id
+        assert [(r["number"], r["available_bikes"]) for r in rows] == [(40, 4), (41, 10)]
+
+
+class TestAvailabilityChanges:
+    def test_changed_rows_tracks_new_and_modified(self):
+        base = Snapshot(1, ({"number": 1, "available_bikes": 1, "available_bike_stands": 9, "status": "OPEN", "last_update": 1},))
+        snap = Snapshot(
+            2,
+            (
+                {"number": 1, "available_bikes": 1, "available_bike_stands": 9, "status": "OPEN", "last_update": 2},
+                {"number": 2, "available_bikes": 4, "available_bike_stands": 6, "status": "OPEN", "last_update": 2},
+            ),
+        )
+        # last_update alone does not make a station "changed"
+        assert [row["number"] for row in changed_rows(base, snap)] == [2]
+
+    def test_history_is_bounded(self):
+        versions = iter(range(1, 10))
+        cache = SnapshotCache("t", lambda: (next(versions), []), history=2, revalidate_seconds=0)
+        for _ in range(3):
+            cache.refresh()
+        assert cache.find(1) is None
+        assert cache.find(2) is not None and cache.find(3) is not None
+
+    def test_newer_client_version_forces_refresh(self, app, make_station, make_availability):
+        with app.app_context():
+            make_station(number=50)
+            make_availability(number=50)
+            availability_snapshots.get()
+            newer = make_availability(number=50, available_bikes=3).id
+            # Still inside the revalidation window, but the client already saw the newer scrape
+            snapshot, changed = get_availability_changes(newer)
+        assert snapshot.version == newer
+        assert changed == ()
+
+
+# ---------------------------------------------------------------------------
+# StationRegistry
+# ---------------------------------------------------------------------------
+
+
+class TestStationRegistry:
+    @pytest.fixture(autouse=True)
+    def _always_revalidate(self):
+        with patch.object(station_snapshots, "revalidate_seconds", 0):
+            yield
+
+    def test_entries_and_aligned_arrays(self, app, make_station):
+        with app.app_context():
+            make_station(number=7, latitude=53.30, longitude=-6.20)
+            make_station(number=3, latitude=53.35, longitude=-6.25, bike_stands=31)
+            registry = get_station_registry()
+        assert [entry.number for entry in registry.entries] == [3, 7]
+        assert registry.numbers.tolist() == [3, 7]
+        assert registry.latitudes.tolist() == [53.35, 53.30]
+        assert registry.get(3).bike_stands == 31
+        assert registry.capacities.tolist() == [31, 20]
+        assert registry.positions([7, 5, 3, 99]).tolist() == [1, -1, 0, -1]
+        assert 7 in registry and 8 not in registry
+        with pytest.raises(ValueError):
+            registry.latitudes[0] = 0.0
+        with pytest.raises(TypeError):
+            registry.by_number[9] = None
+
+    def test_distances_match_scalar_haversine(self):
+        rows = tuple(
+            {"number": n, "contract_name": "dublin", "name": "", "address": "", "latitude": lat, "longitude": lon,
+             "banking": True, "bonus": False, "bike_stands": 20}
+            for n, lat, lon in ((1, 53.34, -6.26), (2, 53.35, -6.24), (3, 53.34, -6.26))
+        )
+        distances = StationRegistry("v", rows).distances_km(53.34, -6.26)
+        expected = [calculate_distance(53.34, -6.26, row["latitude"], row["longitude"]) for row in rows]
+        assert distances.tolist() == pytest.approx(expected)
+
+    def test_rows_reread_only_after_table_changes(self, app, make_station):
+        with app.app_context(), patch.object(station_snapshots, "revalidate_seconds", 0):
+            make_station(number=1)
+            first = get_station_registry()
+            # Every call probes the counter, none re-reads the rows
+            with patch("app.services.station_service._query_station_rows") as query:
+                assert get_station_registry() is first
+                assert get_station_registry() is first
+            query.assert_not_called()
+            station = make_station(number=2)
+            assert len(get_station_registry()) == 2
+            station.bike_stands = 40
+            from app.extensions import db as _db
+
+            _db.session.commit()
+            assert get_station_registry().get(2).bike_stands == 40
+
+    def test_version_stamp_tracks_edits(self, app, db, make_station):
+        with app.app_context():
+            station = make_station(number=1, name="Old name")
+            before = get_station_table_version()
+            station.name = "A longer new name"
+            db.session.commit()
+            assert get_station_table_version() != before
+
+    def test_version_stamp_tracks_same_length_and_swapped_edits(self, app, db, make_station):
+        with app.app_context():
+            first = make_station(number=1, name="Abbey St", bike_stands=20)
+            second = make_station(number=2, name="Baggot St", bike_stands=30)
+            before = get_station_table_version()
+            first.name = "Abbey Rd"
+            db.session.commit()
+            renamed = get_station_table_version()
+            assert renamed != before
+            first.bike_stands, second.bike_stands = 30, 20
+            db.session.commit()
+            assert get_station_table_version() not in (before, renamed)
+
+    def test_version_stamp_ignores_unchanged_updates_and_tracks_deletes(self, app, db, make_station):
+        with app.app_context():
+            station = make_station(number=1, name="Abbey St")
+            before = get_station_table_version()
+            db.session.execute(db.update(Station).values(name="Abbey St"))
+            db.session.commit()
+            assert get_station_table_version() == before
+            db.session.delete(station)
+            db.session.commit()
+            assert get_station_table_version() == before + 1
+
+    def test_version_bump_without_row_change_keeps_registry(self, app, db, make_station):
+        with app.app_context(), patch.object(station_snapshots, "revalidate_seconds", 0):
+            make_station(number=1, name="Abbey St")
+            first = get_station_registry()
+            db.session.execute(db.text("UPDATE station_table_version SET version = version + 1"))
+            db.session.commit()
+            assert get_station_registry() is first
+
+    def test_find_station_rechecks_on_miss(self, app, make_station):
+        with app.app_context(), patch.object(station_snapshots, "revalidate_seconds", 3600):
+            make_station(number=1)
+            get_station_registry()
+            make_station(number=2)
+            assert find_station(2).number == 2
+            assert find_station(99) is None
+
+    def test_list_stations_returns_copies(self, app, make_station):
+        with app.app_context():
+            make_station(number=1, name="Kept")
+            list_stations()[0]["name"] = "changed"
+            assert list_stations()[0]["name"] == "Kept"
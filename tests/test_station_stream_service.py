@@ -0,0 +1,173 @@
+"""
+Unit tests for app.services.station_stream_service (per-worker SSE broadcaster for station changes).
+
+The broadcaster polls a fake snapshot source here; the poller thread is only started where a test
+needs it, everything else drives poll_once() directly.
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from app.services.station_service import Snapshot
+from app.services.station_stream_service import StationBroadcaster, StreamFullError
+
+
+def _row(number, bikes, status="OPEN"):
+    return {"number": number, "available_bikes": bikes, "available_bike_stands": 20 - bikes, "status": status}
+
+
+class FakeSource:
+    def __init__(self, version=1, rows=None):
+        self.snapshot = Snapshot(version, tuple(rows or (_row(1, 5), _row(2, 7))))
+        self.calls = 0
+
+    def publish(self, version, rows):
+        self.snapshot = Snapshot(version, tuple(rows))
+
+    def __call__(self):
+        self.calls += 1
+        return self.snapshot
+
+
+def _parse(frame):
+    fields = {}
+    for line in frame.decode().strip().split("\n"):
+        name, _, value = line.partition(": ")
+        fields[name] = value
+    if "data" in fields:
+        fields["data"] = json.loads(fields["data"])
+    return fields
+
+
+@pytest.fixture()
+def source():
+    return FakeSource()
+
+
+@pytest.fixture()
+def broadcaster(source):
+    b = StationBroadcaster(source, poll_seconds=0.01, keepalive_seconds=0.01, max_clients=2, backlog=2)
+    yield b
+    b.stop()
+
+
+class TestSubscribe:
+    def test_first_event_is_full_snapshot(self, broadcaster):
+        stream = broadcaster.subscribe()
+        first = _parse(next(stream))
+        assert first["event"] == "snapshot"
+        assert first["id"] == "1"
+        assert first["data"]["full"] is True
+        assert [row["number"] for row in first["data"]["changed"]] == [1, 2]
+
+    def test_snapshot_frame_encoded_once(self, broadcaster):
+        assert next(broadcaster.subscribe()) is next(broadcaster.subscribe())
+
+    def test_reconnect_with_last_version_gets_delta(self, broadcaster, source):
+        broadcaster.poll_once()
+        source.publish(2, [_row(1, 5), _row(2, 3)])
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr("app.services.station_stream_service.availability_snapshots.find", lambda v: Snapshot(1, (_row(1, 5), _row(2, 7))))
+            broadcaster.poll_once()
+            first = _parse(next(broadcaster.subscribe(last_version=1)))
+        assert first["event"] == "changes"
+        assert [row["number"] for row in first["data"]["changed"]] == [2]
+
+    def test_reconnect_at_current_version_sends_nothing_new(self, broadcaster):
+        assert next(broadcaster.subscribe(last_version=1)) == b": connected\n\n"
+
+    def test_client_limit(self, broadcaster):
+        first = broadcaster.subscribe()
+        broadcaster.subscribe()
+        with pytest.raises(StreamFullError) as exc:
+            broadcaster.subscribe()
+        assert exc.value.status_code == 503
+        first.close()
+        broadcaster.subscribe()
+
+    def test_unstarted_stream_close_frees_slot(self, broadcaster):
+        broadcaster.subscribe().close()
+        assert broadcaster.stats()["clients"] == 0
+
+
+class TestFanOut:
+    def test_only_changed_rows_published(self, broadcaster, source):
+        stream = broadcaster.subscribe()
+        next(stream)
+        source.publish(2, [_row(1, 5), _row(2, 0, "CLOSED")])
+        broadcaster.poll_once()
+        frame = _parse(next(stream))
+        assert frame["event"] == "changes"
+        assert frame["id"] == "2"
+        assert frame["data"] == {"version": 2, "full": False, "changed": [_row(2, 0, "CLOSED")]}
+
+    def test_unchanged_version_publishes_nothing(self, broadcaster):
+        broadcaster.poll_once()
+        assert broadcaster.poll_once() is None
+        assert broadcaster.stats()["events"] == 0
+
+    def test_every_client_gets_the_same_frame(self, broadcaster, source):
+        streams = [broadcaster.subscribe(), broadcaster.subscribe()]
+        for stream in streams:
+            next(stream)
+        source.publish(2, [_row(1, 9), _row(2, 7)])
+        broadcaster.poll_once()
+        frames = [next(stream) for stream in streams]
+        assert frames[0] is frames[1]
+
+    def test_keepalive_while_idle(self, broadcaster):
+        stream = broadcaster.subscribe()
+        next(stream)
+        assert next(stream) == b": keepalive\n\n"
+
+    def test_slow_client_gets_full_snapshot(self, broadcaster, source):
+        stream = broadcaster.subscribe()
+        next(stream)
+        for version in (2, 3, 4):  # backlog is 2: the first event is gone before the client reads
+            source.publish(version, [_row(1, version), _row(2, 7)])
+            broadcaster.poll_once()
+        frame = _parse(next(stream))
+        assert frame["event"] == "snapshot"
+        assert frame["data"]["version"] == 4
+
+    def test_subscribers_reuse_the_polled_snapshot(self, broadcaster, source):
+        streams = [broadcaster.subscribe(), broadcaster.subscribe()]
+        calls = source.calls
+        for stream in streams:
+            next(stream)
+        assert source.calls == calls
+
+
+class TestPollerThread:
+    def test_thread_publishes_new_version(self, broadcaster, source):
+        stream = broadcaster.subscribe()
+        next(stream)
+        received = []
+        reader = threading.Thread(target=lambda: received.extend(f for f in stream if not f.startswith(b":")))
+        reader.start()
+        broadcaster.start()
+        source.publish(2, [_row(1, 0), _row(2, 7)])
+        deadline = time.monotonic() + 5
+        while broadcaster.stats()["events"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        broadcaster.stop()
+        reader.join(timeout=5)
+        assert [_parse(frame)["id"] for frame in received] == ["2"]
+
+    def test_poll_errors_are_logged_not_raised(self, broadcaster, caplog):
+        calls = []
+
+        def failing():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("db down")
+            broadcaster._stop.set()
+            return Snapshot(1, ())
+
+        broadcaster._poll = failing
+        broadcaster._run()
+        assert len(calls) == 2
+        assert "station stream poll failed" in caplog.text
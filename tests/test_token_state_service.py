@@ -0,0 +1,137 @@
+"""
+Unit tests for app.services.token_state_service (per-worker token_version cache + revocation channels).
+
+Two TokenStateCache instances stand in for two gunicorn workers.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.services.token_state_service import (
+    DatabaseRevocationChannel,
+    LocalRevocationChannel,
+    TokenStateCache,
+    UserTokenState,
+)
+from app.services.user_service import AuthError, create_access_token, logout_user, verify_access_token
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenStateCache:
+    def test_second_lookup_served_from_cache(self, app, db, make_user):
+        cache = TokenStateCache(ttl=30)
+        with app.app_context():
+            user = make_user()
+            with patch.object(cache, "_load", wraps=cache._load) as spy:
+                assert cache.get_state(user.id) == UserTokenState(0, True)
+                assert cache.get_state(user.id) == UserTokenState(0, True)
+        assert spy.call_count == 1
+        assert cache.stats()["hits"] == 1
+
+    def test_entry_expires_after_ttl(self, app, db, make_user):
+        clock = _FakeClock()
+        cache = TokenStateCache(ttl=30, clock=clock)
+        with app.app_context():
+            user = make_user()
+            cache.get_state(user.id)
+            user.token_version = 4
+            db.session.commit()
+            assert cache.get_state(user.id).token_version == 0
+            clock.now = 31
+            assert cache.get_state(user.id).token_version == 4
+
+    def test_unknown_user_not_cached(self, app, db):
+        cache = TokenStateCache(ttl=30)
+        with app.app_context():
+            assert cache.get_state(999) is None
+        assert cache.stats()["size"] == 0
+
+    def test_disabled_cache_always_loads(self, app, db, make_user):
+        cache = TokenStateCache(ttl=0)
+        with app.app_context():
+            user = make_user()
+            with patch.object(cache, "_load", wraps=cache._load) as spy:
+                cache.get_state(user.id)
+                cache.get_state(user.id)
+        assert spy.call_count == 2
+
+    def test_load_racing_an_eviction_is_not_cached(self, app, db, make_user):
+        cache = TokenStateCache(ttl=30)
+        with app.app_context():
+            user = make_user()
+            real_load = cache._load
+
+            def _load_then_evicted(user_id):
+                state = real_load(user_id)
+                cache.invalidate(user_id)  # a logout lands while we were reading
+                return state
+
+            with patch.object(cache, "_load", side_effect=_load_then_evicted):
+                cache.get_state(user.id)
+        assert cache.stats()["size"] == 0
+
+
+class TestRevocationChannels:
+    @pytest.mark.parametrize("channel_factory", [LocalRevocationChannel, DatabaseRevocationChannel])
+    def test_revocation_reaches_other_worker(self, app, db, make_user, channel_factory):
+        channel = channel_factory()
+        clock = _FakeClock()
+        worker_a = TokenStateCache(ttl=300, channel=channel, poll_seconds=2, clock=clock)
+        worker_b = TokenStateCache(ttl=300, channel=channel, poll_seconds=2, clock=clock)
+        with app.app_context():
+            user = make_user()
+            assert worker_a.get_state(user.id).token_version == 0
+            worker_b.get_state(user.id)
+
+            # Logout handled by worker B
+            user.token_version = 1
+            worker_b.publish_revocation(user.id, 1)
+            db.session.commit()
+
+            # Worker A still trusts its entry until its next poll
+            assert worker_a.get_state(user.id).token_version == 0
+            clock.now = 2
+            assert worker_a.get_state(user.id).token_version == 1
+
+    def test_database_channel_prunes_old_events(self, app, db, make_user):
+        from datetime import datetime, timedelta
+        from app.models import TokenRevocation
+
+        channel = DatabaseRevocationChannel(retention_seconds=60)
+        with app.app_context():
+            db.session.add(TokenRevocation(user_id=1, token_version=1, created_at=datetime.utcnow() - timedelta(hours=1)))
+            db.session.commit()
+            channel.publish(2, 1)
+            db.session.commit()
+            assert [r.user_id for r in TokenRevocation.query.all()] == [2]
+
+
+class TestVerifyAccessTokenWithCache:
+    def test_verification_needs_no_query_when_warm(self, app, db, make_user):
+        from app.services.token_state_service import token_state_cache
+
+        with app.app_context():
+            user = make_user()
+            token = create_access_token(user.id, user.token_version)
+            verify_access_token(token)
+            with patch.object(token_state_cache, "_load") as mock_load:
+                assert verify_access_token(token)["sub"] == user.id
+        mock_load.assert_not_called()
+
+    def test_logout_revokes_cached_token_immediately(self, app, db, make_user):
+        with app.app_context():
+            user = make_user()
+            token = create_access_token(user.id, user.token_version)
+            verify_access_token(token)
+            logout_user(token)
+            with pytest.raises(AuthError) as exc_info:
+                verify_access_token(token)
+        assert "revoked" in exc_info.value.message
@@ -12,7 +12,7 @@ import pytest
 
 from app.services.user_service import create_access_token, create_refresh_token
 
-PATCH_EMAIL = "app.services.user_service.send_verification_code_email_async"
+PATCH_EMAIL = "app.services.user_service.enqueue_verification_email"
 
 
 # ---------------------------------------------------------------------------
@@ -28,6 +28,8 @@ from app.services.user_service import (
     activate_user,
     create_access_token,
     create_refresh_token,
+    find_user_by_identifier,
+    identifier_filter,
     login_user,
     logout_user,
     refresh_tokens,
@@ -217,7 +219,7 @@ class TestCreateRefreshToken:
 # ---------------------------------------------------------------------------
 
 
-PATCH_EMAIL = "app.services.user_service.send_verification_code_email_async"
+PATCH_EMAIL = "app.services.user_service.enqueue_verification_email"
 
 
 class TestRegisterUser:
@@ -266,7 +268,7 @@ class TestRegisterUser:
                     )
             assert exc_info.value.error_code == "email_exists"
 
-    def test_email_async_function_called(self, app, db):
+    def test_verification_email_queued(self, app, db):
         with app.app_context():
             with patch(PATCH_EMAIL) as mock_send:
                 register_user(
@@ -508,6 +510,29 @@ class TestLoginUser:
         assert exc_info.value.status_code == 401
 
 
+# ---------------------------------------------------------------------------
+# identifier resolution
+# ---------------------------------------------------------------------------
+
+
+class TestIdentifierResolution:
+    def test_email_identifier_uses_only_email_column(self):
+        sql = str(identifier_filter("Alice@Example.com").compile(compile_kwargs={"literal_binds": True}))
+        assert sql == "\"user\".email = 'alice@example.com'"
+
+    def test_username_identifier_uses_only_username_column(self):
+        sql = str(identifier_filter("alice").compile(compile_kwargs={"literal_binds": True}))
+        assert sql == "\"user\".username = 'alice'"
+
+    def test_finds_by_username_or_case_insensitive_email(self, app, db, make_user):
+        with app.app_context():
+            user = make_user(username="resolver", email="resolver@example.com")
+            assert find_user_by_identifier("resolver").id == user.id
+            assert find_user_by_identifier("Resolver@Example.COM").id == user.id
+            assert find_user_by_identifier("nobody") is None
+            assert find_user_by_identifier("resolver@other.com") is None
+
+
 # ---------------------------------------------------------------------------
 # verify_access_token
 # ---------------------------------------------------------------------------
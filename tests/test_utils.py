@@ -4,8 +4,11 @@ Unit tests for utility functions.
 Covers:
   - calculateDistance.calculate_distance (Haversine formula)
   - api_retry.gmaps_retry decorator
+  - ttl_cache.TTLCache (LRU + TTL)
+  - single_flight.SingleFlight (request coalescing)
 """
 
+import threading
 import time
 import pytest
 from unittest.mock import MagicMock, patch, call
@@ -13,6 +16,8 @@ import googlemaps.exceptions
 
 from app.utils.calculateDistance import calculate_distance
 from app.utils.api_retry import gmaps_retry
+from app.utils.ttl_cache import TTLCache
+from app.utils.single_flight import SingleFlight
 
 
 # ---------------------------------------------------------------------------
@@ -150,3 +155,196 @@ class TestGmapsRetry:
 
         decorated = gmaps_retry(max_retries=1)(my_func)
         assert decorated.__name__ == "my_func"
+
+
+# ---------------------------------------------------------------------------
+# TTLCache
+# ---------------------------------------------------------------------------
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    def test_get_returns_stored_value(self):
+        cache = TTLCache(maxsize=2, ttl=10)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert "a" in cache
+
+    def test_missing_key_returns_default(self):
+        cache = TTLCache(maxsize=2, ttl=10)
+        assert cache.get("nope", "default") == "default"
+
+    def test_entry_expires_after_ttl(self):
+        clock = _FakeClock()
+        cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+        cache.set("a", 1)
+        clock.now = 10.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_per_entry_ttl_overrides_default(self):
+        clock = _FakeClock()
+        cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+        cache.set("a", 1, ttl=100)
+        clock.now = 50.0
+        assert cache.get("a") == 1
+
+    def test_least_recently_used_entry_evicted(self):
+        cache = TTLCache(maxsize=2, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.evictions == 1
+
+    def test_items_skips_expired_entries(self):
+        clock = _FakeClock()
+        cache = TTLCache(maxsize=3, ttl=10, clock=clock)
+        cache.set("old", 1, ttl=1)
+        cache.set("new", 2)
+        clock.now = 5.0
+        assert cache.items() == [("new", 2)]
+
+    def test_pop_and_clear(self):
+        cache = TTLCache(maxsize=3, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.pop("a") == 1
+        assert cache.pop("a", "gone") == "gone"
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_non_positive_maxsize_rejected(self):
+        with pytest.raises(ValueError):
+            TTLCache(maxsize=0)
+
+
+# ---------------------------------------------------------------------------
+# SingleFlight
+# ---------------------------------------------------------------------------
+
+
+class TestSingleFlight:
+    def _run_concurrently(self, flight, key, fn, n=5):
+        results, errors = [], []
+
+        def _worker():
+            try:
+                results.append(flight.do(key, fn))
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=_worker) for _ in range(n)]
+        for t in threads:
+            t.start()
+        return threads, results, errors
+
+    def test_concurrent_identical_calls_share_one_execution(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def _slow():
+            calls.append(1)
+            release.wait(2)
+            return {"rows": 3}
+
+        threads, results, errors = self._run_concurrently(flight, "status", _slow)
+        deadline = time.monotonic() + 2
+        while flight.stats()["coalesced"] < 4 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        release.set()
+        for t in threads:
+            t.join(2)
+
+        assert len(calls) == 1
+        assert results == [{"rows": 3}] * 5
+        assert all(r is results[0] for r in results)
+        assert errors == []
+        assert flight.in_flight() == 0
+
+    def test_leader_exception_propagates_to_followers(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def _boom():
+            release.wait(2)
+            raise RuntimeError("db down")
+
+        threads, results, errors = self._run_concurrently(flight, "k", _boom, n=3)
+        deadline = time.monotonic() + 2
+        while flight.stats()["coalesced"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        release.set()
+        for t in threads:
+            t.join(2)
+
+        assert results == []
+        assert len(errors) == 3
+        assert flight.stats()["executions"] == 1
+
+    def test_sequential_calls_are_not_cached(self):
+        flight = SingleFlight()
+        counter = iter(range(10))
+        assert flight.do("k", lambda: next(counter)) == 0
+        assert flight.do("k", lambda: next(counter)) == 1
+
+    def test_reentrant_call_on_same_key_does_not_deadlock(self):
+        flight = SingleFlight()
+
+        def _outer():
+            return flight.do("k", lambda: "inner") + "+outer"
+
+        assert flight.do("k", _outer) == "inner+outer"
+        assert flight.in_flight() == 0
+
+    def test_wrap_keys_on_arguments(self):
+        flight = SingleFlight()
+
+        @flight.wrap
+        def double(x):
+            return x * 2
+
+        assert double(2) == 4
+        assert double(x=3) == 6
+        assert double.__name__ == "double"
+
+    def test_wrap_keeps_same_named_functions_of_different_modules_apart(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def _make(module, value, wait):
+            def load(number):
+                if wait:
+                    release.wait(2)
+                return value
+
+            load.__module__ = module
+            return flight.wrap(load)
+
+        stations_load = _make("app.services.station_service", "station", wait=True)
+        weather_load = _make("app.services.weather_service", "weather", wait=False)
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(stations_load(1)))
+        leader.start()
+        deadline = time.monotonic() + 2
+        while flight.in_flight() == 0 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        try:
+            assert weather_load(1) == "weather"
+        finally:
+            release.set()
+            leader.join(2)
+        assert results == ["station"]
+        assert flight.stats() == {"in_flight": 0, "executions": 2, "coalesced": 0}
@@ -0,0 +1,202 @@
+"""
+Tests for app.services.weather_ingest_service and the `flask weather` commands.
+
+OpenWeatherMap is replaced by a local stub HTTP server serving a OneCall-shaped payload;
+rows are written to the in-memory SQLite DB.
+"""
+
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.models import WeatherForecast
+from app.services.weather_ingest_service import (
+    WeatherIngestError,
+    ingest_weather,
+    parse_hourly,
+    run_scheduler,
+    upsert_forecasts,
+)
+
+
+def _onecall_payload(hours=48, temp=10.0, start=None):
+    start = start or datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return {
+        "lat": 53.35,
+        "lon": -6.26,
+        "hourly": [
+            {
+                "dt": int((start + timedelta(hours=i)).timestamp()),
+                "temp": temp + i * 0.1,
+                "feels_like": temp - 1,
+                "pressure": 1010,
+                "humidity": 80,
+                "uvi": 0.5,
+                "clouds": 75,
+                "visibility": 10000,
+                "wind_speed": 5.1,
+                "wind_deg": 220,
+                "pop": 0.2,
+                "weather": [{"id": 500, "description": "light rain", "icon": "10d"}],
+            }
+            for i in range(hours)
+        ],
+    }
+
+
+class _StubOpenWeather:
+    """Local HTTP server standing in for the OneCall endpoint."""
+
+    def __init__(self):
+        self.payload = _onecall_payload()
+        self.status = 200
+        self.requests = []
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(parse_qs(urlparse(self.path).query))
+                body = json.dumps(stub.payload).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/data/3.0/onecall"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture()
+def owm_stub():
+    stub = _StubOpenWeather()
+    with patch("config.OPENWEATHER_API_BASE_URL", stub.url):
+        yield stub
+    stub.close()
+
+
+class TestParseHourly:
+    def test_maps_onecall_fields_to_columns(self):
+        rows = parse_hourly(_onecall_payload(hours=2))
+        assert len(rows) == 2
+        row = rows[0]
+        assert row["forecast_time"].tzinfo is None
+        assert row["forecast_time"].minute == 0
+        assert row["weather_code"] == 500
+        assert row["description"] == "light rain"
+        assert row["pop"] == 0.2
+
+    def test_missing_hourly_block_raises(self):
+        with pytest.raises(WeatherIngestError):
+            parse_hourly({"current": {}})
+
+
+class TestIngestWeather:
+    def test_first_ingest_inserts_all_hours(self, app, db, owm_stub):
+        with app.app_context():
+            result = ingest_weather()
+            count = WeatherForecast.query.count()
+        assert result.inserted == 48
+        assert count == 48
+        query = owm_stub.requests[0]
+        assert query["appid"] == ["test-openweather-api-key"]
+        assert query["units"] == ["metric"]
+
+    def test_unchanged_values_are_not_rewritten(self, app, db, owm_stub):
+        with app.app_context():
+            ingest_weather()
+            first_fetch = db.session.execute(db.select(db.func.max(WeatherForecast.fetched_at))).scalar()
+            result = ingest_weather(force=True)
+            second_fetch = db.session.execute(db.select(db.func.max(WeatherForecast.fetched_at))).scalar()
+        assert result.unchanged == 48
+        assert result.inserted == result.updated == 0
+        assert first_fetch == second_fetch
+
+    def test_changed_hours_updated_in_place(self, app, db, owm_stub):
+        with app.app_context():
+            ingest_weather()
+            owm_stub.payload["hourly"][0]["temp"] = 25.0
+            result = ingest_weather(force=True)
+            first_hour = WeatherForecast.query.order_by(WeatherForecast.forecast_time).first()
+            count = WeatherForecast.query.count()
+        assert result.updated == 1
+        assert result.unchanged == 47
+        assert first_hour.temperature == 25.0
+        assert count == 48
+
+    def test_recent_forecast_skips_upstream_call(self, app, db, owm_stub):
+        with app.app_context():
+            ingest_weather()
+            result = ingest_weather()
+        assert result.fetched is False
+        assert len(owm_stub.requests) == 1
+
+    def test_changes_invalidate_weather_cache(self, app, db, owm_stub):
+        with app.app_context(), patch(
+            "app.services.weather_ingest_service.weather_payload_cache"
+        ) as mock_cache:
+            ingest_weather()
+            ingest_weather(force=True)
+        # Only the first (inserting) run changed anything
+        assert mock_cache.invalidate.call_count == 1
+
+    def test_upstream_error_raises(self, app, db, owm_stub):
+        owm_stub.status = 401
+        with app.app_context():
+            with pytest.raises(WeatherIngestError) as exc_info:
+                ingest_weather()
+            assert WeatherForecast.query.count() == 0
+        assert exc_info.value.status_code == 401
+
+
+class TestUpsertForecasts:
+    def test_single_statement_for_all_rows(self, app, db):
+        rows = parse_hourly(_onecall_payload(hours=48))
+        with app.app_context(), patch.object(db.session, "execute", wraps=db.session.execute) as spy:
+            upsert_forecasts(rows)
+        # One SELECT for existing rows, one multi-row upsert
+        assert spy.call_count == 2
+
+    def test_unsupported_dialect_raises_ingest_error(self, app, db):
+        rows = parse_hourly(_onecall_payload(hours=2))
+        with app.app_context(), patch.object(db.session.get_bind().dialect, "name", "oracle"):
+            with pytest.raises(WeatherIngestError) as exc_info:
+                upsert_forecasts(rows)
+        assert exc_info.value.status_code == 500
+        assert "oracle" in exc_info.value.message
+
+
+class TestScheduler:
+    def test_scheduler_survives_failures(self, app, db, owm_stub):
+        owm_stub.status = 500
+        with app.app_context():
+            runs = run_scheduler(interval=0, max_runs=2)
+        assert runs == 2
+        assert len(owm_stub.requests) == 2
+
+
+class TestWeatherCli:
+    def test_ingest_command(self, app, db, owm_stub):
+        result = app.test_cli_runner().invoke(args=["weather", "ingest"])
+        assert result.exit_code == 0, result.output
+        assert "48 inserted" in result.output
+
+    def test_ingest_command_reports_errors(self, app, db, owm_stub):
+        owm_stub.status = 503
+        result = app.test_cli_runner().invoke(args=["weather", "ingest", "--force"])
+        assert result.exit_code != 0
+        assert "HTTP 503" in result.output
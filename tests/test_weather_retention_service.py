@@ -0,0 +1,72 @@
+"""
+Unit tests for app.services.weather_retention_service (archive + batched delete of past forecast hours).
+"""
+
+from datetime import datetime, timedelta
+
+from app.models import ObservedWeather, WeatherForecast
+from app.services.weather_retention_service import get_observed_weather, prune_weather_forecasts
+
+
+def _hour(offset):
+    return datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(hours=offset)
+
+
+class TestPruneWeatherForecasts:
+    def test_past_hours_archived_and_deleted(self, app, db, make_weather_forecast):
+        with app.app_context():
+            for offset in (-3, -2, -1, 0, 1, 2):
+                make_weather_forecast(forecast_time=_hour(offset), temperature=10 + offset)
+            result = prune_weather_forecasts()
+            remaining = [f.forecast_time for f in WeatherForecast.query.order_by(WeatherForecast.forecast_time)]
+            archived = ObservedWeather.query.order_by(ObservedWeather.observed_time).all()
+
+        assert result.archived == result.deleted == 3
+        assert remaining == [_hour(0), _hour(1), _hour(2)]
+        assert [o.observed_time for o in archived] == [_hour(-3), _hour(-2), _hour(-1)]
+        assert archived[0].temperature == 7
+        assert archived[0].weather_code == 800
+
+    def test_deletes_in_batches(self, app, db, make_weather_forecast):
+        with app.app_context():
+            for offset in range(-7, 0):
+                make_weather_forecast(forecast_time=_hour(offset))
+            result = prune_weather_forecasts(batch_size=3)
+            assert WeatherForecast.query.count() == 0
+        assert result.deleted == 7
+        assert result.batches == 3
+
+    def test_rearchiving_same_hour_keeps_one_row(self, app, db, make_weather_forecast):
+        with app.app_context():
+            make_weather_forecast(forecast_time=_hour(-1), temperature=5.0)
+            prune_weather_forecasts()
+            # e.g. a late ingest re-inserted the hour with a revised value
+            make_weather_forecast(forecast_time=_hour(-1), temperature=6.0)
+            prune_weather_forecasts()
+            archived = ObservedWeather.query.all()
+        assert len(archived) == 1
+        assert archived[0].temperature == 6.0
+
+    def test_nothing_to_prune(self, app, db, make_weather_forecast):
+        with app.app_context():
+            make_weather_forecast(forecast_time=_hour(1))
+            result = prune_weather_forecasts()
+        assert result.deleted == 0
+        assert result.batches == 0
+
+    def test_get_observed_weather_range(self, app, db, make_weather_forecast):
+        with app.app_context():
+            for offset in (-3, -2, -1):
+                make_weather_forecast(forecast_time=_hour(offset))
+            prune_weather_forecasts()
+            rows = get_observed_weather(_hour(-2), _hour(-1))
+        assert [r.observed_time for r in rows] == [_hour(-2)]
+
+
+class TestPruneCommand:
+    def test_prune_command(self, app, db, make_weather_forecast):
+        with app.app_context():
+            make_weather_forecast(forecast_time=_hour(-2))
+        result = app.test_cli_runner().invoke(args=["weather", "prune"])
+        assert result.exit_code == 0, result.output
+        assert "Archived 1 past hours" in result.output
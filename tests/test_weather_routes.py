@@ -58,3 +58,55 @@ class TestGetWeatherForecastEndpoint:
         resp = client.get("/api/weather")
         # Status is either 404 or 500 (WeatherAPIError is always raised when empty)
         assert resp.status_code in (404, 500)
+
+
+class TestWeatherPayloadCaching:
+    def test_warm_request_skips_service_and_validation(self, client, db):
+        mock_data = {
+            "current": {"dt": 1700000000, "temp": 15.0, "weather": []},
+            "hourly": [],
+        }
+        from app.api import weather_routes
+
+        serializer = weather_routes._weather_json
+        with patch(PATCH_GET_WEATHER, return_value=mock_data) as mock_get, \
+             patch.object(serializer, "dumps", wraps=serializer.dumps) as mock_validate:
+            first = client.get("/api/weather")
+            second = client.get("/api/weather")
+        assert first.status_code == second.status_code == 200
+        assert first.data == second.data
+        assert mock_get.call_count == 1
+        assert mock_validate.call_count == 1
+
+    def test_etag_and_conditional_get(self, client, db):
+        mock_data = {
+            "current": {"dt": 1700000000, "temp": 15.0, "weather": []},
+            "hourly": [],
+        }
+        with patch(PATCH_GET_WEATHER, return_value=mock_data):
+            first = client.get("/api/weather")
+            etag = first.headers["ETag"]
+            second = client.get("/api/weather", headers={"If-None-Match": etag})
+        assert etag
+        assert second.status_code == 304
+        assert second.data == b""
+
+    def test_freshness_check_db_error_returns_json(self, client, db):
+        from sqlalchemy.exc import OperationalError
+
+        error = OperationalError("SELECT max(fetched_at)", {}, Exception("connection lost"))
+        with patch("app.services.weather_service.get_latest_fetched_at", side_effect=error):
+            resp = client.get("/api/weather")
+        assert resp.status_code == 500
+        body = resp.get_json()
+        assert body["code"] == 50001
+        assert "connection lost" in body["msg"]
+
+    def test_errors_are_not_cached(self, client, db):
+        mock_data = {
+            "current": {"dt": 1700000000, "temp": 15.0, "weather": []},
+            "hourly": [],
+        }
+        with patch(PATCH_GET_WEATHER, side_effect=[WeatherAPIError("no data", 404), mock_data]):
+            assert client.get("/api/weather").status_code == 404
+            assert client.get("/api/weather").status_code == 200
@@ -5,6 +5,7 @@ Uses the WeatherForecast model with the in-memory SQLite DB.
 """
 
 from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
 
 import pytest
 
@@ -120,3 +121,72 @@ class TestWeatherAPIError:
         err = WeatherAPIError("no data", 404)
         assert err.message == "no data"
         assert err.status_code == 404
+
+
+class TestWeatherPayloadCache:
+    def _cache(self, now, revalidate=60.0):
+        from app.services.weather_service import WeatherPayloadCache
+
+        ticks = {"t": 0.0}
+        cache = WeatherPayloadCache(
+            revalidate_seconds=revalidate, clock=lambda: ticks["t"], utcnow=lambda: now["value"]
+        )
+        return cache, ticks
+
+    def test_payload_reused_within_revalidation_window(self, app, make_weather_forecast):
+        now = {"value": datetime.utcnow()}
+        cache, _ = self._cache(now)
+        builds = []
+        with app.app_context():
+            make_weather_forecast()
+            first = cache.get(lambda: builds.append(1) or b"body")
+            with patch("app.services.weather_service.get_latest_fetched_at") as mock_latest:
+                second = cache.get(lambda: builds.append(1) or b"other")
+        assert first is second
+        assert len(builds) == 1
+        mock_latest.assert_not_called()
+        assert first.etag
+
+    def test_revalidation_keeps_payload_when_no_new_scrape(self, app, make_weather_forecast):
+        now = {"value": datetime.utcnow()}
+        cache, ticks = self._cache(now)
+        with app.app_context():
+            make_weather_forecast()
+            first = cache.get(lambda: b"body")
+            ticks["t"] = 120.0
+            second = cache.get(lambda: b"other")
+        assert second is first
+        assert cache.stats()["revalidations"] == 1
+
+    def test_new_scrape_rebuilds_payload(self, app, make_weather_forecast):
+        now = {"value": datetime.utcnow()}
+        cache, ticks = self._cache(now)
+        with app.app_context():
+            wf = make_weather_forecast()
+            cache.get(lambda: b"body")
+            wf.fetched_at = datetime.utcnow() + timedelta(minutes=5)
+            from app.extensions import db as _db
+            _db.session.commit()
+            ticks["t"] = 120.0
+            rebuilt = cache.get(lambda: b"fresh")
+        assert rebuilt.body == b"fresh"
+
+    def test_hour_rollover_rebuilds_payload(self, app, make_weather_forecast):
+        now = {"value": datetime(2026, 1, 1, 10, 30)}
+        cache, _ = self._cache(now)
+        with app.app_context():
+            make_weather_forecast()
+            cache.get(lambda: b"ten")
+            now["value"] = datetime(2026, 1, 1, 11, 0, 5)
+            payload = cache.get(lambda: b"eleven")
+        assert payload.body == b"eleven"
+        assert payload.hour == datetime(2026, 1, 1, 11)
+
+    def test_invalidate_forces_rebuild(self, app, make_weather_forecast):
+        now = {"value": datetime.utcnow()}
+        cache, _ = self._cache(now)
+        with app.app_context():
+            make_weather_forecast()
+            cache.get(lambda: b"old")
+            cache.invalidate()
+            assert cache.get(lambda: b"new").body == b"new"